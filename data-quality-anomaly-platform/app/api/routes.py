@@ -1,13 +1,28 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 from fastapi.security import OAuth2PasswordRequestForm
-from app.services.ingestion import parse_uploaded_file
-from app.services.data_quality import run_data_quality_checks
-from app.services.feature_engineering import generate_features
-from app.models.inference import load_model, score_anomaly
+from app.services.ingestion import parse_uploaded_file, iter_uploaded_file
+from app.services.aggregation import aggregate_chunks
+from app.services.profiling import profile_dataframe
+from app.services.feature_engineering import template_features
+from app.services.log_templates import get_template_miner
+from app.models.inference import score_anomaly, score_anomaly_batch
+from app.models.manager import model_manager
 from app.services.explainability import generate_explanation
-from app.services.drift_service import detect_drift
+from app.services.drift_service import detect_drift_from_reference
+from app.services.drift_engine import detect_drift_vectorized
+from app.services.result_cache import result_cache, cache_key, content_digest, stream_digest, stream_size
+from app.services.reference_store import (
+    register_reference, load_reference, ReferenceNotFoundError, ReferenceExistsError
+)
+from app.services.row_scoring import RowScorer, score_rows
+from app.core.config import (
+    ROW_SCORE_TOP_N, ROW_SCORE_MAX_TOP_N, LOG_TEMPLATES_ENABLED, RESULT_CACHE_MAX_CHUNKED_MB
+)
 from app.core.security import create_access_token
+from app.core.executor import stage_executor
 from app.api.deps import get_current_user
+from app.api.schemas import BatchScoreRequest, BatchScoreResponse
 
 router = APIRouter(prefix="/api", tags=["Ingestion"])
 
@@ -18,25 +33,111 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     access_token = create_access_token(data={"sub": form_data.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
-model = None
+@router.get("/model")
+async def model_status(current_user: str = Depends(get_current_user)):
+    return model_manager.status()
+
+@router.get("/executor")
+async def executor_status(current_user: str = Depends(get_current_user)):
+    return stage_executor.stats()
+
+@router.get("/cache")
+async def cache_status(current_user: str = Depends(get_current_user)):
+    return result_cache.stats()
 
 @router.post("/upload")
-async def upload_data(file: UploadFile = File(...), current_user: str = Depends(get_current_user)):
-    global model
+async def upload_data(
+    file: UploadFile = File(...),
+    chunked: bool = False,
+    dataset: Optional[str] = None,
+    columns: Optional[List[str]] = Query(None),
+    row_scores: bool = False,
+    top_n: int = Query(ROW_SCORE_TOP_N, ge=1, le=ROW_SCORE_MAX_TOP_N),
+    current_user: str = Depends(get_current_user)
+):
+    try:
+        model, model_version = model_manager.get(block=False)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    # Identical uploads scored by the same model version are served from
+    # the result cache. Uploads tied to a dataset are not cached: their
+    # cross-batch duplicate counts depend on what was uploaded before, and
+    # neither are large chunked uploads, which would be read twice.
+    key, cached, digest = None, None, None
+    if result_cache.enabled and dataset is None:
+        if not chunked:
+            content = await file.read()
+            digest = content_digest(content)
+        elif stream_size(file.file) <= RESULT_CACHE_MAX_CHUNKED_MB * 2**20:
+            digest = await stage_executor.run("hash", stream_digest, file.file, process=False)
+    if digest is not None:
+        key = cache_key(
+            digest, ext=file.filename.split(".")[-1].lower(), columns=columns, chunked=chunked,
+            row_scores=top_n if row_scores else None
+        )
+        cached = await stage_executor.run("cache", result_cache.get, key, model_version, process=False)
 
-    if model is None:
-        model = load_model()
+    template_miner = get_template_miner(dataset) if LOG_TEMPLATES_ENABLED else None
 
-    content = await file.read()
-    df = parse_uploaded_file(file.filename, content)
+    if cached is not None:
+        quality_result = cached["quality_result"]
+        anomaly_result = cached["anomaly_result"]
+        explanation = cached["explanation"]
+        row_result = cached.get("row_scores")
+    elif chunked:
+        # Bounded-memory mode: parse the upload stream chunk by chunk and
+        # fold each chunk into running quality / feature aggregates. Row
+        # scoring rides along on the same pass.
+        chunks = iter_uploaded_file(file.filename, file.file, columns=columns)
+        row_scorer = RowScorer(top_n=top_n) if row_scores else None
+        if row_scorer is not None:
+            chunks = row_scorer.observe(chunks)
+        quality_result, features = await stage_executor.run(
+            "profile", aggregate_chunks, chunks, dataset, template_miner,
+            process=False # Reads the request's spooled file
+        )
+        row_result = row_scorer.result() if row_scorer is not None else None
+    else:
+        if key is None:
+            content = await file.read()
+        df = await stage_executor.run("parse", parse_uploaded_file, file.filename, content, columns)
 
-    quality_result = run_data_quality_checks(df)
-    features = generate_features(df, quality_result["data_type"])
-    anomaly_result = score_anomaly(model, features)
+        quality_result, features = await stage_executor.run("profile", profile_dataframe, df, dataset)
+        if template_miner is not None and quality_result["data_type"] == "unstructured":
+            # The miner lives in this process: keep it off the process pool
+            features.update(await stage_executor.run(
+                "templates", template_features, df, template_miner, process=False
+            ))
 
-    explanation = None
-    if anomaly_result["prediction"] == "anomaly":
-        explanation = generate_explanation(model, features)
+        row_result = None
+        if row_scores:
+            row_result = await stage_executor.run("row_score", score_rows, df, top_n)
+
+    if cached is None:
+        anomaly_result = await stage_executor.run(
+            "score", score_anomaly, model, features, model_version, process=False
+        )
+
+        explanation = None
+        if anomaly_result["prediction"] == "anomaly":
+            explanation = await stage_executor.run(
+                "explain", generate_explanation, model, features,
+                model_version=model_version, process=False
+            )
+
+        # Template features depend on what the miner saw before this upload
+        if template_miner is not None and quality_result["data_type"] == "unstructured":
+            key = None
+
+        if key is not None:
+            await stage_executor.run("cache", result_cache.put, key, model_version, {
+                "quality_result": quality_result,
+                "features": features,
+                "anomaly_result": anomaly_result,
+                "explanation": explanation,
+                "row_scores": row_result,
+            }, process=False)
 
     return {
         "status": "success",
@@ -44,7 +145,30 @@ async def upload_data(file: UploadFile = File(...), current_user: str = Depends(
         "data_type": quality_result["data_type"],
         "quality_report": quality_result["quality_report"],
         "anomaly_result": anomaly_result,
-        "explanation": explanation
+        "model_version": model_version,
+        "explanation": explanation,
+        "row_scores": row_result,
+        "cached": cached is not None
+    }
+
+@router.post("/score/batch", response_model=BatchScoreResponse)
+async def score_batch(request: BatchScoreRequest, current_user: str = Depends(get_current_user)):
+    try:
+        model, model_version = model_manager.get(block=False)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    try:
+        results = await stage_executor.run(
+            "score", score_anomaly_batch, model, request.records, model_version, process=False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return {
+        "status": "success",
+        "model_version": model_version,
+        "results": results
     }
 
 @router.post("/drift")
@@ -56,14 +180,62 @@ async def check_drift(
     ref_content = await reference_file.read()
     curr_content = await current_file.read()
 
-    ref_df = parse_uploaded_file(reference_file.filename, ref_content)
-    curr_df = parse_uploaded_file(current_file.filename, curr_content)
+    ref_df = await stage_executor.run("parse", parse_uploaded_file, reference_file.filename, ref_content)
+    curr_df = await stage_executor.run("parse", parse_uploaded_file, current_file.filename, curr_content)
+
+    # The engine manages its own worker processes for wide tables
+    drift_report = await stage_executor.run("drift", detect_drift_vectorized, ref_df, curr_df, process=False)
+
+    return {
+        "status": "success",
+        "reference_file": reference_file.filename,
+        "current_file": current_file.filename,
+        "drift_report": drift_report
+    }
+
+@router.post("/drift/reference")
+async def create_drift_reference(
+    reference_file: UploadFile = File(...),
+    reference_id: Optional[str] = None,
+    current_user: str = Depends(get_current_user)
+):
+    ref_content = await reference_file.read()
+    ref_df = await stage_executor.run("parse", parse_uploaded_file, reference_file.filename, ref_content)
 
-    drift_report = detect_drift(ref_df, curr_df)
+    try:
+        manifest = await stage_executor.run("drift", register_reference, ref_df, reference_id)
+    except ReferenceNotFoundError:
+        raise HTTPException(status_code=422, detail="Invalid reference_id")
+    except ReferenceExistsError:
+        raise HTTPException(status_code=409, detail=f"Drift reference '{reference_id}' already exists")
 
     return {
         "status": "success",
+        "reference_id": manifest["reference_id"],
         "reference_file": reference_file.filename,
+        "row_count": manifest["row_count"],
+        "columns": [c["name"] for c in manifest["columns"]]
+    }
+
+@router.post("/drift/reference/{reference_id}")
+async def check_drift_against_reference(
+    reference_id: str,
+    current_file: UploadFile = File(...),
+    current_user: str = Depends(get_current_user)
+):
+    try:
+        reference = load_reference(reference_id)
+    except ReferenceNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Unknown drift reference '{reference_id}'")
+
+    curr_content = await current_file.read()
+    curr_df = await stage_executor.run("parse", parse_uploaded_file, current_file.filename, curr_content)
+
+    drift_report = await stage_executor.run("drift", detect_drift_from_reference, reference, curr_df)
+
+    return {
+        "status": "success",
+        "reference_id": reference_id,
         "current_file": current_file.filename,
         "drift_report": drift_report
     }
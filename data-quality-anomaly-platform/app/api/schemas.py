@@ -59,6 +59,40 @@ class StandardizedDataSchema(BaseModel):
     preview: Optional[List[Dict[str, Any]]]
 
 
+# -----------------------------
+# Batch scoring
+# -----------------------------
+
+class BatchScoreRequest(BaseModel):
+    """
+    Feature vectors to score in one call
+    """
+    records: List[Dict[str, float]] = Field(
+        ...,
+        description="List of feature vectors (feature name -> value)"
+    )
+
+
+class AnomalyResult(BaseModel):
+    anomaly_score: float
+    prediction: str
+    severity: str
+    missing_features: List[str] = Field(
+        default_factory=list,
+        description="Model features absent from the record (scored as missing)"
+    )
+    unexpected_features: List[str] = Field(
+        default_factory=list,
+        description="Record keys the model was not trained on (ignored)"
+    )
+
+
+class BatchScoreResponse(BaseModel):
+    status: str
+    model_version: Optional[str] = None
+    results: List[AnomalyResult]
+
+
 # -----------------------------
 # Error schema (clean API errors)
 # -----------------------------
@@ -0,0 +1,181 @@
+import os
+
+
+# -----------------------------
+# Logging
+# -----------------------------
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Log a trace span (request ID, stage, duration) for every pipeline stage
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "false").lower() == "true"
+
+# Long-lived bearer token scrapers send to /metrics (API tokens expire too
+# soon for a scrape job). Unset, every scrape is refused.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+# -----------------------------
+# Ingestion
+# -----------------------------
+
+# Rows per DataFrame chunk when an upload is parsed in chunked mode
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))
+
+# Bytes read from the upload stream at a time for line-oriented formats
+INGEST_CHUNK_BYTES = int(os.getenv("INGEST_CHUNK_BYTES", str(8 * 1024 * 1024)))
+
+# Shrink parsed uploads: low-cardinality strings become categoricals (when
+# distinct values are at most this share of the rows), and integers and
+# floats are narrowed where no value changes
+INGEST_OPTIMIZE_DTYPES = os.getenv("INGEST_OPTIMIZE_DTYPES", "true").lower() == "true"
+INGEST_CATEGORY_MAX_RATIO = float(os.getenv("INGEST_CATEGORY_MAX_RATIO", "0.5"))
+
+# PDF page extraction tasks in flight on the executor's process pool (0 =
+# one per process worker) and the page count below which PDFs are
+# extracted in-process
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+
+# Log template miner: templates kept (LRU) and masked lines cached
+LOG_TEMPLATE_MAX_CLUSTERS = int(os.getenv("LOG_TEMPLATE_MAX_CLUSTERS", "5000"))
+LOG_TEMPLATE_CACHE_SIZE = int(os.getenv("LOG_TEMPLATE_CACHE_SIZE", "100000"))
+# Per-dataset miners kept in memory (LRU); an evicted dataset starts over
+LOG_TEMPLATE_MAX_MINERS = int(os.getenv("LOG_TEMPLATE_MAX_MINERS", "32"))
+# Add template-frequency features (templates hashed into LOG_TEMPLATE_BUCKETS
+# buckets) to unstructured uploads and stream windows
+LOG_TEMPLATES_ENABLED = os.getenv("LOG_TEMPLATES_ENABLED", "false").lower() == "true"
+LOG_TEMPLATE_BUCKETS = int(os.getenv("LOG_TEMPLATE_BUCKETS", "32"))
+
+
+# -----------------------------
+# Data quality
+# -----------------------------
+
+# Directory holding per-dataset row fingerprint indexes (cross-upload duplicates)
+DEDUP_INDEX_DIR = os.getenv("DEDUP_INDEX_DIR", os.path.join("data", "dedup_index"))
+
+
+# -----------------------------
+# Result cache
+# -----------------------------
+
+# Cache /api/upload results by upload content hash + model version
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+
+# Directory of the on-disk tier (one subdirectory per model version)
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join("data", "result_cache"))
+
+# Size limits of the in-memory LRU and on-disk tiers, in MB
+RESULT_CACHE_MEMORY_MB = float(os.getenv("RESULT_CACHE_MEMORY_MB", "64"))
+RESULT_CACHE_DISK_MB = float(os.getenv("RESULT_CACHE_DISK_MB", "1024"))
+
+# Chunked uploads larger than this are not cached: hashing one takes a
+# full extra read of the upload before it is parsed
+RESULT_CACHE_MAX_CHUNKED_MB = float(os.getenv("RESULT_CACHE_MAX_CHUNKED_MB", "256"))
+
+
+# -----------------------------
+# Drift
+# -----------------------------
+
+# Directory holding registered drift reference profiles (memory-mapped .npy files)
+DRIFT_REFERENCE_DIR = os.getenv("DRIFT_REFERENCE_DIR", os.path.join("data", "drift_references"))
+
+# Column blocks of one drift check in flight on the executor's process pool
+# (0 = one per process worker, 1 = in-process)
+DRIFT_WORKERS = int(os.getenv("DRIFT_WORKERS", "0"))
+
+# Fewer common columns than this are always computed in-process
+DRIFT_PARALLEL_MIN_COLUMNS = int(os.getenv("DRIFT_PARALLEL_MIN_COLUMNS", "64"))
+
+
+# -----------------------------
+# Streaming
+# -----------------------------
+
+# A stream window is processed once it holds this many records...
+STREAM_WINDOW_SIZE = int(os.getenv("STREAM_WINDOW_SIZE", "1000"))
+
+# ...or once its first record is this old, whichever comes first
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "5"))
+
+# Windows queued between pipeline stages before consumption is paused
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "4"))
+
+STREAM_POLL_TIMEOUT_MS = int(os.getenv("STREAM_POLL_TIMEOUT_MS", "500"))
+
+# Registered drift reference (see /api/drift/reference) the stream is
+# monitored against; empty disables stream drift monitoring
+STREAM_DRIFT_REFERENCE = os.getenv("STREAM_DRIFT_REFERENCE", "")
+
+# Stream windows in the sliding and tumbling drift windows
+STREAM_DRIFT_SLIDING_WINDOWS = int(os.getenv("STREAM_DRIFT_SLIDING_WINDOWS", "10"))
+STREAM_DRIFT_TUMBLING_WINDOWS = int(os.getenv("STREAM_DRIFT_TUMBLING_WINDOWS", "10"))
+
+# PSI above which a column alerts as drifted (same cut as the batch report)
+STREAM_DRIFT_PSI_THRESHOLD = float(os.getenv("STREAM_DRIFT_PSI_THRESHOLD", "0.25"))
+
+# Page-Hinkley change detection on window means, in reference std units:
+# tolerated drift per window, and the cumulative deviation that alarms
+STREAM_DRIFT_PH_DELTA = float(os.getenv("STREAM_DRIFT_PH_DELTA", "0.1"))
+STREAM_DRIFT_PH_THRESHOLD = float(os.getenv("STREAM_DRIFT_PH_THRESHOLD", "2.0"))
+
+
+# -----------------------------
+# Alerting
+# -----------------------------
+
+# Alerts waiting for the webhook sender before new ones are dropped
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "1000"))
+
+# The first alert for a context is sent at once; repeats within this window
+# are sent as one message when it ends
+ALERT_COALESCE_SECONDS = float(os.getenv("ALERT_COALESCE_SECONDS", "10"))
+
+ALERT_RATE_PER_MINUTE = float(os.getenv("ALERT_RATE_PER_MINUTE", "30"))
+ALERT_MAX_RETRIES = int(os.getenv("ALERT_MAX_RETRIES", "3"))
+ALERT_TIMEOUT_SECONDS = float(os.getenv("ALERT_TIMEOUT_SECONDS", "5"))
+# Longest Retry-After honoured before an alert is given up on
+ALERT_MAX_RETRY_AFTER_SECONDS = float(os.getenv("ALERT_MAX_RETRY_AFTER_SECONDS", "60"))
+
+
+# -----------------------------
+# Model serving
+# -----------------------------
+
+# Detector trained by train_anomaly_model (see app.models.registry.MODEL_BUILDERS)
+MODEL_TYPE = os.getenv("MODEL_TYPE", "isolation_forest")
+
+# Load the Production model when the API starts instead of on first request
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "true").lower() == "true"
+
+# How often the registry is polled for a new Production version (0 disables)
+MODEL_POLL_INTERVAL_SECONDS = float(os.getenv("MODEL_POLL_INTERVAL_SECONDS", "30"))
+
+# Row-level scoring (/api/upload?row_scores=true): rows sampled to fit the
+# per-upload row detector and the share of them it flags, rows scored per
+# batch, and the number of most anomalous rows returned (default and cap)
+ROW_SCORE_FIT_ROWS = int(os.getenv("ROW_SCORE_FIT_ROWS", "10000"))
+ROW_SCORE_CONTAMINATION = float(os.getenv("ROW_SCORE_CONTAMINATION", "0.01"))
+ROW_SCORE_CHUNK_ROWS = int(os.getenv("ROW_SCORE_CHUNK_ROWS", "65536"))
+ROW_SCORE_TOP_N = int(os.getenv("ROW_SCORE_TOP_N", "10"))
+ROW_SCORE_MAX_TOP_N = int(os.getenv("ROW_SCORE_MAX_TOP_N", "1000"))
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+
+# Pools that run CPU-bound request stages off the event loop
+EXECUTOR_THREAD_WORKERS = int(os.getenv("EXECUTOR_THREAD_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+EXECUTOR_PROCESS_WORKERS = int(os.getenv("EXECUTOR_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+
+# Heavy stages allowed to run at once; the rest wait in line
+EXECUTOR_MAX_JOBS = int(os.getenv("EXECUTOR_MAX_JOBS", str(os.cpu_count() or 1)))
+
+# Stages sent to the process pool instead of threads (comma-separated,
+# e.g. "parse,profile,drift"); model stages always stay on threads
+EXECUTOR_PROCESS_STAGES = [
+    s.strip() for s in os.getenv("EXECUTOR_PROCESS_STAGES", "").split(",") if s.strip()
+]
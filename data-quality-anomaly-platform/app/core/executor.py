@@ -0,0 +1,191 @@
+import asyncio
+import contextvars
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Optional, Set
+
+from app.core.config import (
+    EXECUTOR_THREAD_WORKERS, EXECUTOR_PROCESS_WORKERS,
+    EXECUTOR_MAX_JOBS, EXECUTOR_PROCESS_STAGES
+)
+from app.core.metrics import registry
+
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "executor_queue_wait_seconds", "Time stages waited for an executor slot", ["stage"]
+)
+RUN_SECONDS = registry.histogram(
+    "executor_run_seconds", "Time stages ran on the executor pools", ["stage", "pool"]
+)
+
+# Latency samples kept per stage for percentiles
+_SAMPLES = 1000
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.active = 0
+        self.waiting = 0
+        self.wait_total = 0.0
+        self.run_total = 0.0
+        self.wait_samples: Deque[float] = deque(maxlen=_SAMPLES)
+        self.run_samples: Deque[float] = deque(maxlen=_SAMPLES)
+
+    @staticmethod
+    def _summary(total: float, count: int, samples: Deque[float]) -> Dict[str, float]:
+        ordered = sorted(samples)
+
+        def pct(q: float) -> float:
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+        return {
+            "mean": total / count if count else 0.0,
+            "p50": pct(0.50),
+            "p99": pct(0.99),
+            "max": ordered[-1] if ordered else 0.0,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "active": self.active,
+            "waiting": self.waiting,
+            "queue_wait_seconds": self._summary(self.wait_total, self.count, self.wait_samples),
+            "run_seconds": self._summary(self.run_total, self.count, self.run_samples),
+        }
+
+
+class StageExecutor:
+    """
+    Runs blocking pipeline stages (parse, profile, score, explain, drift)
+    off the event loop.
+
+    Stages run on a shared thread pool, or on a process pool when listed
+    in `process_stages` and the call allows it (model stages never do: the
+    model lives in this process). At most `max_jobs` stages run at once;
+    further calls wait without holding a pool slot, and both that wait and
+    the run time are recorded per stage.
+    """
+
+    def __init__(
+        self,
+        thread_workers: int = EXECUTOR_THREAD_WORKERS,
+        process_workers: int = EXECUTOR_PROCESS_WORKERS,
+        max_jobs: int = EXECUTOR_MAX_JOBS,
+        process_stages: Optional[Set[str]] = None,
+    ):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.max_jobs = max_jobs
+        self.process_stages = set(EXECUTOR_PROCESS_STAGES if process_stages is None else process_stages)
+
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        # asyncio primitives belong to one loop; keep a semaphore per loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._stats: Dict[str, StageStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def _pool(self, use_process: bool) -> Executor:
+        with self._pool_lock:
+            if use_process:
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(max_workers=self.process_workers)
+                return self._processes
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self.thread_workers, thread_name_prefix="stage"
+                )
+            return self._threads
+
+    def process_pool(self) -> Executor:
+        """
+        The shared process pool, for stages that fan CPU-bound work out
+        themselves instead of forking a pool per call.
+        """
+        return self._pool(True)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_jobs)
+        return semaphore
+
+    def _stage(self, stage: str) -> StageStats:
+        with self._stats_lock:
+            return self._stats.setdefault(stage, StageStats())
+
+    async def run(self, stage: str, fn: Callable[..., Any], *args, process: bool = True, **kwargs) -> Any:
+        """
+        Await fn(*args, **kwargs) on the stage's pool. Pass process=False
+        for calls whose arguments cannot cross a process boundary.
+        """
+        stats = self._stage(stage)
+        use_process = process and stage in self.process_stages
+        enqueued = time.perf_counter()
+        acquired = False
+
+        stats.waiting += 1
+        try:
+            async with self._semaphore():
+                acquired = True
+                started = time.perf_counter()
+                stats.waiting -= 1
+                stats.active += 1
+                call = partial(fn, *args, **kwargs)
+                if not use_process:
+                    # Carry the request ID into the worker thread's spans
+                    call = partial(contextvars.copy_context().run, call)
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(
+                        self._pool(use_process), call
+                    )
+                except Exception:
+                    stats.errors += 1
+                    raise
+                finally:
+                    finished = time.perf_counter()
+                    stats.active -= 1
+                    with self._stats_lock:
+                        stats.count += 1
+                        stats.wait_total += started - enqueued
+                        stats.run_total += finished - started
+                        stats.wait_samples.append(started - enqueued)
+                        stats.run_samples.append(finished - started)
+                    QUEUE_WAIT_SECONDS.observe(started - enqueued, stage=stage)
+                    RUN_SECONDS.observe(
+                        finished - started, stage=stage, pool="process" if use_process else "thread"
+                    )
+        finally:
+            if not acquired:
+                # Cancelled while waiting for a slot
+                stats.waiting -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stages = {name: stats.to_dict() for name, stats in self._stats.items()}
+        return {
+            "thread_workers": self.thread_workers,
+            "process_workers": self.process_workers,
+            "max_jobs": self.max_jobs,
+            "process_stages": sorted(self.process_stages),
+            "stages": stages,
+        }
+
+    def shutdown(self):
+        with self._pool_lock:
+            for pool in (self._threads, self._processes):
+                if pool is not None:
+                    pool.shutdown(wait=True)
+            self._threads = self._processes = None
+
+
+stage_executor = StageExecutor()
@@ -0,0 +1,11 @@
+import logging
+from app.core.config import LOG_LEVEL
+
+logging.basicConfig(
+    level=LOG_LEVEL,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,347 @@
+import bisect
+import contextvars
+import functools
+import math
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import TRACE_ENABLED
+from app.core.logger import get_logger
+
+trace_logger = get_logger("trace")
+
+# Latency buckets (seconds) shared by the stage histograms
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+# -----------------------------
+# Metric types
+# -----------------------------
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+def _simple_samples(metric) -> List[str]:
+    if metric.callback is not None:
+        value = metric.callback()
+        items = list(value.items()) if isinstance(value, dict) else [((), value)]
+    else:
+        with metric._lock:
+            items = list(metric._values.items())
+    return [f"{metric.name}{_format_labels(metric.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing count, incremented here or read from
+    `callback` at scrape time for components that keep their own counts.
+    """
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Any]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return _simple_samples(self)
+
+
+class Gauge(_Metric):
+    """
+    A settable gauge, or one read from `callback` at scrape time (returning
+    a number, or a dict of label-value tuples to numbers).
+    """
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Any]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[str]:
+        return _simple_samples(self)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(s[0]), s[1], s[2]) for key, s in self._series.items()]
+
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, callback))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format (0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A failing callback gauge must not break the whole scrape
+                trace_logger.warning(f"Could not collect {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# -----------------------------
+# Pipeline metrics
+# -----------------------------
+
+STAGE_SECONDS = registry.histogram(
+    "pipeline_stage_seconds",
+    "Time spent in each pipeline stage (profile = fused quality + features pass)",
+    ["stage"],
+)
+STAGE_ERRORS = registry.counter("pipeline_stage_errors_total", "Pipeline stage calls that raised", ["stage"])
+STAGE_ROWS = registry.counter("pipeline_rows_total", "Rows / records processed by each pipeline stage", ["stage"])
+STAGE_BYTES = registry.counter("pipeline_bytes_total", "Input bytes processed by each pipeline stage", ["stage"])
+
+MODEL_LOAD_SECONDS = registry.histogram(
+    "model_load_seconds", "Model load and explainer warm-up time per new version", ["phase"]
+)
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_seconds", "HTTP request latency by route", ["method", "route", "status"]
+)
+
+
+# -----------------------------
+# Request IDs and trace spans
+# -----------------------------
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+@contextmanager
+def trace_span(name: str, request_id: Optional[str] = None, **attributes) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block as a span tagged with the request ID (the current one
+    unless given). With TRACE_ENABLED the span is logged on exit;
+    otherwise this only costs the context manager. Yields a dict for
+    attributes added inside the block.
+    """
+    if not TRACE_ENABLED:
+        yield attributes
+        return
+
+    request_id = request_id or current_request_id()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        fields = " ".join(f"{k}={v}" for k, v in attributes.items())
+        status = f" error={error}" if error else ""
+        trace_logger.info(f"request_id={request_id} span={name} duration_ms={elapsed_ms:.2f} {fields}{status}".rstrip())
+
+
+class _StageTimer:
+    __slots__ = ("rows", "nbytes")
+
+    def __init__(self):
+        self.rows: Optional[int] = None
+        self.nbytes: Optional[int] = None
+
+
+@contextmanager
+def stage_timer(stage: str, request_id: Optional[str] = None) -> Iterator[_StageTimer]:
+    """
+    Record one pipeline stage call: latency, errors, and the rows / bytes
+    set on the yielded timer.
+    """
+    timer = _StageTimer()
+    started = time.perf_counter()
+    with trace_span(stage, request_id=request_id) as span:
+        try:
+            yield timer
+        except BaseException:
+            STAGE_ERRORS.inc(stage=stage)
+            raise
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+            if timer.rows is not None:
+                STAGE_ROWS.inc(timer.rows, stage=stage)
+                span["rows"] = timer.rows
+            if timer.nbytes is not None:
+                STAGE_BYTES.inc(timer.nbytes, stage=stage)
+                span["bytes"] = timer.nbytes
+
+
+def instrumented(
+    stage: str,
+    rows: Optional[Callable[..., int]] = None,
+    nbytes: Optional[Callable[..., int]] = None,
+    result_rows: Optional[Callable[[Any], int]] = None,
+):
+    """
+    Decorator form of stage_timer. `rows` and `nbytes` are called with the
+    function's arguments, `result_rows` with its return value.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage) as timer:
+                if rows is not None:
+                    timer.rows = rows(*args, **kwargs)
+                if nbytes is not None:
+                    timer.nbytes = nbytes(*args, **kwargs)
+                result = fn(*args, **kwargs)
+                if result_rows is not None:
+                    timer.rows = result_rows(result)
+                return result
+        return wrapper
+    return decorator
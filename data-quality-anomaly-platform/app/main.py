@@ -1,10 +1,67 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from app.api.routes import router
+from app.api.deps import verify_metrics_token
+from app.core.config import MODEL_PRELOAD
+from app.models.manager import model_manager
+from app.services.alerting import alert_dispatcher
+from app.core.executor import stage_executor
+from app.services.result_cache import result_cache
+from app.core.metrics import HTTP_REQUEST_SECONDS, registry, request_id_var, new_request_id
 
-app = FastAPI(title="Data Quality & Anomaly Platform")
+
+# Results cached under a replaced model version are stale
+model_manager.add_swap_listener(lambda old, new, model: result_cache.invalidate(keep_version=new))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the serving model (and its explainer) before taking traffic,
+    # then keep polling the registry for new Production versions
+    model_manager.start(preload=MODEL_PRELOAD)
+    yield
+    model_manager.stop()
+    alert_dispatcher.stop()
+    stage_executor.shutdown()
+
+
+app = FastAPI(title="Data Quality & Anomaly Platform", lifespan=lifespan)
 
 app.include_router(router)
 
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    # Honour an upstream request ID so spans join the caller's trace
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+        request_id_var.reset(token)
+
+
+# Scrapers send METRICS_TOKEN as a bearer token (Prometheus: `authorization`)
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Data Quality & Anomaly Platform"}
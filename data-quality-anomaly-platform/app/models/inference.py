@@ -1,23 +1,116 @@
+import threading
+import numpy as np
 import pandas as pd
 import mlflow.sklearn
+from typing import Any, Dict, Hashable, List, Optional
+from app.core.metrics import instrumented
+from ml.anomaly.compiled_forest import compiled_scorer
 
 MODEL_NAME = "data_quality_anomaly_model"
 MODEL_STAGE = "Production"
 
+# Batches up to this size are scored by the compiled IsolationForest;
+# above it sklearn's compiled tree traversal is faster
+COMPILED_MAX_ROWS = 1024
+
+# Feature column order per model version, fixed on first use
+_feature_orders: Dict[Hashable, List[str]] = {}
+_feature_orders_lock = threading.Lock()
+
+
 def load_model():
     model_uri = f"models:/{MODEL_NAME}/{MODEL_STAGE}"
     return mlflow.sklearn.load_model(model_uri)
 
-def score_anomaly(model, features: dict):
-    X = pd.DataFrame([features])
 
-    score = model.decision_function(X)[0]
-    prediction = model.predict(X)[0]
+def feature_order(model, feature_records: List[dict], model_version: Optional[Hashable] = None) -> List[str]:
+    """
+    Column order the model expects: the names it was fitted with, or the
+    keys of the first record scored for this model version.
+    """
+    if model_version is None:
+        fitted = getattr(model, "feature_names_in_", None)
+        return list(fitted) if fitted is not None else list(feature_records[0])
+
+    columns = _feature_orders.get(model_version)
+    if columns is None:
+        columns = feature_order(model, feature_records)
+        with _feature_orders_lock:
+            columns = _feature_orders.setdefault(model_version, columns)
+    return columns
+
 
-    severity = "high" if prediction == -1 else "normal"
+def drop_feature_order(model_version: Hashable):
+    """
+    Forget the column order of a model version, e.g. after a model swap.
+    """
+    with _feature_orders_lock:
+        _feature_orders.pop(model_version, None)
 
+
+def _result(score: float, missing: List[str], unexpected: List[str]) -> Dict[str, Any]:
+    # IsolationForest.predict is exactly decision_function < 0 (the score
+    # is already shifted by the model's offset_), so derive it instead of
+    # traversing every tree a second time
+    prediction = "anomaly" if score < 0 else "normal"
     return {
-        "anomaly_score": float(score),
-        "prediction": "anomaly" if prediction == -1 else "normal",
-        "severity": severity
+        "anomaly_score": score,
+        "prediction": prediction,
+        "severity": "high" if prediction == "anomaly" else "normal",
+        "missing_features": missing,
+        "unexpected_features": unexpected,
     }
+
+
+def schema_mismatches(columns: List[str], feature_records: List[dict]):
+    """
+    Per record, the model features it lacks (scored as NaN) and the keys
+    the model does not know (ignored).
+    """
+    known = set(columns)
+    missing = [[col for col in columns if col not in record] for record in feature_records]
+    unexpected = [[key for key in record if key not in known] for record in feature_records]
+    return missing, unexpected
+
+
+@instrumented("score", rows=lambda model, feature_records, *args, **kwargs: len(feature_records))
+def score_anomaly_batch(
+    model,
+    feature_records: List[dict],
+    model_version: Optional[Hashable] = None
+) -> List[Dict[str, Any]]:
+    """
+    Score many feature vectors with a single model evaluation per row.
+    Small batches for a versioned IsolationForest skip sklearn entirely
+    and go through the version's compiled scorer. Each result lists the
+    record's missing and unexpected features, so a record that does not
+    match the model's schema is not mistaken for a clean score.
+    """
+    if not feature_records:
+        return []
+
+    columns = feature_order(model, feature_records, model_version)
+    X = np.array(
+        [[record.get(col, np.nan) for col in columns] for record in feature_records],
+        dtype=np.float64
+    )
+    missing, unexpected = schema_mismatches(columns, feature_records)
+
+    scorer = None
+    if model_version is not None and len(feature_records) <= COMPILED_MAX_ROWS:
+        scorer = compiled_scorer(model, model_version)
+    if scorer is not None:
+        scores = scorer.decision_function(X)
+        return [_result(*result) for result in zip(scores.tolist(), missing, unexpected)]
+
+    if getattr(model, "feature_names_in_", None) is not None:
+        # One frame per batch keeps sklearn's feature-name check satisfied
+        X = pd.DataFrame(X, columns=columns, copy=False)
+
+    scores = np.asarray(model.decision_function(X), dtype=np.float64)
+
+    return [_result(*result) for result in zip(scores.tolist(), missing, unexpected)]
+
+
+def score_anomaly(model, features: dict, model_version: Optional[Hashable] = None):
+    return score_anomaly_batch(model, [features], model_version)[0]
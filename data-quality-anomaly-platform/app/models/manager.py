@@ -0,0 +1,259 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import mlflow.sklearn
+from mlflow.tracking import MlflowClient
+
+from app.core.config import MODEL_POLL_INTERVAL_SECONDS
+from app.core.logger import get_logger
+from app.core.metrics import MODEL_LOAD_SECONDS, registry
+from app.models.inference import MODEL_NAME, MODEL_STAGE, drop_feature_order
+from ml.anomaly.compiled_forest import compiled_scorer, drop_compiled, cached_compiled
+from ml.explain.shap_explainer import load_explainer, drop_explainer, cached_explainers
+
+logger = get_logger("model_manager")
+
+MODEL_SWAPS = registry.counter("model_swaps_total", "Model versions swapped into serving")
+
+SwapListener = Callable[[Optional[str], str, Any], None]
+
+
+class ModelManager:
+    """
+    Holds the serving model for one registry name / stage.
+
+    The model is preloaded at startup, the registry is polled for a new
+    version at the configured stage, and new versions are loaded (and
+    their SHAP explainer and compiled scorer built) on the polling thread
+    before being swapped in, so requests never wait on a load after
+    startup.
+    """
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        stage: str = MODEL_STAGE,
+        poll_interval: float = MODEL_POLL_INTERVAL_SECONDS,
+        client: Optional[MlflowClient] = None,
+        loader: Optional[Callable[[str], Any]] = None,
+    ):
+        self.model_name = model_name
+        self.stage = stage
+        self.poll_interval = poll_interval
+
+        self._client = client
+        self._loader = loader or self._load_from_registry
+
+        # (model, version) is replaced as one tuple so readers always see
+        # a consistent pair without taking a lock
+        self._current: Tuple[Any, Optional[str]] = (None, None)
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._background_load: Optional[threading.Thread] = None
+        self._background_lock = threading.Lock()
+        self._listeners: List[SwapListener] = []
+
+        self.load_history: List[Dict[str, Any]] = []
+        self.last_poll: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    # -----------------------------
+    # Registry access
+    # -----------------------------
+
+    @property
+    def client(self) -> MlflowClient:
+        if self._client is None:
+            self._client = MlflowClient()
+        return self._client
+
+    def _load_from_registry(self, version: str):
+        return mlflow.sklearn.load_model(f"models:/{self.model_name}/{version}")
+
+    def latest_version(self) -> Optional[str]:
+        versions = [
+            v for v in self.client.search_model_versions(f"name='{self.model_name}'")
+            if v.current_stage == self.stage
+        ]
+        if not versions:
+            return None
+        return str(max(versions, key=lambda v: int(v.version)).version)
+
+    # -----------------------------
+    # Loading and swapping
+    # -----------------------------
+
+    def add_swap_listener(self, listener: SwapListener):
+        """
+        Register a callback(old_version, new_version, model) run after
+        each swap.
+        """
+        self._listeners.append(listener)
+
+    def get(self, block: bool = True) -> Tuple[Any, Optional[str]]:
+        """
+        Current (model, version). If nothing has been loaded yet (e.g.
+        preload disabled or failed) it is loaded synchronously, or with
+        block=False (callers on the event loop) a background load is
+        started and RuntimeError raised at once.
+        """
+        model, version = self._current
+        if model is None:
+            if block:
+                self.refresh()
+            else:
+                self._start_background_load()
+            model, version = self._current
+            if model is None:
+                raise RuntimeError(
+                    f"No '{self.stage}' version of model '{self.model_name}' is loaded"
+                    + ("" if block else " yet, retry shortly")
+                )
+        return model, version
+
+    def _start_background_load(self):
+        with self._background_lock:
+            if self._background_load is not None and self._background_load.is_alive():
+                return
+            self._background_load = threading.Thread(
+                target=self.refresh, name="model-load", daemon=True
+            )
+            self._background_load.start()
+
+    @property
+    def model(self):
+        return self._current[0]
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._current[1]
+
+    def scorer(self):
+        """
+        Compiled scorer of the serving model (None if it is not an
+        IsolationForest).
+        """
+        model, version = self.get()
+        return compiled_scorer(model, version)
+
+    def refresh(self) -> bool:
+        """
+        Load and swap in the registry's latest version for the stage if it
+        differs from the loaded one. Returns True when a swap happened.
+        """
+        with self._load_lock:
+            self.last_poll = time.time()
+            try:
+                version = self.latest_version()
+                if version is None or version == self.version:
+                    return False
+
+                started = time.perf_counter()
+                model = self._loader(version)
+                loaded = time.perf_counter()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning(f"Model refresh failed: {self.last_error}")
+                return False
+
+            try:
+                explainer = load_explainer(model, version)
+            except Exception as e:
+                explainer = None
+                logger.warning(f"Building the SHAP explainer for version {version} failed: {e}")
+            if explainer is None:
+                # Not every detector is tree-based; serve it unexplained
+                logger.warning(f"No SHAP explainer for version {version}, anomalies will be unexplained")
+            warmed = time.perf_counter()
+            try:
+                compiled_scorer(model, version)
+            except Exception as e:
+                # Scoring falls back to the model's own decision_function
+                logger.warning(f"Compiling version {version} failed, scoring with sklearn: {e}")
+            compiled = time.perf_counter()
+
+            old_version = self.version
+            self._current = (model, version)
+            self.last_error = None
+
+            if old_version is not None:
+                drop_explainer(old_version)
+                drop_compiled(old_version)
+                drop_feature_order(old_version)
+
+            MODEL_LOAD_SECONDS.observe(loaded - started, phase="load")
+            MODEL_LOAD_SECONDS.observe(warmed - loaded, phase="explainer")
+            MODEL_LOAD_SECONDS.observe(compiled - warmed, phase="compile")
+            MODEL_SWAPS.inc()
+
+            self.load_history.append({
+                "version": version,
+                "loaded_at": time.time(),
+                "load_seconds": loaded - started,
+                "explainer_seconds": warmed - loaded,
+                "compile_seconds": compiled - warmed,
+            })
+            del self.load_history[:-50]
+            logger.info(
+                f"Serving {self.model_name} version {version} "
+                f"(was {old_version}, load {loaded - started:.2f}s)"
+            )
+
+        for listener in self._listeners:
+            try:
+                listener(old_version, version, model)
+            except Exception as e:
+                logger.warning(f"Model swap listener failed: {e}")
+
+        return True
+
+    # -----------------------------
+    # Background polling
+    # -----------------------------
+
+    def start(self, preload: bool = True):
+        if preload:
+            self.refresh()
+
+        if self.poll_interval > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._poll_loop, name="model-manager", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def status(self) -> Dict[str, Any]:
+        last_load = self.load_history[-1] if self.load_history else None
+        return {
+            "model_name": self.model_name,
+            "stage": self.stage,
+            "version": self.version,
+            "loaded": self.model is not None,
+            "last_load": last_load,
+            "load_history": self.load_history[-10:],
+            "last_poll": self.last_poll,
+            "last_error": self.last_error,
+            "poll_interval_seconds": self.poll_interval,
+        }
+
+
+model_manager = ModelManager()
+
+registry.gauge(
+    "model_info", "The serving model version (value is 1)", ["model", "version"],
+    callback=lambda: {(model_manager.model_name, model_manager.version): 1} if model_manager.version else {},
+)
+registry.gauge("shap_explainers_cached", "SHAP explainers held in the per-version cache", callback=cached_explainers)
+registry.gauge("compiled_scorers_cached", "Compiled IsolationForest scorers held per version", callback=cached_compiled)
@@ -1,5 +1,28 @@
 import mlflow
 import mlflow.sklearn
+from typing import Callable, Dict, Optional
+
+from ml.anomaly import autoencoder, isolation_forest
+from ml.anomaly.ensemble import build_ensemble
+
+# Detector builders by model type. Each takes n_jobs (cores for fitting /
+# scoring) and returns an unfitted estimator with fit, decision_function
+# and predict.
+MODEL_BUILDERS: Dict[str, Callable[..., object]] = {
+    "isolation_forest": isolation_forest.build_model,
+    "ensemble": build_ensemble,
+    "autoencoder": autoencoder.build_model,
+}
+
+
+def build_detector(model_type: str, n_jobs: Optional[int] = None):
+    builder = MODEL_BUILDERS.get(model_type)
+    if builder is None:
+        raise ValueError(
+            f"Unknown model type '{model_type}' (expected one of {', '.join(sorted(MODEL_BUILDERS))})"
+        )
+    return builder(n_jobs=n_jobs)
+
 
 def register_model(run_id: str, model_name: str):
     model_uri = f"runs:/{run_id}/anomaly_model"
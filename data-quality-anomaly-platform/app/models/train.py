@@ -1,21 +1,36 @@
 import pandas as pd
 import mlflow
 import mlflow.sklearn
+from typing import Dict, Optional
 
-from ml.anomaly.isolation_forest import build_model
+from app.core.config import MODEL_TYPE
+from app.models.registry import build_detector
 
 MODEL_NAME = "data_quality_anomaly_model"
 
-def train_anomaly_model(feature_records):
-    X = pd.DataFrame(feature_records)
-    model = build_model()
+def train_anomaly_model(
+    feature_records,
+    n_jobs: Optional[int] = None,
+    metrics: Optional[Dict[str, float]] = None,
+    model_type: str = MODEL_TYPE,
+):
+    """
+    Fit a `model_type` detector on feature records (a list of dicts or a
+    DataFrame), log it to MLflow with `metrics` and register it. `n_jobs`
+    fits in parallel (-1 = all cores).
+    """
+    X = feature_records if isinstance(feature_records, pd.DataFrame) else pd.DataFrame(feature_records)
+    model = build_detector(model_type, n_jobs=n_jobs)
 
     with mlflow.start_run() as run:
         model.fit(X)
 
+        mlflow.log_param("model_type", model_type)
         mlflow.sklearn.log_model(model, "anomaly_model")
         mlflow.log_metric("training_samples", X.shape[0])
         mlflow.log_metric("feature_count", X.shape[1])
+        for name, value in (metrics or {}).items():
+            mlflow.log_metric(name, value)
 
         mlflow.register_model(
             f"runs:/{run.info.run_id}/anomaly_model",
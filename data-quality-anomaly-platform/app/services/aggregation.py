@@ -0,0 +1,311 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from app.services.dedup import row_hashes, count_duplicates, check_cross_batch_duplicates
+from app.services.log_templates import TemplateCounts, TemplateMiner
+from app.core.metrics import instrumented
+
+
+# -----------------------------
+# Running column moments
+# -----------------------------
+
+class ColumnMoments:
+    """
+    Mergeable count / mean / variance / min / max for a block of columns.
+    Uses the parallel form of Welford's update (Chan et al.) so chunks can
+    be folded in one at a time without keeping the raw values.
+    """
+
+    def __init__(self, n_columns: int = 0):
+        self.count = np.zeros(n_columns, dtype=np.int64)
+        self.mean = np.zeros(n_columns, dtype=np.float64)
+        self.m2 = np.zeros(n_columns, dtype=np.float64)
+        self.min = np.full(n_columns, np.nan)
+        self.max = np.full(n_columns, np.nan)
+
+    def extend(self, n_new: int):
+        self.count = np.concatenate([self.count, np.zeros(n_new, dtype=np.int64)])
+        self.mean = np.concatenate([self.mean, np.zeros(n_new)])
+        self.m2 = np.concatenate([self.m2, np.zeros(n_new)])
+        self.min = np.concatenate([self.min, np.full(n_new, np.nan)])
+        self.max = np.concatenate([self.max, np.full(n_new, np.nan)])
+
+    def update(self, block: np.ndarray, index: List[int] = None):
+        """
+        Fold a (rows x columns) float block into the running moments.
+        NaNs are treated as missing. `index` maps the block's columns onto
+        tracked columns when only some of them are present.
+        """
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim == 1:
+            block = block[:, None]
+
+        valid = ~np.isnan(block)
+        count = valid.sum(axis=0)
+        complete = bool((count == block.shape[0]).all())
+        filled = block if complete else np.where(valid, block, 0.0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = filled.sum(axis=0) / count
+            centered = block - mean
+            if not complete:
+                centered[~valid] = 0.0
+            m2 = np.einsum("ij,ij->j", centered, centered)
+
+        # fmin / fmax ignore NaN and return NaN only for all-missing columns
+        if block.shape[0]:
+            block_min = np.fmin.reduce(block, axis=0)
+            block_max = np.fmax.reduce(block, axis=0)
+        else:
+            block_min = np.full(block.shape[1], np.nan)
+            block_max = np.full(block.shape[1], np.nan)
+
+        if index is None:
+            index = slice(None)
+        self._combine(index, count, np.nan_to_num(mean), m2, block_min, block_max)
+
+    def merge(self, other: "ColumnMoments", index: List[int] = None):
+        if index is None:
+            index = slice(None)
+        self._combine(index, other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, index, count, mean, m2, block_min, block_max):
+        own_count = self.count[index]
+        own_mean = self.mean[index]
+        total = own_count + count
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean - own_mean
+            new_mean = np.where(total > 0, own_mean + delta * count / total, 0.0)
+            new_m2 = np.where(
+                total > 0,
+                self.m2[index] + m2 + delta * delta * own_count * count / total,
+                0.0
+            )
+
+        self.count[index] = total
+        self.mean[index] = new_mean
+        self.m2[index] = new_m2
+        self.min[index] = np.fmin(self.min[index], block_min)
+        self.max[index] = np.fmax(self.max[index], block_max)
+
+    def means(self) -> np.ndarray:
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    def stds(self) -> np.ndarray:
+        """
+        Sample standard deviation (ddof=1), matching pandas.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+# -----------------------------
+# Structured Data Aggregate
+# -----------------------------
+
+def merge_dtype(previous: str, current: str) -> str:
+    if previous == current:
+        return previous
+    if previous in ("int64", "float64") and current in ("int64", "float64"):
+        return "float64"
+    return "object"
+
+
+class StructuredAggregate:
+    """
+    Running equivalent of check_structured_data + structured_features.
+    Memory grows with the number of columns, plus 8 bytes per row for
+    the row fingerprints used by duplicate counting.
+    """
+
+    def __init__(self):
+        self.columns: List[str] = []
+        self.dtypes: Dict[str, str] = {}
+        self.row_count = 0
+        self.nulls: Dict[str, int] = {}
+        self.numeric: Dict[str, bool] = {}
+        self.moments = ColumnMoments()
+        self._moment_index: Dict[str, int] = {}
+        self._row_hashes: List[np.ndarray] = []
+
+    def update(self, df: pd.DataFrame):
+        for col in df.columns:
+            if col not in self.nulls:
+                self.columns.append(col)
+                # Rows seen before the column appeared are missing for it
+                self.nulls[col] = self.row_count
+                self.dtypes[col] = str(df[col].dtype)
+                self.numeric[col] = True
+                self._moment_index[col] = len(self._moment_index)
+                self.moments.extend(1)
+            else:
+                self.dtypes[col] = merge_dtype(self.dtypes[col], str(df[col].dtype))
+
+        for col in self.columns:
+            if col not in df.columns:
+                self.nulls[col] += len(df)
+
+        null_counts = df.isnull().sum()
+        for col, n in null_counts.items():
+            self.nulls[col] += int(n)
+
+        numeric_cols = set(df.select_dtypes(include=np.number).columns)
+        for col in df.columns:
+            if col not in numeric_cols and not df[col].isnull().all():
+                self.numeric[col] = False
+
+        tracked = [c for c in df.columns if c in numeric_cols and self.numeric[c]]
+        if tracked:
+            block = df[tracked].to_numpy(dtype=np.float64, na_value=np.nan)
+            self.moments.update(block, [self._moment_index[c] for c in tracked])
+
+        self._row_hashes.append(row_hashes(df))
+        self.row_count += len(df)
+
+    def row_hashes(self) -> np.ndarray:
+        if not self._row_hashes:
+            return np.empty(0, dtype=np.uint64)
+        if len(self._row_hashes) > 1:
+            self._row_hashes = [np.concatenate(self._row_hashes)]
+        return self._row_hashes[0]
+
+    def quality_report(self, dataset: Optional[str] = None) -> Dict[str, Any]:
+        hashes = self.row_hashes()
+        report = {
+            "row_count": self.row_count,
+            "column_count": len(self.columns),
+            "missing_values": dict(self.nulls),
+            "duplicate_rows": count_duplicates(hashes),
+            "data_types": dict(self.dtypes),
+            "empty_columns": [
+                col for col in self.columns if self.nulls[col] == self.row_count
+            ],
+        }
+        if dataset:
+            report["cross_batch_duplicates"] = check_cross_batch_duplicates(dataset, hashes)
+        return report
+
+    def features(self) -> Dict[str, Any]:
+        features = {}
+
+        means = self.moments.means()
+        stds = self.moments.stds()
+
+        for col in self.columns:
+            if not self.numeric[col] or self.dtypes[col] == "object":
+                continue
+            i = self._moment_index[col]
+            features[f"{col}_mean"] = float(means[i])
+            features[f"{col}_std"] = float(stds[i])
+            features[f"{col}_min"] = float(self.moments.min[i])
+            features[f"{col}_max"] = float(self.moments.max[i])
+            features[f"{col}_missing_ratio"] = (
+                self.nulls[col] / self.row_count if self.row_count else float("nan")
+            )
+
+        features["row_count"] = self.row_count
+        features["column_count"] = len(self.columns)
+
+        return features
+
+
+# -----------------------------
+# Text / Unstructured Aggregate
+# -----------------------------
+
+class TextAggregate:
+    """
+    Running equivalent of check_text_data + text_features, plus
+    template_features when given a template miner.
+    """
+
+    def __init__(self, template_miner: Optional[TemplateMiner] = None):
+        self.total_lines = 0
+        self.empty_lines = 0
+        self.lengths = ColumnMoments(1)
+        self.templates = TemplateCounts(template_miner) if template_miner is not None else None
+
+    def update(self, df: pd.DataFrame):
+        texts = df[df.columns[0]]
+        self.total_lines += len(texts)
+        self.empty_lines += int(texts.isnull().sum())
+        self.lengths.update(texts.dropna().str.len().to_numpy(dtype=np.float64))
+        if self.templates is not None:
+            self.templates.update(texts.dropna().astype(str).tolist())
+
+    def _length_stats(self) -> Tuple[float, float, int, int]:
+        if self.lengths.count[0] == 0:
+            return 0, 0, 0, 0
+        return (
+            float(self.lengths.mean[0]),
+            float(self.lengths.stds()[0]),
+            int(self.lengths.min[0]),
+            int(self.lengths.max[0]),
+        )
+
+    def quality_report(self, dataset: Optional[str] = None) -> Dict[str, Any]:
+        avg, _, min_len, max_len = self._length_stats()
+        return {
+            "total_lines": self.total_lines,
+            "empty_lines": self.empty_lines,
+            "avg_text_length": avg,
+            "min_text_length": min_len,
+            "max_text_length": max_len,
+        }
+
+    def features(self) -> Dict[str, Any]:
+        avg, std, min_len, max_len = self._length_stats()
+        features = {
+            "line_count": self.total_lines,
+            "avg_text_length": avg,
+            "std_text_length": std,
+            "min_text_length": min_len,
+            "max_text_length": max_len,
+            "empty_line_ratio": (
+                self.empty_lines / self.total_lines if self.total_lines else float("nan")
+            ),
+        }
+        if self.templates is not None:
+            features.update(self.templates.features())
+        return features
+
+
+# -----------------------------
+# Dispatcher
+# -----------------------------
+
+@instrumented("profile")
+def aggregate_chunks(
+    chunks: Iterable[pd.DataFrame],
+    dataset: Optional[str] = None,
+    template_miner: Optional[TemplateMiner] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Run quality checks and feature generation over an iterator of
+    DataFrame chunks. Returns (quality_result, features) in the same shape
+    as profile_dataframe on the full frame (plus template features for
+    text when `template_miner` is given).
+    """
+    aggregate = None
+    data_type = "structured"
+
+    for chunk in chunks:
+        if aggregate is None:
+            if chunk.shape[1] == 1 and chunk.columns[0] == "text":
+                data_type = "unstructured"
+                aggregate = TextAggregate(template_miner)
+            else:
+                aggregate = StructuredAggregate()
+        aggregate.update(chunk)
+
+    if aggregate is None:
+        aggregate = StructuredAggregate()
+
+    quality_result = {
+        "data_type": data_type,
+        "quality_report": aggregate.quality_report(dataset)
+    }
+
+    return quality_result, aggregate.features()
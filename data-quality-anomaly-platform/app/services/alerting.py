@@ -1,41 +1,307 @@
-import logging
-import requests
 import os
-from typing import Dict, Any
+import queue
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional
+from app.core.config import (
+    ALERT_QUEUE_SIZE, ALERT_COALESCE_SECONDS, ALERT_RATE_PER_MINUTE,
+    ALERT_MAX_RETRIES, ALERT_TIMEOUT_SECONDS, ALERT_MAX_RETRY_AFTER_SECONDS
+)
+from app.core.logger import get_logger
+from app.core.metrics import instrumented, registry
 
-# Configure logger
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("alerting")
+logger = get_logger("alerting")
 
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 
-def send_alert(title: str, message: str, severity: str = "INFO", details: Dict[str, Any] = None):
+
+class AlertDispatcher:
+    """
+    Delivers webhook alerts from a background thread so callers (e.g. the
+    streaming pipeline) never wait on the network.
+
+    Alerts go through a bounded queue (full queue = alert dropped and
+    counted). The first alert for a coalescing key is sent at once; repeats
+    within the next `coalesce_seconds` are held and sent as one message
+    with a repeat count when that window ends, which opens the next one.
+    Deliveries are spaced to `rate_per_minute`, reuse one pooled HTTP
+    session and are retried with backoff on errors, 429 and 5xx responses
+    (a Retry-After longer than `max_retry_after` gives up on the alert).
+    """
+
+    def __init__(
+        self,
+        webhook_url: Optional[str] = SLACK_WEBHOOK_URL,
+        queue_size: int = ALERT_QUEUE_SIZE,
+        coalesce_seconds: float = ALERT_COALESCE_SECONDS,
+        rate_per_minute: float = ALERT_RATE_PER_MINUTE,
+        max_retries: int = ALERT_MAX_RETRIES,
+        timeout: float = ALERT_TIMEOUT_SECONDS,
+        max_retry_after: float = ALERT_MAX_RETRY_AFTER_SECONDS,
+        session: Optional[requests.Session] = None,
+        autostart: bool = True,
+    ):
+        self.webhook_url = webhook_url
+        self.coalesce_seconds = coalesce_seconds
+        self.min_interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_retry_after = max_retry_after
+        self.autostart = autostart
+
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session = session
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        # Coalescing key -> open window: the alert to send when it is due
+        # (None once sent), its repeat count and when the window opened
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._last_sent = 0.0
+        self._sending = False
+        self._flush_requested = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.counters = {
+            "queued": 0, "dropped": 0, "coalesced": 0,
+            "sent": 0, "failed": 0, "retries": 0,
+        }
+
+    # -----------------------------
+    # Producer side
+    # -----------------------------
+
+    def submit(self, alert: Dict[str, Any]) -> bool:
+        """
+        Queue an alert (title, message, severity, details, context) without
+        blocking. Returns False if it was dropped because the queue is full.
+        """
+        if self.autostart:
+            self.start()
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self._count("dropped")
+            logger.warning(f"Alert queue full, dropped alert: {alert.get('title')}")
+            return False
+        self._count("queued")
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            pending = sum(held["alert"] is not None for held in self._pending.values())
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "pending_coalesced": pending,
+            **counters,
+        }
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    # -----------------------------
+    # Sender thread
+    # -----------------------------
+
+    def start(self):
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Send everything queued or held for coalescing, then stop the thread.
+        A thread still delivering after `timeout` is kept, and exits once
+        it is done.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+            if thread.is_alive():
+                logger.warning("Alert dispatcher still delivering after stop timeout")
+            else:
+                self._thread = None
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until every queued alert has been delivered (held alerts are
+        sent without waiting out their window). Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                self._flush_requested = True
+                idle = not self._sending and all(held["alert"] is None for held in self._pending.values())
+            if idle and self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _run(self):
+        while True:
+            try:
+                alert = self._queue.get(timeout=self._next_wait())
+            except queue.Empty:
+                alert = None
+
+            if alert is not None:
+                self._hold(alert)
+                self._queue.task_done()
+
+            stopping = self._stop.is_set() and self._queue.empty()
+            self._send_due(force=stopping or self._take_flush_request())
+            if stopping:
+                return
+
+    def _take_flush_request(self) -> bool:
+        with self._lock:
+            if not self._flush_requested or not self._queue.empty():
+                return False
+            self._flush_requested = False
+            return True
+
+    def _hold(self, alert: Dict[str, Any]):
+        key = alert.get("context") or alert["title"]
+        with self._lock:
+            held = self._pending.get(key)
+            if held is None:
+                # No open window: due at once
+                self._pending[key] = {"alert": alert, "count": 1, "since": None}
+            elif held["alert"] is None:
+                held["alert"], held["count"] = alert, 1
+            else:
+                # Keep the latest details; the message reports the repeats
+                held["alert"] = alert
+                held["count"] += 1
+                self.counters["coalesced"] += 1
+
+    def _next_wait(self) -> float:
+        with self._lock:
+            if not self._pending:
+                return 0.1
+            if any(held["since"] is None for held in self._pending.values()):
+                return 0.0
+            oldest = min(held["since"] for held in self._pending.values())
+        return max(0.0, min(0.1, oldest + self.coalesce_seconds - time.monotonic()))
+
+    def _send_due(self, force: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            batch = []
+            for key, held in list(self._pending.items()):
+                expired = held["since"] is None or now - held["since"] >= self.coalesce_seconds
+                if held["alert"] is None:
+                    if expired:
+                        del self._pending[key] # Window closed without repeats
+                elif force or expired:
+                    batch.append(dict(held))
+                    # Repeats from now on are held for the next window
+                    self._pending[key] = {"alert": None, "count": 0, "since": now}
+            self._sending = bool(batch)
+
+        # _hold runs on this thread too, so no alert arrives mid-batch
+        try:
+            for held in batch:
+                self._deliver(held["alert"], held["count"])
+        finally:
+            with self._lock:
+                self._sending = False
+
+    @instrumented("alert")
+    def _deliver(self, alert: Dict[str, Any], count: int):
+        text = f"*{alert['severity']}* - {alert['title']}\n{alert['message']}\nDetails: {alert.get('details')}"
+        if count > 1:
+            text += f"\n({count} occurrences within {self.coalesce_seconds:g}s)"
+
+        for attempt in range(self.max_retries + 1):
+            wait = self._last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_sent = time.monotonic()
+
+            retry_after = None
+            try:
+                response = self.session.post(self.webhook_url, json={"text": text}, timeout=self.timeout)
+                if response.status_code < 400:
+                    self._count("sent")
+                    return
+                error = f"HTTP {response.status_code}"
+                if response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After")
+                elif response.status_code < 500:
+                    break # Client error: retrying will not help
+            except requests.RequestException as e:
+                error = str(e)
+
+            if attempt < self.max_retries:
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = 0.5 * 2 ** attempt
+                if delay > self.max_retry_after:
+                    error += f" (Retry-After {delay:g}s)"
+                    break
+                if self._stop.wait(delay):
+                    break # Shutting down: do not hold stop() up
+                self._count("retries")
+
+        self._count("failed")
+        logger.error(f"Failed to send Slack alert: {error}")
+
+
+alert_dispatcher = AlertDispatcher()
+
+registry.gauge(
+    "alert_queue_depth", "Alerts waiting in the dispatcher queue",
+    callback=lambda: alert_dispatcher.metrics()["queue_depth"],
+)
+registry.counter(
+    "alert_events_total", "Alert dispatcher events by outcome", ["outcome"],
+    callback=lambda: {(name,): n for name, n in alert_dispatcher.metrics().items()
+                      if name not in ("queue_depth", "queue_capacity", "pending_coalesced")},
+)
+
+
+def send_alert(title: str, message: str, severity: str = "INFO", details: Dict[str, Any] = None, context: Optional[str] = None):
     """
     Send alert to configured channels.
     Severity: INFO, WARNING, CRITICAL (P0-P3 mapping)
     """
-    
-    # 1. Log to console
+
+    # 1. Log
     log_msg = f"[{severity}] {title}: {message}"
-    print(f"\n>>> ALERT: {log_msg}") # Ensure visibility in demo
-    
     if details:
-        print(f"Details: {details}")
+        log_msg += f" Details: {details}"
 
     if severity == "CRITICAL":
         logger.error(log_msg)
     else:
         logger.info(log_msg)
-        
-    # 2. Slack Alert (if configured)
-    if SLACK_WEBHOOK_URL:
-        payload = {
-            "text": f"*{severity}* - {title}\n{message}\nDetails: {details}"
-        }
-        try:
-            requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=5)
-        except Exception as e:
-            logger.error(f"Failed to send Slack alert: {e}")
+
+    # 2. Slack Alert (if configured), delivered in the background
+    if alert_dispatcher.webhook_url:
+        alert_dispatcher.submit({
+            "title": title,
+            "message": message,
+            "severity": severity,
+            "details": details,
+            "context": context,
+        })
 
 def check_and_alert(anomaly_result: Dict[str, Any], context: str = "Batch"):
     """
@@ -49,4 +315,4 @@ def check_and_alert(anomaly_result: Dict[str, Any], context: str = "Batch"):
             "scores": anomaly_result.get("scores"),
             "threshold": anomaly_result.get("threshold")
         }
-        send_alert(title, message, severity, details)
+        send_alert(title, message, severity, details, context=context)
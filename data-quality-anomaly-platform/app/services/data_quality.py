@@ -1,5 +1,7 @@
 import pandas as pd
 from typing import Dict, Any
+from app.services.profiling import profile_structured, profile_text
+from app.core.metrics import instrumented
 
 
 # -----------------------------
@@ -7,20 +9,7 @@ from typing import Dict, Any
 # -----------------------------
 
 def check_structured_data(df: pd.DataFrame) -> Dict[str, Any]:
-    report = {}
-
-    report["row_count"] = df.shape[0]
-    report["column_count"] = df.shape[1]
-
-    report["missing_values"] = df.isnull().sum().to_dict()
-    report["duplicate_rows"] = int(df.duplicated().sum())
-
-    report["data_types"] = df.dtypes.astype(str).to_dict()
-
-    report["empty_columns"] = [
-        col for col in df.columns if df[col].isnull().all()
-    ]
-
+    report, _ = profile_structured(df)
     return report
 
 
@@ -29,18 +18,7 @@ def check_structured_data(df: pd.DataFrame) -> Dict[str, Any]:
 # -----------------------------
 
 def check_text_data(df: pd.DataFrame) -> Dict[str, Any]:
-    text_col = df.columns[0]
-
-    lengths = df[text_col].dropna().apply(len)
-
-    report = {
-        "total_lines": len(df),
-        "empty_lines": int(df[text_col].isnull().sum()),
-        "avg_text_length": float(lengths.mean()) if not lengths.empty else 0,
-        "min_text_length": int(lengths.min()) if not lengths.empty else 0,
-        "max_text_length": int(lengths.max()) if not lengths.empty else 0,
-    }
-
+    report, _ = profile_text(df)
     return report
 
 
@@ -48,6 +26,7 @@ def check_text_data(df: pd.DataFrame) -> Dict[str, Any]:
 # Dispatcher (Auto-detect type)
 # -----------------------------
 
+@instrumented("quality", rows=lambda df, *args, **kwargs: len(df))
 def run_data_quality_checks(df: pd.DataFrame) -> Dict[str, Any]:
     if df.shape[1] == 1 and df.columns[0] == "text":
         return {
@@ -0,0 +1,161 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from typing import Dict, List
+from app.core.config import DEDUP_INDEX_DIR
+from app.services.dtypes import source_dtype_frame
+
+
+# -----------------------------
+# Row fingerprints
+# -----------------------------
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    One vectorized 64-bit fingerprint per row. Rows with equal values
+    (NaN == NaN, like DataFrame.duplicated) get equal hashes. Hashes
+    depend on dtypes, so columns narrowed by optimize_dtypes are hashed
+    as parsed and fingerprints stay comparable across uploads.
+    """
+    return pd.util.hash_pandas_object(source_dtype_frame(df), index=False).to_numpy()
+
+
+def count_duplicates(hashes: np.ndarray) -> int:
+    """
+    Number of rows that repeat an earlier row, from their fingerprints.
+    """
+    if len(hashes) < 2:
+        return 0
+    ordered = np.sort(hashes)
+    return int(np.count_nonzero(ordered[1:] == ordered[:-1]))
+
+
+# -----------------------------
+# Cross-upload duplicate index
+# -----------------------------
+
+class DuplicateIndex:
+    """
+    Persistent set of row fingerprints for one dataset: a directory of
+    sorted uint64 .npy segments (8 bytes per distinct row ever ingested).
+    Lookups memory-map each segment and binary-search it.
+
+    Each batch appends one segment holding its new fingerprints; the
+    newest segment is merged into the one before it while it is at least
+    half that one's size, so segment sizes fall geometrically, there are
+    O(log n) of them, and each fingerprint is rewritten O(log n) times
+    rather than once per upload.
+
+    Writers take an exclusive lock file in the directory, so workers in
+    other processes can share an index; segments are written to a unique
+    temporary file and renamed into place, so readers only see whole files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _segments(self) -> List[str]:
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.startswith("seg-") and name.endswith(".npy")
+        )
+
+    @staticmethod
+    def _load(segment: str) -> np.ndarray:
+        try:
+            return np.load(segment, mmap_mode="r")
+        except FileNotFoundError:
+            # Merged away by another process since it was listed
+            return np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return sum(len(self._load(segment)) for segment in self._segments())
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Boolean mask of which fingerprints are already in the index.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found = np.zeros(len(hashes), dtype=bool)
+        for segment in self._segments():
+            index = self._load(segment)
+            if len(index) == 0:
+                continue
+            positions = np.searchsorted(index, hashes).clip(max=len(index) - 1)
+            found |= index[positions] == hashes
+        return found
+
+    def _write(self, segment: str, values: np.ndarray):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, values)
+            os.replace(tmp_path, segment)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _compact(self):
+        segments = self._segments()
+        while len(segments) > 1:
+            older, newer = segments[-2], segments[-1]
+            older_values, newer_values = self._load(older), self._load(newer)
+            if 2 * len(newer_values) < len(older_values):
+                break
+            # The merged segment keeps the older name; a crash before the
+            # unlink leaves values in two segments, which lookups tolerate
+            self._write(older, np.union1d(older_values, newer_values))
+            os.unlink(newer)
+            segments.pop()
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, "lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def check_and_add(self, hashes: np.ndarray) -> int:
+        """
+        Count rows whose fingerprint was seen in an earlier batch, then
+        record this batch's fingerprints.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        with self._locked():
+            seen = self.contains(hashes)
+            new = np.unique(hashes[~seen])
+            if len(new):
+                segments = self._segments()
+                sequence = int(os.path.basename(segments[-1])[4:-4]) + 1 if segments else 0
+                self._write(os.path.join(self.path, f"seg-{sequence:012d}.npy"), new)
+                self._compact()
+
+        return int(np.count_nonzero(seen))
+
+
+_indexes: Dict[str, DuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_duplicate_index(dataset: str) -> DuplicateIndex:
+    # Hashed so distinct names never share a directory
+    name = hashlib.sha256(dataset.encode()).hexdigest()[:32]
+    with _indexes_lock:
+        if name not in _indexes:
+            _indexes[name] = DuplicateIndex(os.path.join(DEDUP_INDEX_DIR, name))
+        return _indexes[name]
+
+
+def check_cross_batch_duplicates(dataset: str, hashes: np.ndarray) -> int:
+    return get_duplicate_index(dataset).check_and_add(hashes)
@@ -0,0 +1,255 @@
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.special import rel_entr
+from scipy.stats import kstwo
+
+from app.core.config import DRIFT_WORKERS, DRIFT_PARALLEL_MIN_COLUMNS
+from app.core.executor import stage_executor
+from app.core.metrics import instrumented
+from app.services.drift_service import (
+    KS_EXACT_MAX_N, calculate_ks_test, add_column_drift
+)
+
+PSI_BUCKETS = 10
+KL_BUCKETS = 10
+
+# Upper bound on (rows x columns) elements handled per column block, which
+# keeps the temporary arrays of one block to a few hundred MB
+BLOCK_ELEMENTS = 4_000_000
+
+
+# -----------------------------
+# 2-D building blocks
+# -----------------------------
+
+def sorted_block(df: pd.DataFrame, cols: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Columns sorted independently (NaNs last) and the non-null count of each.
+    """
+    block = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    counts = np.count_nonzero(~np.isnan(block), axis=0)
+    return np.sort(block, axis=0), counts
+
+
+def searchsorted_2d(sorted_values: np.ndarray, counts: np.ndarray, queries: np.ndarray, side: str = "left") -> np.ndarray:
+    """
+    Column-wise np.searchsorted: for each column j, the insertion points
+    of queries[:, j] into sorted_values[:counts[j], j]. All columns are
+    binary-searched together in log2(rows) vectorized steps.
+    """
+    n_rows = sorted_values.shape[0]
+    cols = np.arange(sorted_values.shape[1])
+
+    lo = np.zeros(queries.shape, dtype=np.intp)
+    hi = np.broadcast_to(counts, queries.shape).astype(np.intp)
+
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        values = sorted_values[np.minimum(mid, n_rows - 1), cols]
+        go_right = (values < queries) if side == "left" else (values <= queries)
+        go_right &= active
+        lo = np.where(go_right, mid + 1, lo)
+        hi = np.where(active & ~go_right, mid, hi)
+
+
+def histogram_2d(sorted_values: np.ndarray, counts: np.ndarray, bin_edges: np.ndarray) -> np.ndarray:
+    """
+    Column-wise np.histogram counts for per-column edges of shape
+    (bins + 1, columns).
+    """
+    cumulative = np.concatenate([
+        searchsorted_2d(sorted_values, counts, bin_edges[:-1], side="left"),
+        searchsorted_2d(sorted_values, counts, bin_edges[-1:], side="right"),
+    ])
+    return np.diff(cumulative, axis=0)
+
+
+def percentiles_2d(sorted_values: np.ndarray, counts: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """
+    Column-wise np.percentile (linear method) of the non-null values.
+    Returns shape (len(q), columns).
+    """
+    cols = np.arange(sorted_values.shape[1])
+    last = np.maximum(counts - 1, 0)
+
+    virtual = (q[:, None] / 100) * last
+    previous = np.floor(virtual).astype(np.intp)
+    following = np.minimum(previous + 1, last)
+    gamma = virtual - previous
+
+    a = sorted_values[previous, cols]
+    b = sorted_values[following, cols]
+    # Same two-sided lerp as numpy's percentile for a stable result
+    diff = b - a
+    return np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+
+
+# -----------------------------
+# Batch statistics
+# -----------------------------
+
+def _psi_2d(ref_sorted, ref_counts, cur_sorted, cur_counts, buckets: int = PSI_BUCKETS) -> np.ndarray:
+    valid_rows = np.arange(1, ref_sorted.shape[0])[:, None] < ref_counts
+    distinct = np.where(
+        ref_counts > 0,
+        1 + np.count_nonzero((np.diff(ref_sorted, axis=0) != 0) & valid_rows, axis=0),
+        0
+    )
+
+    breakpoints = np.arange(0, buckets + 1) / (buckets) * 100
+    edges = np.where(
+        distinct > buckets,
+        percentiles_2d(ref_sorted, ref_counts, breakpoints),
+        breakpoints[:, None]
+    )
+
+    expected = histogram_2d(ref_sorted, ref_counts, edges) / ref_counts
+    actual = histogram_2d(cur_sorted, cur_counts, edges) / cur_counts
+
+    expected = np.where(expected == 0, 0.0001, expected)
+    actual = np.where(actual == 0, 0.0001, actual)
+    return np.sum((actual - expected) * np.log(actual / expected), axis=0)
+
+
+def _ks_statistic_2d(ref_sorted, ref_counts, cur_sorted, cur_counts) -> np.ndarray:
+    """
+    Two-sample KS statistic per column from a merged column-wise sort,
+    evaluating the CDF gap only at the last element of each tie group.
+    """
+    merged = np.concatenate([ref_sorted, cur_sorted])
+    order = np.argsort(merged, axis=0, kind="stable")
+    values = np.take_along_axis(merged, order, axis=0)
+
+    from_ref = order < ref_sorted.shape[0]
+    valid = ~np.isnan(values)
+    cdf1 = np.cumsum(from_ref & valid, axis=0) / ref_counts
+    cdf2 = np.cumsum(~from_ref & valid, axis=0) / cur_counts
+
+    group_end = np.ones(values.shape, dtype=bool)
+    group_end[:-1] = values[1:] != values[:-1]
+    evaluate = group_end & valid
+
+    return np.max(np.where(evaluate, np.abs(cdf1 - cdf2), 0.0), axis=0)
+
+
+def _kl_2d(ref_sorted, ref_counts, cur_sorted, cur_counts, buckets: int = KL_BUCKETS) -> np.ndarray:
+    cols = np.arange(ref_sorted.shape[1])
+    low = np.minimum(ref_sorted[0], cur_sorted[0])
+    high = np.maximum(ref_sorted[ref_counts - 1, cols], cur_sorted[cur_counts - 1, cols])
+    constant = low == high
+
+    edges = np.linspace(low, np.where(constant, low + 1, high), buckets + 1, axis=0)
+    widths = np.diff(edges, axis=0)
+
+    ref_counts_hist = histogram_2d(ref_sorted, ref_counts, edges)
+    cur_counts_hist = histogram_2d(cur_sorted, cur_counts, edges)
+    ref_hist = ref_counts_hist / widths / ref_counts_hist.sum(axis=0)
+    cur_hist = cur_counts_hist / widths / cur_counts_hist.sum(axis=0)
+
+    ref_hist = np.where(ref_hist == 0, 1e-10, ref_hist)
+    cur_hist = np.where(cur_hist == 0, 1e-10, cur_hist)
+
+    p = ref_hist / ref_hist.sum(axis=0)
+    q = cur_hist / cur_hist.sum(axis=0)
+    return np.where(constant, 0.0, np.sum(rel_entr(p, q), axis=0))
+
+
+def drift_for_block(reference_df: pd.DataFrame, current_df: pd.DataFrame, cols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    PSI, KS and KL for a block of columns at once. Columns without data
+    on either side are skipped, as in detect_drift.
+    """
+    ref_sorted, ref_counts = sorted_block(reference_df, cols)
+    cur_sorted, cur_counts = sorted_block(current_df, cols)
+
+    keep = (ref_counts > 0) & (cur_counts > 0)
+    if not keep.any():
+        return {}
+    cols = [col for col, k in zip(cols, keep) if k]
+    ref_sorted, ref_counts = ref_sorted[:, keep], ref_counts[keep]
+    cur_sorted, cur_counts = cur_sorted[:, keep], cur_counts[keep]
+
+    psi = _psi_2d(ref_sorted, ref_counts, cur_sorted, cur_counts)
+    kl = _kl_2d(ref_sorted, ref_counts, cur_sorted, cur_counts)
+    statistic = _ks_statistic_2d(ref_sorted, ref_counts, cur_sorted, cur_counts)
+
+    en = np.round(ref_counts * cur_counts / (ref_counts + cur_counts))
+    p_values = np.clip(kstwo.sf(statistic, en), 0, 1)
+
+    results = {}
+    for j, col in enumerate(cols):
+        n1, n2 = int(ref_counts[j]), int(cur_counts[j])
+        if max(n1, n2) <= KS_EXACT_MAX_N:
+            # Small samples: ks_2samp's exact p-value
+            ks = calculate_ks_test(ref_sorted[:n1, j], cur_sorted[:n2, j])
+        else:
+            ks = {"statistic": float(statistic[j]), "p_value": float(p_values[j])}
+        results[col] = {"psi": float(psi[j]), "ks_test": ks, "kl_divergence": float(kl[j])}
+
+    return results
+
+
+# -----------------------------
+# Parallel execution
+# -----------------------------
+
+def _column_blocks(cols: List[str], n_rows: int) -> List[List[str]]:
+    size = max(1, BLOCK_ELEMENTS // max(n_rows, 1))
+    return [cols[i:i + size] for i in range(0, len(cols), size)]
+
+
+@instrumented("drift", rows=lambda reference_df, current_df, *args, **kwargs: len(current_df))
+def detect_drift_vectorized(
+    reference_df: pd.DataFrame,
+    current_df: pd.DataFrame,
+    n_jobs: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Same output as detect_drift, computed for blocks of columns at once.
+    Tables with at least DRIFT_PARALLEL_MIN_COLUMNS common columns are
+    split across the stage executor's shared process pool, with at most
+    `n_jobs` blocks in flight (DRIFT_WORKERS by default, else the pool's
+    size; 1 computes every block here).
+    """
+    curr_numerics = set(current_df.select_dtypes(include=[np.number]).columns)
+    common_cols = [
+        col for col in reference_df.select_dtypes(include=[np.number]).columns
+        if col in curr_numerics
+    ]
+
+    n_rows = reference_df.shape[0] + current_df.shape[0]
+    blocks = _column_blocks(common_cols, n_rows)
+
+    n_jobs = n_jobs or DRIFT_WORKERS or stage_executor.process_workers
+    if n_jobs > 1 and len(blocks) > 1 and len(common_cols) >= DRIFT_PARALLEL_MIN_COLUMNS:
+        # Each task carries only its block's columns; bounding the tasks
+        # in flight bounds the copies waiting in the pool's queue
+        pool = stage_executor.process_pool()
+        block_results = []
+        in_flight: Deque[Future] = deque()
+        for cols in blocks:
+            in_flight.append(pool.submit(drift_for_block, reference_df[cols], current_df[cols], cols))
+            if len(in_flight) >= n_jobs:
+                block_results.append(in_flight.popleft().result())
+        while in_flight:
+            block_results.append(in_flight.popleft().result())
+    else:
+        block_results = [drift_for_block(reference_df, current_df, cols) for cols in blocks]
+
+    drift_summary = {
+        "columns_analyzed": len(common_cols),
+        "drifted_columns": 0,
+        "details": {}
+    }
+    for results in block_results:
+        for col, stats in results.items():
+            add_column_drift(drift_summary, col, stats["psi"], stats["ks_test"], stats["kl_divergence"])
+
+    return drift_summary
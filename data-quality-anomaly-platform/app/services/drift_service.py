@@ -1,7 +1,11 @@
 import pandas as pd
 import numpy as np
-from scipy.stats import ks_2samp, entropy
-from typing import Dict, Any, List
+from scipy.stats import ks_2samp, entropy, kstwo
+from typing import Dict, Any, List, Optional
+from app.core.metrics import instrumented
+
+# ks_2samp computes exact p-values up to this sample size, asymptotic above
+KS_EXACT_MAX_N = 10000
 
 def calculate_psi(expected: pd.Series, actual: pd.Series, buckets: int = 10) -> float:
     """
@@ -37,13 +41,46 @@ def calculate_psi(expected: pd.Series, actual: pd.Series, buckets: int = 10) ->
         # Fallback for unique value binning issues
         return 0.0
 
+    return psi_from_percents(expected_percents, actual_percents)
+
+def psi_from_percents(expected_percents: np.ndarray, actual_percents: np.ndarray) -> float:
+    """
+    PSI from per-bucket proportions (the last step of calculate_psi).
+    """
     # Avoid division by zero
     expected_percents = np.where(expected_percents == 0, 0.0001, expected_percents)
     actual_percents = np.where(actual_percents == 0, 0.0001, actual_percents)
 
-    psi_value = np.sum((expected_percents - actual_percents) * np.log(actual_percents / expected_percents))
+    psi_value = np.sum((actual_percents - expected_percents) * np.log(actual_percents / expected_percents))
     return float(psi_value)
 
+def psi_breakpoints(expected_sorted: np.ndarray, buckets: int = 10) -> Optional[np.ndarray]:
+    """
+    The bucket edges calculate_psi would use for `expected`, computed
+    from its sorted non-null values. None means PSI falls back to 0.0.
+    """
+    breakpoints = np.arange(0, buckets + 1) / (buckets) * 100
+    distinct = 1 + int(np.count_nonzero(np.diff(expected_sorted))) if len(expected_sorted) else 0
+
+    if distinct > buckets:
+        try:
+            breakpoints = np.percentile(expected_sorted, breakpoints)
+        except Exception:
+            return None
+
+    return breakpoints
+
+def histogram_from_sorted(values_sorted: np.ndarray, bin_edges: np.ndarray) -> np.ndarray:
+    """
+    Same counts as np.histogram(values, bins=bin_edges), answered with a
+    binary search per edge instead of a pass over the values.
+    """
+    cumulative = np.concatenate([
+        np.searchsorted(values_sorted, bin_edges[:-1], side="left"),
+        np.searchsorted(values_sorted, bin_edges[-1:], side="right"),
+    ])
+    return np.diff(cumulative)
+
 def calculate_ks_test(reference_col: pd.Series, current_col: pd.Series) -> Dict[str, float]:
     """
     Kolmogorov-Smirnov Test
@@ -51,6 +88,27 @@ def calculate_ks_test(reference_col: pd.Series, current_col: pd.Series) -> Dict[
     statistic, p_value = ks_2samp(reference_col, current_col)
     return {"statistic": float(statistic), "p_value": float(p_value)}
 
+def calculate_ks_from_sorted(reference_sorted: np.ndarray, current_col: np.ndarray) -> Dict[str, float]:
+    """
+    Kolmogorov-Smirnov Test against an already-sorted reference sample.
+    Matches ks_2samp: small samples go through it for the exact p-value,
+    larger ones use the same asymptotic p-value without re-sorting the
+    reference.
+    """
+    n1, n2 = len(reference_sorted), len(current_col)
+    if max(n1, n2) <= KS_EXACT_MAX_N:
+        return calculate_ks_test(reference_sorted, current_col)
+
+    current_sorted = np.sort(current_col)
+    data_all = np.concatenate([reference_sorted, current_sorted])
+    cdf1 = np.searchsorted(reference_sorted, data_all, side="right") / n1
+    cdf2 = np.searchsorted(current_sorted, data_all, side="right") / n2
+    statistic = float(np.max(np.abs(cdf1 - cdf2)))
+
+    en = n1 * n2 / (n1 + n2)
+    p_value = float(np.clip(kstwo.sf(statistic, np.round(en)), 0, 1))
+    return {"statistic": statistic, "p_value": p_value}
+
 def calculate_kl_divergence(reference_col: pd.Series, current_col: pd.Series, buckets: int = 10) -> float:
     """
     KL Divergence
@@ -73,6 +131,43 @@ def calculate_kl_divergence(reference_col: pd.Series, current_col: pd.Series, bu
     
     return float(entropy(ref_hist, curr_hist))
 
+def calculate_kl_from_sorted(reference_sorted: np.ndarray, current_col: np.ndarray, buckets: int = 10) -> float:
+    """
+    KL Divergence against an already-sorted reference sample. The
+    reference histogram over the shared range is read off the sorted
+    values with binary searches.
+    """
+    low = min(reference_sorted[0], np.min(current_col))
+    high = max(reference_sorted[-1], np.max(current_col))
+    # Check if data is constant
+    if low == high:
+        return 0.0
+
+    curr_hist, bin_edges = np.histogram(current_col, bins=buckets, range=(low, high), density=True)
+    ref_counts = histogram_from_sorted(reference_sorted, bin_edges)
+    ref_hist = ref_counts / np.diff(bin_edges) / ref_counts.sum()
+
+    # Avoid zero probability
+    ref_hist = np.where(ref_hist == 0, 1e-10, ref_hist)
+    curr_hist = np.where(curr_hist == 0, 1e-10, curr_hist)
+
+    return float(entropy(ref_hist, curr_hist))
+
+def add_column_drift(drift_summary: Dict[str, Any], col, psi: float, ks: Dict[str, float], kl: float):
+    # Drift logic
+    is_drifted = False
+    if psi > 0.25 or ks["p_value"] < 0.05:
+        is_drifted = True
+        drift_summary["drifted_columns"] += 1
+
+    drift_summary["details"][col] = {
+        "psi": psi,
+        "ks_test": ks,
+        "kl_divergence": kl,
+        "drift_detected": is_drifted
+    }
+
+@instrumented("drift", rows=lambda reference_df, current_df: len(current_df))
 def detect_drift(reference_df: pd.DataFrame, current_df: pd.DataFrame) -> Dict[str, Any]:
     """
     Detect drift between two dataframes column by column.
@@ -101,17 +196,37 @@ def detect_drift(reference_df: pd.DataFrame, current_df: pd.DataFrame) -> Dict[s
         ks = calculate_ks_test(ref_data, curr_data)
         kl = calculate_kl_divergence(ref_data, curr_data)
         
-        # Drift logic
-        is_drifted = False
-        if psi > 0.25 or ks["p_value"] < 0.05:
-             is_drifted = True
-             drift_summary["drifted_columns"] += 1
-             
-        drift_summary["details"][col] = {
-            "psi": psi,
-            "ks_test": ks,
-            "kl_divergence": kl,
-            "drift_detected": is_drifted
-        }
+        add_column_drift(drift_summary, col, psi, ks, kl)
         
     return drift_summary
+
+@instrumented("drift", rows=lambda reference, current_df: len(current_df))
+def detect_drift_from_reference(reference, current_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Detect drift of current_df against a registered reference profile
+    (see reference_store). Same output as detect_drift, but the reference
+    side is never re-parsed, re-sorted or re-binned.
+    """
+    curr_numerics = set(current_df.select_dtypes(include=[np.number]).columns)
+    common_cols = [col for col in reference.columns if col in curr_numerics]
+
+    drift_summary = {
+        "columns_analyzed": len(common_cols),
+        "drifted_columns": 0,
+        "details": {}
+    }
+
+    for col in common_cols:
+        ref_sorted = reference.sorted_values(col)
+        curr_data = current_df[col].dropna().to_numpy(dtype=np.float64)
+
+        if len(ref_sorted) == 0 or len(curr_data) == 0:
+            continue
+
+        psi = reference.psi(col, curr_data)
+        ks = calculate_ks_from_sorted(ref_sorted, curr_data)
+        kl = calculate_kl_from_sorted(ref_sorted, curr_data)
+
+        add_column_drift(drift_summary, col, psi, ks, kl)
+
+    return drift_summary
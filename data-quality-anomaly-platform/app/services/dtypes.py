@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional
+from app.core.config import INGEST_CATEGORY_MAX_RATIO
+
+# Smallest first; unsigned types are only tried for non-negative columns
+_INT_TYPES = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32, np.int64]
+_NULLABLE_INT_TYPES = {
+    np.int8: "Int8", np.uint8: "UInt8", np.int16: "Int16", np.uint16: "UInt16",
+    np.int32: "Int32", np.uint32: "UInt32", np.int64: "Int64",
+}
+
+
+# -----------------------------
+# Per-column conversions
+# -----------------------------
+
+def _smallest_int(lo, hi):
+    for int_type in _INT_TYPES:
+        info = np.iinfo(int_type)
+        if info.min <= lo and hi <= info.max:
+            return int_type
+    return None
+
+
+def _narrow_int(col: pd.Series) -> Optional[pd.Series]:
+    if not len(col):
+        return None
+    int_type = _smallest_int(col.min(), col.max())
+    if int_type is None or np.dtype(int_type).itemsize >= col.dtype.itemsize:
+        return None
+    return col.astype(int_type)
+
+
+def _narrow_float(col: pd.Series) -> Optional[pd.Series]:
+    values = col.to_numpy()
+    valid = values[~np.isnan(values)]
+    if not len(valid) or not np.isfinite(valid).all():
+        return None
+
+    # Whole numbers (typically an integer column with missing values) go
+    # to the smallest nullable integer type
+    if (valid == np.trunc(valid)).all():
+        int_type = _smallest_int(valid.min(), valid.max())
+        if int_type is not None and int_type is not np.int64:
+            if len(valid) == len(values):
+                return col.astype(int_type)
+            return col.astype(_NULLABLE_INT_TYPES[int_type])
+
+    if col.dtype == np.float64:
+        narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return pd.Series(narrowed, index=col.index, name=col.name)
+    return None
+
+
+def _categorize(col: pd.Series, max_ratio: float) -> Optional[pd.Series]:
+    if pd.api.types.infer_dtype(col, skipna=True) != "string":
+        return None # Mixed types would not round-trip
+    if col.nunique(dropna=True) > max_ratio * len(col):
+        return None
+    return col.astype("category")
+
+
+def _optimized_column(col: pd.Series, max_ratio: float) -> Optional[pd.Series]:
+    dtype = col.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return None
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return _narrow_int(col)
+    if pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype):
+        return _narrow_float(col)
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        return _categorize(col, max_ratio)
+    return None
+
+
+# -----------------------------
+# Frame optimizer
+# -----------------------------
+
+def optimize_dtypes(df: pd.DataFrame, category_max_ratio: float = INGEST_CATEGORY_MAX_RATIO) -> pd.DataFrame:
+    """
+    Convert columns to smaller dtypes without changing any value:
+    string columns with few distinct values become categoricals, integers
+    are narrowed to the smallest type holding their range, whole-number
+    floats become (nullable) integers and other floats become float32
+    when every value round-trips. Other columns are left alone.
+
+    The dtypes and memory of the columns as parsed are kept in
+    df.attrs, for the memory report and so row fingerprints are computed
+    on the original dtypes (see source_dtype_frame).
+    """
+    source_dtypes: Dict[Any, str] = {}
+    source_bytes: Dict[Any, int] = {}
+    converted = {}
+
+    for col in df.columns:
+        optimized = _optimized_column(df[col], category_max_ratio)
+        if optimized is not None:
+            source_dtypes[col] = str(df[col].dtype)
+            source_bytes[col] = int(df[col].memory_usage(deep=True, index=False))
+            converted[col] = optimized
+
+    if converted:
+        df = df.copy(deep=False)
+        for col, values in converted.items():
+            df[col] = values
+    df.attrs["source_dtypes"] = source_dtypes
+    df.attrs["source_bytes"] = source_bytes
+    return df
+
+
+def source_dtype_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The frame with narrowed numeric columns cast back to their parsed
+    dtypes. Categoricals are kept: they hash like their values.
+    """
+    source = df.attrs.get("source_dtypes")
+    if not source:
+        return df
+
+    restored = {
+        col: df[col].astype(source[col])
+        for col in df.columns
+        if col in source and not isinstance(df[col].dtype, pd.CategoricalDtype)
+        and str(df[col].dtype) != source[col]
+    }
+    if not restored:
+        return df
+    df = df.copy(deep=False)
+    for col, values in restored.items():
+        df[col] = values
+    return df
+
+
+def memory_report(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Per-column dtype and bytes as parsed and as held now, with totals.
+    Columns optimize_dtypes did not touch have equal before / after.
+    """
+    source_dtypes = df.attrs.get("source_dtypes", {})
+    source_bytes = df.attrs.get("source_bytes", {})
+    current = df.memory_usage(deep=True, index=False)
+
+    columns = {}
+    for col in df.columns:
+        after = int(current[col])
+        columns[col] = {
+            "dtype_before": source_dtypes.get(col, str(df[col].dtype)),
+            "dtype_after": str(df[col].dtype),
+            "bytes_before": source_bytes.get(col, after),
+            "bytes_after": after,
+        }
+
+    return {
+        "total_bytes_before": sum(c["bytes_before"] for c in columns.values()),
+        "total_bytes_after": sum(c["bytes_after"] for c in columns.values()),
+        "columns": columns,
+    }
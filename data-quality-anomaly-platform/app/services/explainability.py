@@ -1,15 +1,16 @@
-from ml.explain.shap_explainer import get_shap_values
+from typing import Hashable, List, Optional
+from ml.explain.shap_explainer import get_shap_values_batch
+from app.core.metrics import instrumented
 
-def generate_explanation(model, features: dict, top_k: int = 5):
-    shap_values = get_shap_values(model, features)
 
+def _top_impacts(shap_values: dict, top_k: int):
     sorted_features = sorted(
         shap_values.items(),
         key=lambda x: abs(x[1]),
         reverse=True
     )
 
-    explanation = [
+    return [
         {
             "feature": f,
             "impact": float(v)
@@ -17,4 +18,23 @@ def generate_explanation(model, features: dict, top_k: int = 5):
         for f, v in sorted_features[:top_k]
     ]
 
-    return explanation
+
+def generate_explanation(model, features: dict, top_k: int = 5, model_version: Optional[Hashable] = None):
+    return generate_explanations(model, [features], top_k, model_version)[0]
+
+
+@instrumented("explain", rows=lambda model, feature_records, *args, **kwargs: len(feature_records))
+def generate_explanations(
+    model,
+    feature_records: List[dict],
+    top_k: int = 5,
+    model_version: Optional[Hashable] = None
+):
+    """
+    Explain many feature vectors in one SHAP call. Explanations are None
+    for models SHAP's TreeExplainer does not support.
+    """
+    batch = get_shap_values_batch(model, feature_records, model_version)
+    if batch is None:
+        return [None] * len(feature_records)
+    return [_top_impacts(shap_values, top_k) for shap_values in batch]
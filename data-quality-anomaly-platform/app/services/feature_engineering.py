@@ -1,6 +1,8 @@
 import pandas as pd
-import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from app.services.profiling import profile_structured, profile_text
+from app.services.log_templates import TemplateMiner, template_frequency_features
+from app.core.metrics import instrumented
 
 
 # -----------------------------
@@ -8,20 +10,7 @@ from typing import Dict, Any
 # -----------------------------
 
 def structured_features(df: pd.DataFrame) -> Dict[str, Any]:
-    features = {}
-
-    numeric_cols = df.select_dtypes(include=np.number).columns
-
-    for col in numeric_cols:
-        features[f"{col}_mean"] = float(df[col].mean())
-        features[f"{col}_std"] = float(df[col].std())
-        features[f"{col}_min"] = float(df[col].min())
-        features[f"{col}_max"] = float(df[col].max())
-        features[f"{col}_missing_ratio"] = float(df[col].isnull().mean())
-
-    features["row_count"] = df.shape[0]
-    features["column_count"] = df.shape[1]
-
+    _, features = profile_structured(df)
     return features
 
 
@@ -30,29 +19,38 @@ def structured_features(df: pd.DataFrame) -> Dict[str, Any]:
 # -----------------------------
 
 def text_features(df: pd.DataFrame) -> Dict[str, Any]:
-    text_col = df.columns[0]
-    texts = df[text_col].dropna()
+    _, features = profile_text(df)
+    return features
 
-    lengths = texts.apply(len)
 
-    features = {
-        "line_count": len(df),
-        "avg_text_length": float(lengths.mean()) if not lengths.empty else 0,
-        "std_text_length": float(lengths.std()) if not lengths.empty else 0,
-        "min_text_length": int(lengths.min()) if not lengths.empty else 0,
-        "max_text_length": int(lengths.max()) if not lengths.empty else 0,
-        "empty_line_ratio": float(df[text_col].isnull().mean()),
-    }
+# -----------------------------
+# Log Template Features
+# -----------------------------
 
-    return features
+def template_features(df: pd.DataFrame, miner: TemplateMiner) -> Dict[str, Any]:
+    """
+    Template-frequency features of a chunk of log lines. The miner keeps
+    its templates between calls, so pass the same one for every chunk of
+    a stream.
+    """
+    lines = df[df.columns[0]].dropna()
+    return template_frequency_features(miner, lines.astype(str).tolist())
 
 
 # -----------------------------
 # Dispatcher
 # -----------------------------
 
-def generate_features(df: pd.DataFrame, data_type: str) -> Dict[str, Any]:
+@instrumented("features", rows=lambda df, *args, **kwargs: len(df))
+def generate_features(
+    df: pd.DataFrame,
+    data_type: str,
+    template_miner: Optional[TemplateMiner] = None
+) -> Dict[str, Any]:
     if data_type == "unstructured":
-        return text_features(df)
+        features = text_features(df)
+        if template_miner is not None:
+            features.update(template_features(df, template_miner))
+        return features
 
     return structured_features(df)
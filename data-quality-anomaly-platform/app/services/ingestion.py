@@ -1,29 +1,382 @@
+import codecs
+import os
 import pandas as pd
-from io import BytesIO, StringIO
+from collections import deque
+from concurrent.futures import Future
+from io import BytesIO
 import json
+from typing import BinaryIO, Deque, Iterable, Iterator, List, Optional
 from PyPDF2 import PdfReader
+from app.core.config import (
+    INGEST_CHUNK_ROWS, INGEST_CHUNK_BYTES, PDF_WORKERS, PDF_PARALLEL_MIN_PAGES, INGEST_OPTIMIZE_DTYPES
+)
+from app.core.executor import stage_executor
+from app.core.metrics import instrumented
+from app.services.dtypes import optimize_dtypes
 
-def parse_uploaded_file(file_name: str, content: bytes):
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.json as pa_json
+    import pyarrow.parquet as pq
+except ImportError: # pragma: no cover - columnar formats need pyarrow
+    pa = None
+
+COLUMNAR_FORMATS = ["parquet", "feather", "arrow", "ipc", "arrows"]
+TEXT_FORMATS = ["txt", "log"]
+
+# Fewest pages each PDF worker task extracts, and tasks per worker a
+# document is split into at most
+PDF_PAGES_PER_TASK = 8
+PDF_TASKS_PER_WORKER = 4
+
+# A timestamp format nothing matches: pyarrow then keeps timestamps as
+# text, as pandas' C parser (used for chunked uploads) does
+_NO_TIMESTAMP_FORMAT = "\x01"
+
+# JSON Lines bytes sampled to infer the types of projected columns
+_JSONL_SCHEMA_SAMPLE_BYTES = 1 << 20
+
+
+def _require_pyarrow(ext: str):
+    if pa is None:
+        raise ValueError(f"Reading .{ext} files requires pyarrow")
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _read_csv(source, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    CSV through pyarrow's multithreaded parser, falling back to pandas' C
+    parser for input pyarrow rejects (e.g. ragged rows).
+
+    Column types come out as the C parser infers them, so a file gets
+    the same dtypes (and row fingerprints) whether it is uploaded whole
+    or in chunks: pyarrow's timestamp inference is disabled, and the
+    date / time columns it still infers are re-read as text by the C
+    parser.
+    """
+    if pa is not None:
+        try:
+            df = pd.read_csv(source, engine="pyarrow", usecols=columns, date_format=_NO_TIMESTAMP_FORMAT)
+        except ValueError: # pandas' ParserError and pyarrow's ArrowInvalid
+            _rewind(source)
+        else:
+            temporal = [
+                col for col in df.columns
+                if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) in ("date", "time")
+            ]
+            if temporal:
+                _rewind(source)
+                text = pd.read_csv(source, usecols=temporal)
+                for col in temporal:
+                    df[col] = text[col]
+            return df
+    return pd.read_csv(source, usecols=columns)
+
+
+def _jsonl_schema(source, columns: List[str]) -> Optional["pa.Schema"]:
+    """
+    Types of `columns` inferred from the first lines of the data, or None
+    if a column does not appear there.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            sample = f.read(_JSONL_SCHEMA_SAMPLE_BYTES)
+    else:
+        sample = source.read(_JSONL_SCHEMA_SAMPLE_BYTES)
+        source.seek(0)
+    sample = sample[:sample.rfind(b"\n") + 1] or sample
+
+    inferred = pa_json.read_json(pa.BufferReader(sample)).schema
+    if any(col not in inferred.names for col in columns):
+        return None
+    return pa.schema([inferred.field(col) for col in columns])
+
+
+def _read_jsonl(source, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    JSON Lines through pyarrow. With `columns`, the parser is given an
+    explicit schema of just those columns (types inferred from the first
+    lines) and skips every other field; if a later line does not fit the
+    inferred types, the file is parsed whole and the columns selected.
+    """
+    if pa is None:
+        df = pd.read_json(source, lines=True, engine="ujson")
+        return df[columns] if columns is not None else df
+
+    if columns is not None:
+        try:
+            schema = _jsonl_schema(source, columns)
+            if schema is not None:
+                return pa_json.read_json(source, parse_options=pa_json.ParseOptions(
+                    explicit_schema=schema, unexpected_field_behavior="ignore"
+                )).to_pandas()
+        except pa.ArrowInvalid:
+            pass
+        _rewind(source)
+
+    df = pa_json.read_json(source).to_pandas()
+    return df[columns] if columns is not None else df
+
+
+def _read_arrow(ext: str, source, columns: Optional[List[str]] = None, memory_map: bool = False) -> pd.DataFrame:
+    """
+    Parquet, Feather (v1/v2) and Arrow IPC file/stream data as a
+    DataFrame, reading only `columns` when given.
+    """
+    _require_pyarrow(ext)
+    if ext == "parquet":
+        table = pq.read_table(source, columns=columns, memory_map=memory_map)
+    elif ext == "arrows":
+        if isinstance(source, str):
+            source = pa.memory_map(source) if memory_map else pa.OSFile(source)
+        table = pa.ipc.open_stream(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        table = feather.read_table(source, columns=columns, memory_map=memory_map)
+    return table.to_pandas()
+
+
+def _optimized(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Structured frames with their dtypes narrowed (see optimize_dtypes);
+    text lines are left as they are.
+    """
+    if not INGEST_OPTIMIZE_DTYPES or (df.shape[1] == 1 and df.columns[0] == "text"):
+        return df
+    return optimize_dtypes(df)
+
+
+@instrumented("parse", nbytes=lambda file_name, content, *args, **kwargs: len(content), result_rows=len)
+def parse_uploaded_file(file_name: str, content: bytes, columns: Optional[List[str]] = None):
+    return _optimized(_parse_content(file_name, content, columns))
+
+
+def _parse_content(file_name: str, content: bytes, columns: Optional[List[str]] = None) -> pd.DataFrame:
     ext = file_name.split(".")[-1].lower()
 
     if ext == "csv":
-        return pd.read_csv(StringIO(content.decode()))
+        return _read_csv(BytesIO(content), columns)
 
     elif ext in ["xls", "xlsx"]:
-        return pd.read_excel(BytesIO(content))
+        return pd.read_excel(BytesIO(content), usecols=columns)
 
     elif ext == "json":
         data = json.loads(content.decode())
-        return pd.DataFrame(data)
+        df = pd.DataFrame(data)
+        return df[columns] if columns is not None else df
+
+    elif ext in ["jsonl", "ndjson"]:
+        return _read_jsonl(BytesIO(content), columns)
+
+    elif ext in COLUMNAR_FORMATS:
+        _require_pyarrow(ext)
+        return _read_arrow(ext, pa.BufferReader(content), columns)
 
-    elif ext == "txt":
+    elif ext in TEXT_FORMATS:
         text = content.decode()
         return pd.DataFrame({"text": text.splitlines()})
 
     elif ext == "pdf":
-        reader = PdfReader(BytesIO(content))
-        text = " ".join(page.extract_text() for page in reader.pages)
-        return pd.DataFrame({"text": text.split("\n")})
+        return pd.DataFrame({"text": list(iter_pdf_lines(content))})
 
     else:
         raise ValueError("Unsupported file format")
+
+
+def read_local_file(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a file on local disk without copying it through Python bytes:
+    Parquet and Arrow/Feather are memory-mapped, CSV and JSON Lines are
+    parsed straight from the file, and `columns` limits what is read.
+    """
+    ext = os.path.basename(path).split(".")[-1].lower()
+
+    if ext in COLUMNAR_FORMATS:
+        return _optimized(_read_arrow(ext, path, columns, memory_map=True))
+    if ext == "csv":
+        return _optimized(_read_csv(path, columns))
+    if ext in ["jsonl", "ndjson"]:
+        return _optimized(_read_jsonl(path, columns))
+
+    with open(path, "rb") as f:
+        return parse_uploaded_file(os.path.basename(path), f.read(), columns)
+
+
+# -----------------------------
+# Text and PDF line streams
+# -----------------------------
+
+def iter_text_lines(stream: BinaryIO, chunk_bytes: int = INGEST_CHUNK_BYTES) -> Iterator[str]:
+    """
+    Lines of a UTF-8 byte stream, read `chunk_bytes` at a time. Yields
+    exactly content.decode().splitlines(), including multi-byte characters
+    and \\r\\n pairs that straddle a chunk boundary.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    carry = ""
+
+    while True:
+        block = stream.read(chunk_bytes)
+        final = not block
+        carry += decoder.decode(block, final=final)
+        if final:
+            yield from carry.splitlines()
+            return
+
+        pieces = carry.splitlines(keepends=True)
+        carry = ""
+        if pieces:
+            last = pieces[-1]
+            # An unterminated tail, or a trailing \r that may be half of
+            # \r\n, waits for the next chunk
+            if last.endswith("\r") or _strip_line_end(last) == last:
+                carry = pieces.pop()
+        for piece in pieces:
+            yield _strip_line_end(piece)
+
+
+def _strip_line_end(piece: str) -> str:
+    lines = piece.splitlines()
+    return lines[0] if lines else ""
+
+
+def _extract_pages(content: bytes, pages: List[int]) -> List[str]:
+    reader = PdfReader(BytesIO(content))
+    return [reader.pages[i].extract_text() for i in pages]
+
+
+def _lines_from_pages(page_texts: Iterable[str]) -> Iterator[str]:
+    """
+    Same lines as " ".join(page_texts).split("\\n"), produced page by page.
+    """
+    carry = None
+    for text in page_texts:
+        text = text if carry is None else f"{carry} {text}"
+        *lines, carry = text.split("\n")
+        yield from lines
+    if carry is not None:
+        yield carry
+
+
+def iter_pdf_lines(content: bytes, max_workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Text lines of a PDF, streamed in page order as pages are extracted.
+    Documents with at least PDF_PARALLEL_MIN_PAGES pages are extracted on
+    the stage executor's shared process pool, with at most `max_workers`
+    tasks in flight (PDF_WORKERS by default, else the pool's size). Each
+    task parses the document for its pages, so tasks grow with the page
+    count to ship the content a bounded number of times.
+    """
+    n_pages = len(PdfReader(BytesIO(content)).pages)
+    max_workers = max_workers or PDF_WORKERS or stage_executor.process_workers
+
+    if n_pages < PDF_PARALLEL_MIN_PAGES or max_workers == 1:
+        yield from _lines_from_pages(_extract_pages(content, list(range(n_pages))))
+        return
+
+    pages_per_task = max(PDF_PAGES_PER_TASK, -(-n_pages // (max_workers * PDF_TASKS_PER_WORKER)))
+    tasks = (
+        list(range(start, min(start + pages_per_task, n_pages)))
+        for start in range(0, n_pages, pages_per_task)
+    )
+    pool = stage_executor.process_pool()
+    in_flight: Deque[Future] = deque()
+
+    def page_texts() -> Iterator[str]:
+        # Results are taken in submission order, so pages stay in order
+        for pages in tasks:
+            in_flight.append(pool.submit(_extract_pages, content, pages))
+            if len(in_flight) >= max_workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+    try:
+        yield from _lines_from_pages(page_texts())
+    finally:
+        # A consumer that stops early leaves no work queued behind it
+        for future in in_flight:
+            future.cancel()
+
+
+# -----------------------------
+# Chunked ingestion
+# -----------------------------
+
+def _iter_line_chunks(lines: Iterable[str], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_rows:
+            yield pd.DataFrame({"text": chunk})
+            chunk = []
+    if chunk:
+        yield pd.DataFrame({"text": chunk})
+
+
+def iter_uploaded_file(
+    file_name: str,
+    stream: BinaryIO,
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+    columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Parse an upload stream into DataFrame chunks of at most `chunk_rows`
+    rows, so large CSV, JSON Lines, Parquet and TXT files are never held
+    in memory whole (PDF lines are streamed as pages are extracted).
+    Formats that cannot be split are parsed in one piece.
+    """
+    ext = file_name.split(".")[-1].lower()
+
+    if ext == "csv":
+        with pd.read_csv(stream, chunksize=chunk_rows, usecols=columns) as reader:
+            yield from reader
+
+    elif ext in ["jsonl", "ndjson"]:
+        with pd.read_json(stream, lines=True, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield chunk[columns] if columns is not None else chunk
+
+    elif ext == "parquet":
+        _require_pyarrow(ext)
+        for batch in pq.ParquetFile(stream).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+
+    elif ext in TEXT_FORMATS:
+        yield from _iter_line_chunks(iter_text_lines(stream), chunk_rows)
+
+    elif ext == "pdf":
+        yield from _iter_line_chunks(iter_pdf_lines(stream.read()), chunk_rows)
+
+    else:
+        yield parse_uploaded_file(file_name, stream.read(), columns)
+
+
+def iter_local_file(
+    path: str,
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+    columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    iter_uploaded_file for a file on local disk. Feather and Arrow IPC
+    files, which cannot be read from a stream in pieces, are
+    memory-mapped by read_local_file instead of being read into bytes
+    first.
+    """
+    name = os.path.basename(path)
+    ext = name.split(".")[-1].lower()
+
+    if ext in COLUMNAR_FORMATS and ext != "parquet":
+        df = read_local_file(path, columns)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    with open(path, "rb") as f:
+        yield from iter_uploaded_file(name, f, chunk_rows=chunk_rows, columns=columns)
@@ -0,0 +1,254 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import (
+    LOG_TEMPLATE_MAX_CLUSTERS, LOG_TEMPLATE_CACHE_SIZE, LOG_TEMPLATE_BUCKETS, LOG_TEMPLATE_MAX_MINERS
+)
+
+WILDCARD = "<*>"
+
+# Any whitespace-delimited token containing a digit (ids, IPs, sizes,
+# timestamps...) is a parameter; masking them is what makes most lines of
+# a log repeat exactly. A set-disjointness test per token is several times
+# faster than a masking regex over the line.
+_DIGITS = frozenset("0123456789")
+
+
+class LogCluster:
+    __slots__ = ("cluster_id", "tokens", "size", "leaf")
+
+    def __init__(self, cluster_id: int, tokens: List[str], leaf: list):
+        self.cluster_id = cluster_id
+        self.tokens = tokens
+        self.size = 0
+        self.leaf = leaf
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+class TemplateMiner:
+    """
+    Drain-style online log template miner.
+
+    Lines are masked and tokenized, then routed through a fixed-depth
+    prefix tree: first by token count, then by their first `depth - 2`
+    tokens. The leaf holds a handful of candidate templates, and the line
+    joins the most similar one (positions that differ become <*>) if at
+    least `similarity` of its constant tokens match, or starts a new
+    template.
+
+    Masked lines already seen map straight to their template through an
+    LRU cache, and at most `max_clusters` templates are kept (least
+    recently matched evicted), so memory stays bounded on endless streams.
+    match_lines holds the miner's lock, so threads can share a miner.
+    """
+
+    def __init__(
+        self,
+        depth: int = 4,
+        similarity: float = 0.5,
+        max_children: int = 100,
+        max_clusters: int = LOG_TEMPLATE_MAX_CLUSTERS,
+        cache_size: int = LOG_TEMPLATE_CACHE_SIZE,
+    ):
+        self.prefix_depth = max(depth - 2, 1)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.cache_size = cache_size
+
+        # token count -> nested dict of prefix tokens -> leaf list of clusters
+        self._tree: Dict[int, dict] = {}
+        self._clusters: "OrderedDict[int, LogCluster]" = OrderedDict()
+        # masked line -> cluster id; entries of evicted clusters go stale
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    @property
+    def clusters(self) -> List[LogCluster]:
+        return list(self._clusters.values())
+
+    # -----------------------------
+    # Matching
+    # -----------------------------
+
+    def _leaf(self, tokens: List[str]) -> list:
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[:self.prefix_depth]:
+            child = node.get(token)
+            if child is None:
+                # Wide levels fold further distinct tokens into one branch
+                key = token if len(node) < self.max_children else WILDCARD
+                child = node.setdefault(key, {})
+            node = child
+        return node.setdefault(None, [])
+
+    def _best_match(self, leaf: list, tokens: List[str]) -> Optional[LogCluster]:
+        best, best_score = None, -1.0
+        for cluster in leaf:
+            # As in Drain, only the template's constant tokens count
+            constants = same = 0
+            for a, b in zip(cluster.tokens, tokens):
+                if a != WILDCARD:
+                    constants += 1
+                    same += a == b
+            score = same / constants if constants else 1.0
+            if score > best_score:
+                best, best_score = cluster, score
+        return best if best_score >= self.similarity else None
+
+    def _evict(self):
+        _, cluster = self._clusters.popitem(last=False)
+        cluster.leaf.remove(cluster)
+
+    def match(self, line: str) -> Tuple[LogCluster, bool]:
+        """
+        Template for one line, and whether the template is new.
+        """
+        tokens = [WILDCARD if not _DIGITS.isdisjoint(t) else t for t in line.split()]
+        masked = " ".join(tokens)
+
+        cluster_id = self._cache.get(masked)
+        if cluster_id is not None:
+            cluster = self._clusters.get(cluster_id)
+            if cluster is not None:
+                self._cache.move_to_end(masked)
+                self._clusters.move_to_end(cluster_id)
+                cluster.size += 1
+                return cluster, False
+
+        leaf = self._leaf(tokens)
+        cluster = self._best_match(leaf, tokens)
+        created = cluster is None
+
+        if created:
+            cluster = LogCluster(self._next_id, tokens, leaf)
+            self._next_id += 1
+            leaf.append(cluster)
+            self._clusters[cluster.cluster_id] = cluster
+            if len(self._clusters) > self.max_clusters:
+                self._evict()
+        else:
+            cluster.tokens = [a if a == b else WILDCARD for a, b in zip(cluster.tokens, tokens)]
+            self._clusters.move_to_end(cluster.cluster_id)
+
+        cluster.size += 1
+        self._cache[masked] = cluster.cluster_id
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cluster, created
+
+    def match_lines(self, lines: Iterable[str]) -> Tuple[List[LogCluster], int]:
+        """
+        Templates for many lines and the number of new templates created.
+        """
+        match = self.match
+        matched, created = [], 0
+        with self._lock:
+            for line in lines:
+                cluster, new = match(line)
+                matched.append(cluster)
+                created += new
+        return matched, created
+
+
+# -----------------------------
+# Features
+# -----------------------------
+
+def template_bucket(template: str, buckets: int) -> int:
+    # crc32 rather than hash(): str hashes are salted per process
+    return zlib.crc32(template.encode()) % buckets
+
+
+class TemplateCounts:
+    """
+    Template frequencies of a sequence of line chunks, matched through one
+    miner, so a chunked upload gets the features of the whole upload.
+    """
+
+    def __init__(self, miner: TemplateMiner, buckets: int = LOG_TEMPLATE_BUCKETS):
+        self.miner = miner
+        self.buckets = buckets
+        self.n_lines = 0
+        self.created = 0
+        self.counts: Dict[int, int] = {}
+        self.clusters: Dict[int, LogCluster] = {}
+
+    def update(self, lines: Iterable[str]):
+        matched, created = self.miner.match_lines(lines)
+        self.n_lines += len(matched)
+        self.created += created
+        for cluster in matched:
+            self.counts[cluster.cluster_id] = self.counts.get(cluster.cluster_id, 0) + 1
+            self.clusters[cluster.cluster_id] = cluster
+
+    def features(self) -> Dict[str, float]:
+        n_lines = self.n_lines
+        histogram = np.zeros(self.buckets)
+        for cluster_id, count in self.counts.items():
+            # Bucket by the template as of the last update
+            histogram[template_bucket(self.clusters[cluster_id].template, self.buckets)] += count
+
+        features = {}
+        shares = histogram / n_lines if n_lines else histogram
+        for i, share in enumerate(shares):
+            features[f"template_bucket_{i}"] = float(share)
+
+        probs = np.fromiter(self.counts.values(), dtype=np.float64) / n_lines if n_lines else np.array([])
+        features["template_count"] = len(self.counts)
+        features["new_template_ratio"] = self.created / n_lines if n_lines else 0.0
+        features["template_entropy"] = float(-(probs * np.log(probs)).sum()) if len(probs) else 0.0
+
+        return features
+
+
+def template_frequency_features(
+    miner: TemplateMiner,
+    lines: Iterable[str],
+    buckets: int = LOG_TEMPLATE_BUCKETS,
+) -> Dict[str, float]:
+    """
+    Per-chunk template features: the share of lines in each of `buckets`
+    hashed template buckets, plus distinct / new template counts and the
+    entropy of the template distribution.
+    """
+    counts = TemplateCounts(miner, buckets)
+    counts.update(lines)
+    return counts.features()
+
+
+# -----------------------------
+# Shared miners
+# -----------------------------
+
+_miners: "OrderedDict[Optional[str], TemplateMiner]" = OrderedDict()
+_miners_lock = threading.Lock()
+
+
+def get_template_miner(name: Optional[str] = None) -> TemplateMiner:
+    """
+    The miner for a dataset (uploads without one share a miner), kept so
+    new_template_ratio measures novelty against every earlier upload of
+    the dataset. At most LOG_TEMPLATE_MAX_MINERS are kept, least recently
+    used first out.
+    """
+    with _miners_lock:
+        miner = _miners.get(name)
+        if miner is not None:
+            _miners.move_to_end(name)
+            return miner
+        miner = _miners[name] = TemplateMiner()
+        while len(_miners) > LOG_TEMPLATE_MAX_MINERS:
+            _miners.popitem(last=False)
+        return miner
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional, Tuple
+from app.services.aggregation import ColumnMoments
+from app.services.dedup import row_hashes, count_duplicates, check_cross_batch_duplicates
+from app.services.dtypes import memory_report
+from app.core.metrics import instrumented
+
+
+# -----------------------------
+# Structured Data Profile
+# -----------------------------
+
+def profile_structured(df: pd.DataFrame, dataset: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Compute the structured quality report and feature dict together.
+    All numeric columns are profiled as one 2-D float block instead of
+    one pandas reduction per column and statistic. When `dataset` is
+    given, rows are also checked against that dataset's earlier uploads.
+    """
+    n_rows = df.shape[0]
+
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    other_cols = df.columns.difference(numeric_cols, sort=False)
+
+    block = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    moments = ColumnMoments(len(numeric_cols))
+    moments.update(block)
+
+    null_counts = dict(zip(numeric_cols, (n_rows - moments.count).tolist()))
+    if len(other_cols):
+        null_counts.update(df[other_cols].isnull().sum().to_dict())
+    missing_values = {col: int(null_counts[col]) for col in df.columns}
+
+    hashes = row_hashes(df)
+
+    report = {
+        "row_count": n_rows,
+        "column_count": df.shape[1],
+        "missing_values": missing_values,
+        "duplicate_rows": count_duplicates(hashes),
+        "data_types": df.dtypes.astype(str).to_dict(),
+        "empty_columns": [
+            col for col in df.columns if missing_values[col] == n_rows
+        ],
+        "memory_usage": memory_report(df),
+    }
+
+    if dataset:
+        report["cross_batch_duplicates"] = check_cross_batch_duplicates(dataset, hashes)
+
+    means = moments.means().tolist()
+    stds = moments.stds().tolist()
+    mins = moments.min.tolist()
+    maxs = moments.max.tolist()
+
+    features = {}
+    for i, col in enumerate(numeric_cols):
+        features[f"{col}_mean"] = means[i]
+        features[f"{col}_std"] = stds[i]
+        features[f"{col}_min"] = mins[i]
+        features[f"{col}_max"] = maxs[i]
+        features[f"{col}_missing_ratio"] = (
+            missing_values[col] / n_rows if n_rows else float("nan")
+        )
+
+    features["row_count"] = n_rows
+    features["column_count"] = df.shape[1]
+
+    return report, features
+
+
+# -----------------------------
+# Text / Unstructured Profile
+# -----------------------------
+
+def profile_text(df: pd.DataFrame) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Compute the text quality report and feature dict from a single pass
+    over the line lengths.
+    """
+    text_col = df.columns[0]
+    texts = df[text_col]
+
+    empty_lines = int(texts.isnull().sum())
+    lengths = texts.dropna().str.len().to_numpy(dtype=np.float64)
+
+    if len(lengths):
+        moments = ColumnMoments(1)
+        moments.update(lengths)
+        avg = float(moments.mean[0])
+        std = float(moments.stds()[0])
+        min_len = int(moments.min[0])
+        max_len = int(moments.max[0])
+    else:
+        avg, std, min_len, max_len = 0, 0, 0, 0
+
+    report = {
+        "total_lines": len(df),
+        "empty_lines": empty_lines,
+        "avg_text_length": avg,
+        "min_text_length": min_len,
+        "max_text_length": max_len,
+    }
+
+    features = {
+        "line_count": len(df),
+        "avg_text_length": avg,
+        "std_text_length": std,
+        "min_text_length": min_len,
+        "max_text_length": max_len,
+        "empty_line_ratio": empty_lines / len(df) if len(df) else float("nan"),
+    }
+
+    return report, features
+
+
+# -----------------------------
+# Dispatcher
+# -----------------------------
+
+@instrumented("profile", rows=lambda df, *args, **kwargs: len(df))
+def profile_dataframe(df: pd.DataFrame, dataset: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Quality checks and feature generation in one call. Returns
+    (quality_result, features) in the same shape as
+    run_data_quality_checks / generate_features.
+    """
+    if df.shape[1] == 1 and df.columns[0] == "text":
+        report, features = profile_text(df)
+        data_type = "unstructured"
+    else:
+        report, features = profile_structured(df, dataset)
+        data_type = "structured"
+
+    return {"data_type": data_type, "quality_report": report}, features
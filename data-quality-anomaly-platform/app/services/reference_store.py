@@ -0,0 +1,185 @@
+import json
+import os
+import errno
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import DRIFT_REFERENCE_DIR
+from app.services.drift_service import psi_breakpoints, psi_from_percents
+
+PSI_BUCKETS = 10
+MAX_OPEN_REFERENCES = 32
+
+
+class ReferenceNotFoundError(KeyError):
+    pass
+
+
+class ReferenceExistsError(ValueError):
+    pass
+
+
+# -----------------------------
+# Reference profile (read side)
+# -----------------------------
+
+class ReferenceProfile:
+    """
+    A registered drift reference. Per-column sorted values and the PSI
+    bucket edges / expected proportions live in .npy files that are
+    memory-mapped, so worker processes share them through the page cache.
+    """
+
+    def __init__(self, path: str, manifest: Dict[str, Any], manifest_mtime: int = 0):
+        self.path = path
+        self.manifest = manifest
+        self.manifest_mtime = manifest_mtime
+        self.reference_id = manifest["reference_id"]
+        self.columns: List[str] = [c["name"] for c in manifest["columns"]]
+        self._files = {c["name"]: c["file"] for c in manifest["columns"]}
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+        self.psi_edges = np.load(os.path.join(path, "psi_edges.npy"), mmap_mode="r")
+        self.psi_expected = np.load(os.path.join(path, "psi_expected.npy"), mmap_mode="r")
+        self._sorted: Dict[str, np.ndarray] = {}
+
+    def sorted_values(self, col: str) -> np.ndarray:
+        if col not in self._sorted:
+            self._sorted[col] = np.load(os.path.join(self.path, self._files[col]), mmap_mode="r")
+        return self._sorted[col]
+
+    def psi(self, col: str, actual: np.ndarray) -> float:
+        i = self._index[col]
+        edges = self.psi_edges[i]
+        if np.isnan(edges).any():
+            return 0.0 # Fallback, as in calculate_psi
+        try:
+            actual_percents = np.histogram(actual, bins=edges)[0] / len(actual)
+        except ValueError:
+            return 0.0
+        return psi_from_percents(np.asarray(self.psi_expected[i]), actual_percents)
+
+
+# -----------------------------
+# Registration / lookup
+# -----------------------------
+
+_open_references: "OrderedDict[str, ReferenceProfile]" = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def _reference_path(reference_id: str) -> str:
+    if not re.fullmatch(r"[A-Za-z0-9_.-]+", reference_id) or reference_id.startswith("."):
+        raise ReferenceNotFoundError(reference_id)
+    return os.path.join(DRIFT_REFERENCE_DIR, reference_id)
+
+
+def register_reference(df: pd.DataFrame, reference_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Persist everything drift checks need from a reference dataset:
+    sorted non-null values per numeric column, PSI bucket edges and the
+    expected bucket proportions. Returns the manifest.
+
+    References are immutable: other processes may have the files of a
+    registered one memory-mapped, so an existing `reference_id` raises
+    ReferenceExistsError instead of being overwritten.
+    """
+    reference_id = reference_id or uuid.uuid4().hex
+    path = _reference_path(reference_id)
+    if os.path.exists(path):
+        raise ReferenceExistsError(reference_id)
+
+    os.makedirs(DRIFT_REFERENCE_DIR, exist_ok=True)
+    staging = f"{path}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(staging)
+
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    psi_edges = np.full((len(numeric_cols), PSI_BUCKETS + 1), np.nan)
+    psi_expected = np.zeros((len(numeric_cols), PSI_BUCKETS))
+    columns = []
+
+    for i, col in enumerate(numeric_cols):
+        values = np.sort(df[col].dropna().to_numpy(dtype=np.float64))
+        file_name = f"col_{i}.npy"
+        np.save(os.path.join(staging, file_name), values)
+
+        edges = psi_breakpoints(values, PSI_BUCKETS) if len(values) else None
+        if edges is not None:
+            try:
+                psi_expected[i] = np.histogram(values, bins=edges)[0] / len(values)
+                psi_edges[i] = edges
+            except ValueError:
+                pass
+
+        columns.append({
+            "name": str(col),
+            "file": file_name,
+            "count": int(len(values)),
+            "min": float(values[0]) if len(values) else None,
+            "max": float(values[-1]) if len(values) else None,
+            "mean": float(values.mean()) if len(values) else None,
+            "std": float(values.std()) if len(values) else None,
+        })
+
+    np.save(os.path.join(staging, "psi_edges.npy"), psi_edges)
+    np.save(os.path.join(staging, "psi_expected.npy"), psi_expected)
+
+    manifest = {
+        "reference_id": reference_id,
+        "created_at": time.time(),
+        "row_count": int(df.shape[0]),
+        "psi_buckets": PSI_BUCKETS,
+        "columns": columns,
+    }
+    with open(os.path.join(staging, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+    # rename() will not replace a non-empty directory, so of two
+    # concurrent registrations of one id (in any process) only one wins
+    try:
+        os.rename(staging, path)
+    except OSError as e:
+        shutil.rmtree(staging, ignore_errors=True)
+        if e.errno in (errno.EEXIST, errno.ENOTEMPTY):
+            raise ReferenceExistsError(reference_id) from e
+        raise
+
+    with _open_lock:
+        _open_references.pop(reference_id, None)
+
+    return manifest
+
+
+def load_reference(reference_id: str) -> ReferenceProfile:
+    path = _reference_path(reference_id)
+    manifest_path = os.path.join(path, "manifest.json")
+
+    with _open_lock:
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            _open_references.pop(reference_id, None)
+            raise ReferenceNotFoundError(reference_id)
+
+        # Only serve the cached profile if it is still the one on disk
+        reference = _open_references.get(reference_id)
+        if reference is not None and reference.path == path and reference.manifest_mtime == mtime:
+            _open_references.move_to_end(reference_id)
+            return reference
+
+        with open(manifest_path) as f:
+            reference = ReferenceProfile(path, json.load(f), mtime)
+
+        _open_references[reference_id] = reference
+        while len(_open_references) > MAX_OPEN_REFERENCES:
+            _open_references.popitem(last=False)
+
+    return reference
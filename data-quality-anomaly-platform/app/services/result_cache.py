@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+from app.core.config import (
+    RESULT_CACHE_ENABLED, RESULT_CACHE_DIR, RESULT_CACHE_MEMORY_MB, RESULT_CACHE_DISK_MB
+)
+from app.core.logger import get_logger
+from app.core.metrics import registry
+
+logger = get_logger("result_cache")
+
+CACHE_REQUESTS = registry.counter(
+    "result_cache_requests_total", "Upload result cache lookups by outcome", ["result"]
+)
+CACHE_EVICTIONS = registry.counter(
+    "result_cache_evictions_total", "Entries evicted from each result cache tier", ["tier"]
+)
+
+_HASH_BLOCK_BYTES = 1 << 20
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def stream_digest(stream: BinaryIO) -> str:
+    """
+    sha256 of a seekable stream, read in blocks and rewound afterwards.
+    """
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(_HASH_BLOCK_BYTES), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def stream_size(stream: BinaryIO) -> int:
+    """
+    Size in bytes of a seekable stream, which is left rewound.
+    """
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return size
+
+
+def cache_key(digest: str, **params) -> str:
+    """
+    Key for an upload's content digest plus every request parameter that
+    changes the result (format, selected columns, mode...).
+    """
+    return hashlib.sha256(
+        json.dumps([digest, params], sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _version_dir(version: Optional[str]) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(version))
+
+
+class ResultCache:
+    """
+    Content-addressed cache of upload results, per model version.
+
+    Entries are pickled once on insert. The memory tier is an LRU bounded
+    to `memory_bytes` of pickled data; every entry is also written to
+    `directory/<model version>/<key>.pkl`, bounded to `disk_bytes` with
+    least-recently-used files removed first. Disk hits are promoted back
+    into memory. Entries of other model versions are dropped by
+    invalidate() (hooked to model swaps), since their results are stale.
+
+    The disk tier assumes it is the only writer of `directory`: its size
+    is tracked in this process from the files it wrote or found at first
+    use, and invalidate() removes other versions' directories outright.
+    API processes running side by side (e.g. several uvicorn workers)
+    must each be given their own RESULT_CACHE_DIR.
+    """
+
+    def __init__(
+        self,
+        directory: str = RESULT_CACHE_DIR,
+        memory_bytes: int = int(RESULT_CACHE_MEMORY_MB * 2**20),
+        disk_bytes: int = int(RESULT_CACHE_DISK_MB * 2**20),
+        enabled: bool = RESULT_CACHE_ENABLED,
+    ):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        # (version, key) -> pickled value
+        self._memory: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._memory_size = 0
+        # (version, key) -> file size, least recently used first
+        self._disk: Optional["OrderedDict[Tuple[str, str], int]"] = None
+        self._disk_size = 0
+
+    # -----------------------------
+    # Disk tier
+    # -----------------------------
+
+    def _path(self, version: str, key: str) -> str:
+        return os.path.join(self.directory, version, f"{key}.pkl")
+
+    def _disk_index(self) -> "OrderedDict[Tuple[str, str], int]":
+        """
+        Files already on disk (e.g. from before a restart), oldest access
+        first. Called with the lock held.
+        """
+        if self._disk is None:
+            entries = []
+            if os.path.isdir(self.directory):
+                for version in os.listdir(self.directory):
+                    version_dir = os.path.join(self.directory, version)
+                    if not os.path.isdir(version_dir):
+                        continue
+                    for name in os.listdir(version_dir):
+                        if name.endswith(".pkl"):
+                            stat = os.stat(os.path.join(version_dir, name))
+                            entries.append((stat.st_mtime, (version, name[:-4]), stat.st_size))
+            entries.sort()
+            self._disk = OrderedDict((entry, size) for _, entry, size in entries)
+            self._disk_size = sum(self._disk.values())
+        return self._disk
+
+    def _remove_file(self, entry: Tuple[str, str]):
+        size = self._disk.pop(entry, 0)
+        self._disk_size -= size
+        try:
+            os.remove(self._path(*entry))
+        except FileNotFoundError:
+            pass
+
+    def _write(self, entry: Tuple[str, str], payload: bytes):
+        disk = self._disk_index()
+        if entry in disk:
+            return
+        path = self._path(*entry)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+        disk[entry] = len(payload)
+        self._disk_size += len(payload)
+
+        while self._disk_size > self.disk_bytes and disk:
+            self._remove_file(next(iter(disk)))
+            CACHE_EVICTIONS.inc(tier="disk")
+
+    # -----------------------------
+    # Memory tier
+    # -----------------------------
+
+    def _remember(self, entry: Tuple[str, str], payload: bytes):
+        if len(payload) > self.memory_bytes:
+            return
+        old = self._memory.pop(entry, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[entry] = payload
+        self._memory_size += len(payload)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            CACHE_EVICTIONS.inc(tier="memory")
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+
+    def get(self, key: str, model_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        entry = (_version_dir(model_version), key)
+
+        with self._lock:
+            payload = self._memory.get(entry)
+            if payload is not None:
+                self._memory.move_to_end(entry)
+                tier = "memory"
+            else:
+                disk = self._disk_index()
+                if entry not in disk:
+                    CACHE_REQUESTS.inc(result="miss")
+                    return None
+                try:
+                    with open(self._path(*entry), "rb") as f:
+                        payload = f.read()
+                    os.utime(self._path(*entry))
+                except OSError:
+                    self._remove_file(entry)
+                    CACHE_REQUESTS.inc(result="miss")
+                    return None
+                disk.move_to_end(entry)
+                self._remember(entry, payload)
+                tier = "disk"
+
+        CACHE_REQUESTS.inc(result=f"hit_{tier}")
+        # Unpickling hands every caller its own copy
+        return pickle.loads(payload)
+
+    def put(self, key: str, model_version: Optional[str], value: Dict[str, Any]):
+        if not self.enabled:
+            return
+        entry = (_version_dir(model_version), key)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._remember(entry, payload)
+            try:
+                self._write(entry, payload)
+            except OSError as e:
+                logger.warning(f"Could not write result cache entry: {e}")
+
+    def invalidate(self, keep_version: Optional[str] = None):
+        """
+        Drop every entry not computed by `keep_version` (all of them when
+        None).
+        """
+        keep = _version_dir(keep_version) if keep_version is not None else None
+        with self._lock:
+            for entry in [e for e in self._memory if e[0] != keep]:
+                self._memory_size -= len(self._memory.pop(entry))
+
+            disk = self._disk_index()
+            for version in {e[0] for e in disk if e[0] != keep}:
+                for entry in [e for e in disk if e[0] == version]:
+                    self._disk_size -= disk.pop(entry)
+                shutil.rmtree(os.path.join(self.directory, version), ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            disk = self._disk_index()
+            return {
+                "enabled": self.enabled,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "memory_limit_bytes": self.memory_bytes,
+                "disk_entries": len(disk),
+                "disk_bytes": self._disk_size,
+                "disk_limit_bytes": self.disk_bytes,
+                "requests": {
+                    result: CACHE_REQUESTS.value(result=result)
+                    for result in ("hit_memory", "hit_disk", "miss")
+                },
+            }
+
+
+result_cache = ResultCache()
+
+registry.gauge(
+    "result_cache_bytes", "Bytes held by each result cache tier", ["tier"],
+    callback=lambda: {("memory",): result_cache._memory_size, ("disk",): result_cache._disk_size},
+)
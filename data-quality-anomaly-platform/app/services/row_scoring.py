@@ -0,0 +1,200 @@
+import heapq
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from app.core.config import (
+    ROW_SCORE_FIT_ROWS, ROW_SCORE_CHUNK_ROWS, ROW_SCORE_TOP_N, ROW_SCORE_CONTAMINATION
+)
+from app.core.metrics import instrumented
+from ml.anomaly.ensemble import CascadeEnsemble
+
+
+# -----------------------------
+# Per-row features
+# -----------------------------
+
+def text_row_features(texts: pd.Series) -> Tuple[List[str], np.ndarray]:
+    """
+    Length, token count and digit / non-alphanumeric share of each line.
+    Empty lines are all zeros.
+    """
+    texts = texts.fillna("").astype(str)
+    lengths = texts.str.len().to_numpy(dtype=np.float64)
+    tokens = texts.str.split().str.len().to_numpy(dtype=np.float64)
+    digits = texts.str.count(r"\d").to_numpy(dtype=np.float64)
+    symbols = texts.str.count(r"[^\w\s]").to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        block = np.column_stack([
+            lengths, tokens,
+            np.where(lengths > 0, digits / lengths, 0.0),
+            np.where(lengths > 0, symbols / lengths, 0.0),
+        ])
+    return ["text_length", "token_count", "digit_ratio", "symbol_ratio"], block
+
+
+def structured_row_features(df: pd.DataFrame, numeric_cols: List[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    The row's numeric values plus its count of missing cells. Columns
+    missing from (or non-numeric in) a later chunk come through as NaN.
+    """
+    block = np.empty((len(df), len(numeric_cols) + 1))
+    for i, col in enumerate(numeric_cols):
+        if col in df.columns:
+            block[:, i] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            block[:, i] = np.nan
+    block[:, -1] = df.isnull().sum(axis=1).to_numpy(dtype=np.float64)
+    return [str(col) for col in numeric_cols] + ["null_count"], block
+
+
+# -----------------------------
+# Row scorer
+# -----------------------------
+
+class RowScorer:
+    """
+    Scores every row of an upload and keeps the `top_n` most anomalous.
+
+    The detector is a CascadeEnsemble fitted on a sample of up to
+    `fit_rows` rows of the first chunk (the whole upload when it is not
+    chunked), so rows are judged against the upload itself: the
+    production model is trained on whole-upload aggregates and cannot
+    score single rows. Its robust z-score screen settles most rows
+    without the expert and keeps extreme rows ranked by how extreme they
+    are; `contamination` of the sample scores as anomalous. Missing
+    values sit at the median; the null count feature keeps missingness
+    visible.
+
+    Chunks are scored `chunk_rows` rows at a time and only the running
+    counts and a bounded heap of the lowest scores are kept, so memory
+    does not grow with the upload. Each batch contributes at most
+    `top_n` candidates (np.argpartition) before they go through the heap.
+    """
+
+    def __init__(
+        self,
+        top_n: int = ROW_SCORE_TOP_N,
+        contamination: float = ROW_SCORE_CONTAMINATION,
+        fit_rows: int = ROW_SCORE_FIT_ROWS,
+        chunk_rows: int = ROW_SCORE_CHUNK_ROWS,
+        random_state: int = 42,
+    ):
+        self.top_n = top_n
+        self.contamination = contamination
+        self.fit_rows = fit_rows
+        self.chunk_rows = chunk_rows
+        self.random_state = random_state
+
+        self.text: Optional[bool] = None
+        self.numeric_cols: List[str] = []
+        self.feature_names: List[str] = []
+        self.model: Optional[CascadeEnsemble] = None
+
+        self.rows_scored = 0
+        self.anomalous_rows = 0
+        # (-score, row, record): the root is the least anomalous row kept
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+
+    def _features(self, df: pd.DataFrame) -> np.ndarray:
+        if self.text:
+            _, block = text_row_features(df[df.columns[0]])
+        else:
+            _, block = structured_row_features(df, self.numeric_cols)
+        return block
+
+    def _fit(self, df: pd.DataFrame):
+        self.text = df.shape[1] == 1 and df.columns[0] == "text"
+        if self.text:
+            self.feature_names = text_row_features(df["text"].head(0))[0]
+        else:
+            self.numeric_cols = list(df.select_dtypes(include=np.number).columns)
+            self.feature_names = structured_row_features(df.head(0), self.numeric_cols)[0]
+
+        if len(df) > self.fit_rows:
+            rng = np.random.default_rng(self.random_state)
+            df = df.iloc[np.sort(rng.choice(len(df), self.fit_rows, replace=False))]
+        sample = self._features(df)
+
+        self.model = CascadeEnsemble(
+            contamination=self.contamination,
+            experts=[("isolation_forest", IsolationForest(
+                n_estimators=100, max_samples=min(256, len(sample)), random_state=self.random_state
+            ))],
+        ).fit(sample)
+
+    def _keep(self, df: pd.DataFrame, scores: np.ndarray, offset: int):
+        if len(scores) > self.top_n:
+            candidates = np.argpartition(scores, self.top_n - 1)[:self.top_n]
+        else:
+            candidates = np.arange(len(scores))
+
+        heap = self._heap
+        for pos in candidates[np.argsort(scores[candidates], kind="stable")].tolist():
+            score = float(scores[pos])
+            if len(heap) == self.top_n and -score <= heap[0][0]:
+                # Candidates come most anomalous first, so the rest lose too
+                break
+            record = {
+                key: (None if isinstance(value, float) and np.isnan(value) else value)
+                for key, value in df.iloc[[pos]].to_dict("records")[0].items()
+            }
+            entry = (-score, offset + pos, record)
+            if len(heap) < self.top_n:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Score one chunk of the upload (fitting the detector on the first
+        non-empty one).
+        """
+        if not len(chunk):
+            return
+        if self.model is None:
+            self._fit(chunk)
+
+        for start in range(0, len(chunk), self.chunk_rows):
+            batch = chunk.iloc[start:start + self.chunk_rows]
+            scores = self.model.decision_function(self._features(batch))
+
+            self.anomalous_rows += int(np.count_nonzero(scores < 0))
+            if self.top_n > 0:
+                self._keep(batch, scores, self.rows_scored)
+            self.rows_scored += len(batch)
+
+    def observe(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Score chunks as they pass through, so row scoring shares one read
+        of a chunked upload with aggregate_chunks.
+        """
+        for chunk in chunks:
+            self.update(chunk)
+            yield chunk
+
+    def result(self) -> Dict[str, Any]:
+        top = sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))
+        return {
+            "rows_scored": self.rows_scored,
+            "anomalous_rows": self.anomalous_rows,
+            "anomaly_ratio": self.anomalous_rows / self.rows_scored if self.rows_scored else 0.0,
+            "features": self.feature_names,
+            "top_anomalies": [
+                {"row": row, "anomaly_score": -neg_score, "record": record}
+                for neg_score, row, record in top
+            ],
+        }
+
+
+@instrumented("row_score", rows=lambda chunks, *args, **kwargs: len(chunks) if isinstance(chunks, pd.DataFrame) else 0)
+def score_rows(chunks, top_n: int = ROW_SCORE_TOP_N) -> Dict[str, Any]:
+    """
+    Row-level scores of a DataFrame or an iterator of DataFrame chunks.
+    """
+    scorer = RowScorer(top_n=top_n)
+    for chunk in [chunks] if isinstance(chunks, pd.DataFrame) else chunks:
+        scorer.update(chunk)
+    return scorer.result()
@@ -0,0 +1,176 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import List, Sequence
+
+
+def hash_values(values) -> np.ndarray:
+    """
+    64-bit hashes of an array of values (numbers or strings), stable
+    across processes so sketches built on different workers can be merged.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "US":
+        values = values.astype(object)
+    return pd.util.hash_array(values)
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """
+    Exact per-element bit length of a uint64 array.
+    """
+    x = x.copy()
+    n = np.zeros(x.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = x >= np.uint64(1 << shift)
+        n += shift * high
+        x = np.where(high, x >> np.uint64(shift), x)
+    return n + (x > 0)
+
+
+# -----------------------------
+# Distinct count (HyperLogLog)
+# -----------------------------
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch over 64-bit hashes.
+    With precision p the relative standard error is 1.04 / sqrt(2^p)
+    (about 1.6% at the default p=12, using 4 KiB of registers).
+    Merging is exact: the merged sketch equals the sketch of the union.
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = np.uint64(self.precision)
+
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        rest = hashes << p
+        # Rank = position of the first set bit in the remaining 64 - p bits
+        rank = (64 - _bit_length(rest) + 1).clip(max=64 - self.precision + 1)
+
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def add(self, values):
+        self.add_hashes(hash_values(values))
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def relative_error(self) -> float:
+        """
+        Relative standard error of estimate().
+        """
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return m * math.log(m / zeros)
+        return float(raw)
+
+
+# -----------------------------
+# Quantiles (KLL)
+# -----------------------------
+
+class KLLSketch:
+    """
+    KLL quantile sketch. Keeps O(k) items in a hierarchy of compactors;
+    at the default k=200 the normalized rank error is about 1.7% with
+    99% confidence, independent of stream length. Merging two sketches
+    keeps the same error guarantee.
+    """
+
+    _CAPACITY_DECAY = 2.0 / 3.0
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * self._CAPACITY_DECAY ** depth)))
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def _compress(self):
+        while True:
+            for level, items in enumerate(self.levels):
+                if len(items) > self._capacity(level):
+                    break
+            else:
+                return
+
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            items = np.sort(items)
+            # Keep one odd item behind so the compacted run has even length
+            keep = items[:1] if len(items) % 2 else items[:0]
+            run = items[len(keep):]
+            offset = int(self._rng.integers(2))
+
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], run[offset::2]])
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2 ** level, dtype=np.int64)
+            for level, level_items in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        if self.count == 0:
+            return [float("nan")] * len(qs)
+        items, cumulative = self._weighted_items()
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, np.asarray(qs) * total, side="left")
+        return items[np.clip(positions, 0, len(items) - 1)].tolist()
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def to_arrays(self):
+        sizes = np.array([len(level) for level in self.levels], dtype=np.int64)
+        return np.array([self.k, self.count], dtype=np.int64), sizes, np.concatenate(self.levels)
+
+    @classmethod
+    def from_arrays(cls, header: np.ndarray, sizes: np.ndarray, items: np.ndarray) -> "KLLSketch":
+        sketch = cls(k=int(header[0]))
+        sketch.count = int(header[1])
+        sketch.levels = np.split(items, np.cumsum(sizes)[:-1]) if len(sizes) else [np.empty(0)]
+        return sketch
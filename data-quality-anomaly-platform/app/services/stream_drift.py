@@ -0,0 +1,324 @@
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import (
+    STREAM_DRIFT_SLIDING_WINDOWS, STREAM_DRIFT_TUMBLING_WINDOWS, STREAM_DRIFT_PSI_THRESHOLD,
+    STREAM_DRIFT_PH_DELTA, STREAM_DRIFT_PH_THRESHOLD
+)
+from app.core.logger import get_logger
+from app.core.metrics import instrumented, registry
+from app.services.aggregation import ColumnMoments
+from app.services.alerting import send_alert
+
+logger = get_logger("stream_drift")
+
+STREAM_DRIFT_PSI = registry.gauge(
+    "stream_drift_psi", "PSI of each column over the sliding drift window", ["monitor", "column"]
+)
+STREAM_DRIFT_ALERTS = registry.counter(
+    "stream_drift_alerts_total", "Stream drift alerts raised", ["monitor", "kind"]
+)
+
+
+# -----------------------------
+# Change detection
+# -----------------------------
+
+class PageHinkley:
+    """
+    Two-sided Page-Hinkley test on a stream of observations: alarms when
+    the cumulative deviation from the running mean, less `delta` per
+    observation, exceeds `threshold` in either direction. Resets after
+    each alarm.
+    """
+
+    def __init__(self, delta: float = STREAM_DRIFT_PH_DELTA, threshold: float = STREAM_DRIFT_PH_THRESHOLD, min_instances: int = 5):
+        self.delta = delta
+        self.threshold = threshold
+        self.min_instances = min_instances
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.increase = 0.0
+        self.decrease = 0.0
+
+    def update(self, x: float) -> Optional[str]:
+        """
+        Add an observation; returns "increase" / "decrease" on an alarm.
+        """
+        self.n += 1
+        self.mean += (x - self.mean) / self.n
+        self.increase = max(0.0, self.increase + x - self.mean - self.delta)
+        self.decrease = max(0.0, self.decrease + self.mean - x - self.delta)
+
+        if self.n < self.min_instances:
+            return None
+        direction = None
+        if self.increase > self.threshold:
+            direction = "increase"
+        elif self.decrease > self.threshold:
+            direction = "decrease"
+        if direction is not None:
+            self.reset()
+        return direction
+
+
+# -----------------------------
+# Divergences over bucket counts
+# -----------------------------
+
+def psi_from_counts(expected: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Row-wise PSI (as psi_from_percents) of bucket counts against expected
+    proportions.
+    """
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        actual = np.where(totals > 0, counts / totals, 0.0)
+    expected = np.where(expected == 0, 0.0001, expected)
+    actual = np.where(actual == 0, 0.0001, actual)
+    return np.sum((actual - expected) * np.log(actual / expected), axis=1)
+
+
+def kl_from_counts(expected: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Row-wise KL(reference || current) over the same buckets.
+    """
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        actual = np.where(totals > 0, counts / totals, 0.0)
+    p = np.where(expected == 0, 1e-10, expected)
+    q = np.where(actual == 0, 1e-10, actual)
+    p = p / p.sum(axis=1, keepdims=True)
+    q = q / q.sum(axis=1, keepdims=True)
+    return np.sum(p * np.log(p / q), axis=1)
+
+
+# -----------------------------
+# Monitor
+# -----------------------------
+
+class StreamDriftMonitor:
+    """
+    Incremental drift monitor for a stream of record batches (stream
+    windows), checked against a registered reference profile.
+
+    Each batch is reduced to per-column bucket counts over the
+    reference's PSI buckets (outer buckets open-ended, so values outside
+    the reference range still count) plus its ColumnMoments, so no raw
+    data is kept. The sliding window holds the last `sliding_windows`
+    batch summaries: its counts are updated by adding the new batch and
+    subtracting the expired one, O(columns x buckets) per batch, and its
+    moments are merged from the held batches (subtracting sums of
+    squares would cancel catastrophically for large means). The tumbling
+    window merges batch moments and is reported and reset every
+    `tumbling_windows` batches. PSI and KL are computed from the counts
+    alone.
+
+    A column whose sliding PSI crosses `psi_threshold` alerts once (until
+    it recovers), and a Page-Hinkley detector per column watches batch
+    means in reference standard deviations; both alert through the
+    alerting module.
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        edges: np.ndarray,
+        expected: np.ndarray,
+        means: np.ndarray,
+        stds: np.ndarray,
+        sliding_windows: int = STREAM_DRIFT_SLIDING_WINDOWS,
+        tumbling_windows: int = STREAM_DRIFT_TUMBLING_WINDOWS,
+        psi_threshold: float = STREAM_DRIFT_PSI_THRESHOLD,
+        ph_delta: float = STREAM_DRIFT_PH_DELTA,
+        ph_threshold: float = STREAM_DRIFT_PH_THRESHOLD,
+        name: str = "stream",
+    ):
+        self.columns = list(columns)
+        self.name = name
+        self.sliding_windows = sliding_windows
+        self.tumbling_windows = tumbling_windows
+        self.psi_threshold = psi_threshold
+
+        edges = np.asarray(edges, dtype=np.float64)
+        # Columns without usable buckets report PSI 0.0, as calculate_psi
+        self.valid = ~np.isnan(edges).any(axis=1)
+        self.inner_edges = edges[:, 1:-1]
+        self.expected = np.asarray(expected, dtype=np.float64)
+        self.buckets = self.expected.shape[1]
+
+        self.ref_means = np.nan_to_num(np.asarray(means, dtype=np.float64))
+        stds = np.nan_to_num(np.asarray(stds, dtype=np.float64))
+        self.ref_stds = np.where(stds > 0, stds, 1.0)
+
+        n_cols = len(self.columns)
+        self._window: Deque[Tuple[np.ndarray, ColumnMoments]] = deque()
+        self._counts = np.zeros((n_cols, self.buckets), dtype=np.int64)
+
+        self._tumbling_counts = np.zeros((n_cols, self.buckets), dtype=np.int64)
+        self._tumbling_moments = ColumnMoments(n_cols)
+        self._tumbling_batches = 0
+
+        self._detectors = [PageHinkley(ph_delta, ph_threshold) for _ in self.columns]
+        self._drifted = np.zeros(n_cols, dtype=bool)
+
+        self.batches_seen = 0
+        self.last_sliding: Optional[Dict[str, Any]] = None
+        self.last_tumbling: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_reference(cls, reference, **kwargs) -> "StreamDriftMonitor":
+        """
+        Monitor against a ReferenceProfile from the reference store.
+        """
+        means, stds = [], []
+        for column in reference.manifest["columns"]:
+            mean, std = column.get("mean"), column.get("std")
+            if mean is None and column["count"]:
+                # References registered before mean / std were stored
+                values = reference.sorted_values(column["name"])
+                mean, std = float(values.mean()), float(values.std())
+            means.append(np.nan if mean is None else mean)
+            stds.append(np.nan if std is None else std)
+        kwargs.setdefault("name", reference.reference_id)
+        return cls(reference.columns, reference.psi_edges, reference.psi_expected, np.array(means), np.array(stds), **kwargs)
+
+    # -----------------------------
+    # Batch summaries
+    # -----------------------------
+
+    def _block(self, df: pd.DataFrame) -> np.ndarray:
+        block = np.full((len(df), len(self.columns)), np.nan)
+        for i, col in enumerate(self.columns):
+            if col in df.columns:
+                block[:, i] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        return block
+
+    def _summarize(self, block: np.ndarray) -> Tuple[np.ndarray, ColumnMoments]:
+        counts = np.zeros((len(self.columns), self.buckets), dtype=np.int64)
+        for i in np.flatnonzero(self.valid):
+            values = block[:, i]
+            values = values[~np.isnan(values)]
+            # Same buckets as np.histogram over the edges, outer ones open-ended
+            counts[i] = np.bincount(
+                np.searchsorted(self.inner_edges[i], values, side="right"), minlength=self.buckets
+            )
+        moments = ColumnMoments(len(self.columns))
+        moments.update(block)
+        return counts, moments
+
+    def _report(self, counts: np.ndarray, n: np.ndarray, mean: np.ndarray, std: np.ndarray) -> Dict[str, Any]:
+        psi = np.where(self.valid, psi_from_counts(self.expected, counts), 0.0)
+        kl = np.where(self.valid, kl_from_counts(self.expected, counts), 0.0)
+        return {
+            col: {
+                "count": int(n[i]),
+                "psi": float(psi[i]),
+                "kl_divergence": float(kl[i]),
+                "mean": float(mean[i]) if n[i] else None,
+                "std": float(std[i]) if n[i] > 1 else None,
+                "drift_detected": bool(psi[i] > self.psi_threshold),
+            }
+            for i, col in enumerate(self.columns)
+        }
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+
+    @instrumented("stream_drift", rows=lambda self, df: len(df))
+    def update(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Fold one batch of records into the windows, raise alerts, and
+        return the sliding report, the tumbling report when a tumbling
+        window closed (else None) and any change-point alarms.
+        """
+        block = self._block(df)
+        summary = self._summarize(block)
+        counts, batch_moments = summary
+        self.batches_seen += 1
+
+        # Sliding window: add the new batch, retire the oldest
+        self._window.append(summary)
+        self._counts += counts
+        if len(self._window) > self.sliding_windows:
+            old_counts, _ = self._window.popleft()
+            self._counts -= old_counts
+
+        window_moments = ColumnMoments(len(self.columns))
+        for _, moments in self._window:
+            window_moments.merge(moments)
+        sliding = self._report(self._counts, window_moments.count, window_moments.means(), window_moments.stds())
+        self.last_sliding = sliding
+
+        # Tumbling window
+        self._tumbling_counts += counts
+        self._tumbling_moments.merge(batch_moments)
+        self._tumbling_batches += 1
+        tumbling = None
+        if self._tumbling_batches >= self.tumbling_windows:
+            moments = self._tumbling_moments
+            tumbling = self._report(self._tumbling_counts, moments.count, moments.means(), moments.stds())
+            self.last_tumbling = tumbling
+            self._tumbling_counts[:] = 0
+            self._tumbling_moments = ColumnMoments(len(self.columns))
+            self._tumbling_batches = 0
+
+        changes = self._detect_changes(batch_moments.count, batch_moments.means())
+        self._alert(sliding, changes)
+
+        return {"sliding": sliding, "tumbling": tumbling, "changes": changes}
+
+    def _detect_changes(self, n: np.ndarray, means: np.ndarray) -> List[Dict[str, Any]]:
+        changes = []
+        with np.errstate(invalid="ignore", divide="ignore"):
+            standardized = (means - self.ref_means) / self.ref_stds
+        for i in np.flatnonzero(n > 0):
+            direction = self._detectors[i].update(float(standardized[i]))
+            if direction is not None:
+                changes.append({"column": self.columns[i], "direction": direction, "batch": self.batches_seen})
+        return changes
+
+    def _alert(self, sliding: Dict[str, Any], changes: List[Dict[str, Any]]):
+        for i, col in enumerate(self.columns):
+            psi = sliding[col]["psi"]
+            STREAM_DRIFT_PSI.set(psi, monitor=self.name, column=col)
+
+            drifted = sliding[col]["drift_detected"]
+            if drifted and not self._drifted[i]:
+                STREAM_DRIFT_ALERTS.inc(monitor=self.name, kind="psi")
+                send_alert(
+                    f"Drift detected in {self.name}",
+                    f"Column '{col}' PSI is {psi:.3f} over the last {len(self._window)} windows "
+                    f"(threshold {self.psi_threshold}).",
+                    "WARNING",
+                    sliding[col],
+                    context=f"Drift {self.name} {col}",
+                )
+            self._drifted[i] = drifted
+
+        for change in changes:
+            STREAM_DRIFT_ALERTS.inc(monitor=self.name, kind="change_point")
+            send_alert(
+                f"Distribution change in {self.name}",
+                f"Page-Hinkley detected a mean {change['direction']} in column '{change['column']}'.",
+                "WARNING",
+                change,
+                context=f"Change {self.name} {change['column']}",
+            )
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "batches_seen": self.batches_seen,
+            "sliding_windows": self.sliding_windows,
+            "tumbling_windows": self.tumbling_windows,
+            "sliding": self.last_sliding,
+            "tumbling": self.last_tumbling,
+        }
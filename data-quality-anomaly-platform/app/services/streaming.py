@@ -1,73 +1,356 @@
 import json
+import queue
+import threading
 import time
 import pandas as pd
-from kafka import KafkaConsumer
-from typing import List, Dict, Any
-from app.services.data_quality import run_data_quality_checks
-from app.services.feature_engineering import generate_features
-from app.models.inference import load_model, score_anomaly
+from kafka import ConsumerRebalanceListener, KafkaConsumer
+from kafka.errors import KafkaError
+from kafka.structs import OffsetAndMetadata, TopicPartition
+from typing import Any, Dict, List, Optional
+from app.core.config import (
+    STREAM_WINDOW_SIZE, STREAM_WINDOW_SECONDS, STREAM_QUEUE_SIZE, STREAM_POLL_TIMEOUT_MS,
+    STREAM_DRIFT_REFERENCE, LOG_TEMPLATES_ENABLED
+)
+from app.core.logger import get_logger
+from app.core.metrics import registry, request_id_var, new_request_id
+from app.services.profiling import profile_dataframe
+from app.services.feature_engineering import template_features
+from app.services.log_templates import TemplateMiner
+from app.models.inference import score_anomaly
+from app.models.manager import ModelManager, model_manager
 from app.services.alerting import check_and_alert
+from app.services.reference_store import ReferenceNotFoundError, load_reference
+from app.services.stream_drift import StreamDriftMonitor
+
+logger = get_logger("streaming")
+
+STREAM_WINDOWS = registry.counter("stream_windows_total", "Stream windows processed", ["topic"])
+STREAM_RECORDS = registry.counter("stream_records_total", "Stream records processed", ["topic"])
+STREAM_COMMITS = registry.counter("stream_commits_total", "Offset commits after completed windows", ["topic"])
+
+# Passed down the pipeline queues to stop the worker threads
+_STOP = object()
+
+
+class ColumnarWindow:
+    """
+    One window of decoded records kept as per-column lists, plus the next
+    offset to commit for each partition it covers. Each window gets a
+    request ID that tags its trace spans, and the rebalance generation it
+    was opened in.
+    """
+
+    def __init__(self, generation: int = 0):
+        self.request_id = new_request_id()
+        self.generation = generation
+        self.columns: Dict[str, List[Any]] = {}
+        self.size = 0
+        self.opened_at: Optional[float] = None
+        self.offsets: Dict[TopicPartition, int] = {}
+
+    def append(self, record: Dict[str, Any], partition: TopicPartition, offset: int):
+        if self.opened_at is None:
+            self.opened_at = time.monotonic()
+        for key in record:
+            if key not in self.columns:
+                # Column first seen mid-window: backfill missing values
+                self.columns[key] = [None] * self.size
+        for key, values in self.columns.items():
+            values.append(record.get(key))
+        self.size += 1
+        self.offsets[partition] = max(self.offsets.get(partition, 0), offset + 1)
+
+    def age(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return time.monotonic() - self.opened_at
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns)
+
+
+class _RevocationListener(ConsumerRebalanceListener):
+    def __init__(self, service: "StreamingService"):
+        self.service = service
+
+    def on_partitions_revoked(self, revoked):
+        self.service.on_partitions_revoked(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        pass
+
 
 class StreamingService:
-    def __init__(self, topic: str, bootstrap_servers: str = 'localhost:9092', group_id: str = 'anomaly-detector'):
+    """
+    Consumes a topic in size/time windows and runs them through a
+    pipeline: the consumer thread fills columnar windows, a feature thread
+    profiles them (feeding the drift monitor when a reference is
+    configured, and a per-topic template miner for log lines when
+    LOG_TEMPLATES_ENABLED is set) and a scoring thread scores and alerts. The queues
+    between stages are bounded, so a slow stage pauses consumption
+    instead of growing memory. Offsets are committed by the consumer
+    thread once a window has gone through every stage; offsets of
+    partitions revoked by a rebalance while their windows were in flight
+    are dropped (the new owner re-reads those records), and a failed
+    commit is logged rather than stopping the consumer.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        bootstrap_servers: str = 'localhost:9092',
+        group_id: str = 'anomaly-detector',
+        window_size: int = STREAM_WINDOW_SIZE,
+        window_seconds: float = STREAM_WINDOW_SECONDS,
+        queue_size: int = STREAM_QUEUE_SIZE,
+        consumer=None,
+        manager: Optional[ModelManager] = None,
+        drift_monitor: Optional[StreamDriftMonitor] = None,
+        template_miner: Optional[TemplateMiner] = None,
+    ):
         self.topic = topic
         self.bootstrap_servers = bootstrap_servers
         self.group_id = group_id
-        self.model = None
-        self.buffer = []
-        self.buffer_size = 10 # Process every 10 records, or use time window
-    
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+
+        self.consumer = consumer
+        self.manager = manager or model_manager
+        self.drift_monitor = drift_monitor or self._create_drift_monitor()
+        if template_miner is None and LOG_TEMPLATES_ENABLED:
+            template_miner = TemplateMiner()
+        self.template_miner = template_miner
+
+        self._feature_queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._score_queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._done: "queue.Queue[ColumnarWindow]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._paused = False
+        # Records returned by the polls made while paused (a rebalance can
+        # assign partitions that are not paused yet), consumed first
+        self._backlog: Dict[TopicPartition, List[Any]] = {}
+        # Bumped on every revocation; windows opened at or before the
+        # generation a partition was revoked in do not commit it
+        self._generation = 0
+        self._revoked_at: Dict[TopicPartition, int] = {}
+
+        self.windows_processed = 0
+        self.records_processed = 0
+
+    # -----------------------------
+    # Consumer thread
+    # -----------------------------
+
+    def _create_drift_monitor(self) -> Optional[StreamDriftMonitor]:
+        if not STREAM_DRIFT_REFERENCE:
+            return None
+        try:
+            reference = load_reference(STREAM_DRIFT_REFERENCE)
+        except ReferenceNotFoundError:
+            logger.warning(f"Drift reference {STREAM_DRIFT_REFERENCE} not found, stream drift monitoring disabled")
+            return None
+        return StreamDriftMonitor.from_reference(reference, name=self.topic)
+
+    def _create_consumer(self) -> KafkaConsumer:
+        consumer = KafkaConsumer(
+            bootstrap_servers=self.bootstrap_servers,
+            auto_offset_reset='latest',
+            enable_auto_commit=False,
+            group_id=self.group_id,
+            value_deserializer=lambda x: json.loads(x.decode('utf-8'))
+        )
+        consumer.subscribe([self.topic], listener=_RevocationListener(self))
+        return consumer
+
+    def on_partitions_revoked(self, revoked):
+        """
+        Rebalance callback (runs inside poll, on the consumer thread):
+        commit what is already done, then stop tracking the revoked
+        partitions in the windows still in flight.
+        """
+        self._commit_completed()
+        for partition in revoked:
+            self._revoked_at[partition] = self._generation
+            self._backlog.pop(partition, None)
+        self._generation += 1
+        if revoked:
+            logger.info(f"Partitions revoked: {sorted(p.partition for p in revoked)}")
+
     def start(self):
-        print(f"Connecting to Kafka topic {self.topic}...")
+        """
+        Run the pipeline until stop() is called. Blocks the calling thread,
+        which becomes the consumer thread.
+        """
+        logger.info(f"Connecting to Kafka topic {self.topic}...")
         try:
-            consumer = KafkaConsumer(
-                self.topic,
-                bootstrap_servers=self.bootstrap_servers,
-                auto_offset_reset='latest',
-                enable_auto_commit=True,
-                group_id=self.group_id,
-                value_deserializer=lambda x: json.loads(x.decode('utf-8'))
-            )
-            print("Connected. Listening for messages...")
-            
-            # Load model once
-            self.model = load_model()
-            
-            for message in consumer:
-                self.process_message(message.value)
-                
+            if self.consumer is None:
+                self.consumer = self._create_consumer()
         except Exception as e:
-            print(f"Error connecting to Kafka: {e}")
-
-    def process_message(self, data: Dict[str, Any]):
-        self.buffer.append(data)
-        
-        if len(self.buffer) >= self.buffer_size:
-            self.process_batch()
-
-    def process_batch(self):
-        print(f"Processing batch of {len(self.buffer)} records...")
-        df = pd.DataFrame(self.buffer)
-        
-        # 1. Data Quality
-        quality_result = run_data_quality_checks(df)
-        print(f"Quality Check: {quality_result['data_type']}")
-        
-        # 2. Feature Engineering
-        features = generate_features(df, quality_result["data_type"])
-        
+            logger.error(f"Error connecting to Kafka: {e}")
+            return
+        logger.info("Connected. Listening for messages...")
+
+        self._stop.clear()
+        self._workers = [
+            threading.Thread(target=self._feature_worker, name="stream-features", daemon=True),
+            threading.Thread(target=self._scoring_worker, name="stream-scoring", daemon=True),
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        window = ColumnarWindow(self._generation)
+        try:
+            while not self._stop.is_set():
+                if self._backlog:
+                    batches, self._backlog = self._backlog, {}
+                else:
+                    batches = self.consumer.poll(timeout_ms=STREAM_POLL_TIMEOUT_MS)
+                for partition, messages in batches.items():
+                    for message in messages:
+                        window.append(message.value, partition, message.offset)
+                        if window.size >= self.window_size:
+                            self._submit(window)
+                            window = ColumnarWindow(self._generation)
+
+                if window.size and window.age() >= self.window_seconds:
+                    self._submit(window)
+                    window = ColumnarWindow(self._generation)
+
+                self._commit_completed()
+        finally:
+            if window.size:
+                self._submit(window)
+            self._shutdown_workers()
+            self._commit_completed()
+            self.consumer.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def _submit(self, window: ColumnarWindow):
+        """
+        Hand a sealed window to the feature stage. While the stage is
+        backed up, partitions are paused and polled only to stay in the
+        group, and finished windows keep being committed. Partitions a
+        rebalance assigns meanwhile are paused too; anything they return
+        first is kept for the consumer loop.
+        """
+        while True:
+            try:
+                self._feature_queue.put(window, timeout=STREAM_POLL_TIMEOUT_MS / 1000)
+                break
+            except queue.Full:
+                if not self._paused:
+                    logger.warning("Pipeline backed up; pausing consumption")
+                    self.consumer.pause(*self.consumer.assignment())
+                    self._paused = True
+                for partition, messages in self.consumer.poll(timeout_ms=0).items():
+                    self._backlog.setdefault(partition, []).extend(messages)
+                newly_assigned = self.consumer.assignment() - self.consumer.paused()
+                if newly_assigned:
+                    self.consumer.pause(*newly_assigned)
+                self._commit_completed()
+
+        if self._paused:
+            self.consumer.resume(*self.consumer.paused())
+            self._paused = False
+
+    def _commit_completed(self):
+        offsets: Dict[TopicPartition, int] = {}
+        while True:
+            try:
+                window = self._done.get_nowait()
+            except queue.Empty:
+                break
+            for partition, offset in window.offsets.items():
+                if window.generation <= self._revoked_at.get(partition, -1):
+                    continue
+                offsets[partition] = max(offsets.get(partition, 0), offset)
+
+        if offsets:
+            try:
+                self.consumer.commit(offsets={
+                    partition: OffsetAndMetadata(offset, "", -1)
+                    for partition, offset in offsets.items()
+                })
+            except KafkaError as e:
+                # Typically a rebalance took the partitions: their records
+                # are re-read by the new owner
+                logger.warning(f"Offset commit failed: {e}")
+                return
+            STREAM_COMMITS.inc(topic=self.topic)
+
+    def _shutdown_workers(self):
+        self._feature_queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    # -----------------------------
+    # Worker threads
+    # -----------------------------
+
+    def _feature_worker(self):
+        while True:
+            window = self._feature_queue.get()
+            if window is _STOP:
+                self._score_queue.put(_STOP)
+                return
+
+            request_id_var.set(window.request_id)
+            try:
+                df = window.to_frame()
+                # 1. Data Quality + 2. Feature Engineering (single profiling pass)
+                quality_result, features = profile_dataframe(df)
+                if self.template_miner is not None and quality_result["data_type"] == "unstructured":
+                    features.update(template_features(df, self.template_miner))
+                logger.info(f"Window of {window.size} records, quality check: {quality_result['data_type']}")
+            except Exception as e:
+                logger.error(f"Feature stage failed for window of {window.size} records: {e}")
+                features = None
+            else:
+                if self.drift_monitor is not None:
+                    try:
+                        self.drift_monitor.update(df)
+                    except Exception as e:
+                        logger.error(f"Drift monitor failed for window of {window.size} records: {e}")
+            self._score_queue.put((window, features))
+
+    def _scoring_worker(self):
+        while True:
+            item = self._score_queue.get()
+            if item is _STOP:
+                return
+
+            window, features = item
+            request_id_var.set(window.request_id)
+            if features is not None:
+                try:
+                    self.process_window(window, features)
+                except Exception as e:
+                    logger.error(f"Scoring stage failed for window of {window.size} records: {e}")
+
+            self.windows_processed += 1
+            self.records_processed += window.size
+            STREAM_WINDOWS.inc(topic=self.topic)
+            STREAM_RECORDS.inc(window.size, topic=self.topic)
+            self._done.put(window)
+
+    def process_window(self, window: ColumnarWindow, features: Dict[str, Any]):
         # 3. Anomaly Detection
-        if self.model:
-            anomaly_result = score_anomaly(self.model, features)
-            print(f"Anomaly Result: {anomaly_result}")
-            
-            # Check for anomaly and alert
-            check_and_alert(anomaly_result, context=f"Stream Batch ({len(df)} records)")
-        else:
-            print("Model not loaded, skipping inference.")
-            
-        # Clear buffer
-        self.buffer = []
+        try:
+            model, model_version = self.manager.get()
+        except RuntimeError:
+            logger.warning("Model not loaded, skipping inference.")
+            return
+
+        anomaly_result = score_anomaly(model, features, model_version)
+        logger.info(f"Anomaly Result: {anomaly_result}")
+
+        # Check for anomaly and alert
+        check_and_alert(anomaly_result, context=f"Stream {self.topic}")
+
 
 if __name__ == "__main__":
     # Example usage
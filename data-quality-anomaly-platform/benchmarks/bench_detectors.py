@@ -0,0 +1,92 @@
+"""
+Benchmark: scoring throughput of the anomaly detectors on feature vectors.
+
+    python -m benchmarks.bench_detectors
+    python -m benchmarks.bench_detectors --rows 100000 --features 64 --threads 1 4
+
+Each detector is fitted on --train-rows rows, then timed scoring --rows
+rows (best of --repeat) and scoring a single row. The IsolationForest is
+also timed through its compiled flat-array scorer, and the autoencoder
+as a float model, with dynamic int8 quantization, as TorchScript and
+with both.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from ml.anomaly import autoencoder
+from ml.anomaly.compiled_forest import CompiledIsolationForest
+from ml.anomaly.ensemble import build_ensemble
+from ml.anomaly.isolation_forest import build_model
+
+
+def make_features(rows: int, features: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(size=(rows, features)), columns=[f"f{i}" for i in range(features)])
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def detectors(threads: int) -> List[Tuple[str, object]]:
+    cases = [
+        ("isolation_forest", build_model(n_jobs=threads)),
+        ("ensemble", build_ensemble(n_jobs=threads)),
+    ]
+    if autoencoder.torch is None:
+        print("torch is not installed: skipping the autoencoder")
+        return cases
+    for quantize in (False, True):
+        for torchscript in (False, True):
+            name = "autoencoder" + ("+int8" if quantize else "") + ("+jit" if torchscript else "")
+            cases.append((name, autoencoder.build_model(n_jobs=threads, quantize=quantize, torchscript=torchscript)))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="Rows scored per run")
+    parser.add_argument("--train-rows", type=int, default=10000)
+    parser.add_argument("--features", type=int, default=32)
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    train = make_features(args.train_rows, args.features)
+    test = make_features(args.rows, args.features, seed=1)
+
+    row = test.head(1)
+    print(f"{'detector':>26} {'threads':>8} {'fit s':>8} {'score s':>9} {'rows/s':>12} {'1-row ms':>9}")
+
+    def report(name, threads, fit_seconds, detector, X, one):
+        # Warm up (builds quantized / traced scorers) outside the timing
+        detector.decision_function(one)
+        seconds = best_of(lambda: detector.decision_function(X), args.repeat)
+        single = best_of(lambda: detector.decision_function(one), 20)
+        print(f"{name:>26} {threads:>8} {fit_seconds:>8.2f} {seconds:>9.3f} {args.rows / seconds:>12,.0f} {single * 1000:>9.3f}")
+
+    for threads in args.threads:
+        for name, detector in detectors(threads):
+            fit_seconds = best_of(lambda: detector.fit(train), 1)
+            report(name, threads, fit_seconds, detector, test, row)
+            if name == "isolation_forest":
+                compile_seconds = best_of(lambda: CompiledIsolationForest.compile(detector), 1)
+                compiled = CompiledIsolationForest.compile(detector)
+                report("isolation_forest+compiled", threads, compile_seconds, compiled, test.to_numpy(), row.to_numpy())
+
+
+if __name__ == "__main__":
+    main()
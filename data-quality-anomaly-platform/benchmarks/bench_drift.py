@@ -0,0 +1,70 @@
+"""
+Benchmark: per-column detect_drift vs the vectorized, parallel drift engine.
+
+    python -m benchmarks.bench_drift
+    python -m benchmarks.bench_drift --shapes 100000x200 --workers 1 4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.drift_engine import detect_drift_vectorized
+from app.services.drift_service import detect_drift
+
+
+def make_frames(rows: int, cols: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    columns = [f"c{i}" for i in range(cols)]
+    reference = pd.DataFrame(rng.normal(size=(rows, cols)), columns=columns)
+    current = pd.DataFrame(
+        rng.normal(0.05, 1.1, size=(rows, cols)), columns=columns
+    )
+    return reference, current
+
+
+def timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--shapes", nargs="+", default=["1000000x1000"],
+        help="ROWSxCOLS of both the reference and current frames"
+    )
+    parser.add_argument(
+        "--workers", nargs="+", type=int, default=[1, 4, 8],
+        help="n_jobs values for the vectorized engine"
+    )
+    parser.add_argument(
+        "--skip-legacy", action="store_true",
+        help="Do not time the per-column detect_drift baseline"
+    )
+    args = parser.parse_args()
+
+    print(f"{'shape':>14} {'engine':>18} {'seconds':>10} {'speedup':>9}")
+    for shape in args.shapes:
+        rows, cols = (int(v) for v in shape.lower().split("x"))
+        reference, current = make_frames(rows, cols)
+
+        baseline = None
+        if not args.skip_legacy:
+            baseline = timed(detect_drift, reference, current)
+            print(f"{shape:>14} {'per-column':>18} {baseline:>10.3f} {'1.0x':>9}")
+
+        for n_jobs in args.workers:
+            seconds = timed(detect_drift_vectorized, reference, current, n_jobs=n_jobs)
+            speedup = f"{baseline / seconds:.1f}x" if baseline else "-"
+            print(f"{shape:>14} {f'vectorized x{n_jobs}':>18} {seconds:>10.3f} {speedup:>9}")
+
+
+if __name__ == "__main__":
+    main()
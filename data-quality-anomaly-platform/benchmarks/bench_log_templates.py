@@ -0,0 +1,71 @@
+"""
+Benchmark: log template miner throughput (lines matched per second).
+
+    python -m benchmarks.bench_log_templates
+    python -m benchmarks.bench_log_templates --lines 1000000 --min-rate 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.log_templates import TemplateMiner
+
+# OpenStack nova log formats; request ids, tenants and timings vary per line
+FORMATS = [
+    "nova-api.log.1.2017-05-16_13:53:08 2017-05-16 00:00:{s:02d}.{ms} 25746 INFO nova.osapi_compute.wsgi.server "
+    "[req-{req}] 10.11.10.1 \"GET /v2/{tenant}/servers/detail HTTP/1.1\" status: 200 len: 1893 time: 0.{ms}",
+    "nova-compute.log.1.2017-05-16_13:55:31 2017-05-16 00:00:{s:02d}.{ms} 2931 INFO nova.compute.manager "
+    "[req-{req}] [instance: {tenant}] VM Started (Lifecycle Event)",
+    "nova-compute.log.1.2017-05-16_13:55:31 2017-05-16 00:00:{s:02d}.{ms} 2931 INFO nova.virt.libvirt.imagecache "
+    "[req-{req}] image {tenant} at (/var/lib/nova/instances/_base/{tenant}): checking",
+]
+
+
+def make_lines(n: int, seed: int = 0) -> List[str]:
+    rng = np.random.default_rng(seed)
+    return [
+        FORMATS[rng.integers(len(FORMATS))].format(
+            s=int(rng.integers(60)), ms=int(rng.integers(1000)),
+            req=rng.bytes(8).hex(), tenant=rng.bytes(16).hex()
+        )
+        for _ in range(n)
+    ]
+
+
+def best_rate(lines: List[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        miner = TemplateMiner()
+        start = time.perf_counter()
+        miner.match_lines(lines)
+        timings.append(time.perf_counter() - start)
+    return len(lines) / min(timings)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--min-rate", type=float, default=None,
+        help="Exit non-zero below this many lines/sec (the target is 100k+ per core)"
+    )
+    args = parser.parse_args(argv)
+
+    rate = best_rate(make_lines(args.lines), args.repeat)
+    print(f"{args.lines:>10} lines {rate:>14,.0f} lines/s")
+
+    if args.min_rate is not None and rate < args.min_rate:
+        print(f"Below the minimum of {args.min_rate:,.0f} lines/s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Benchmark: the ingest -> quality -> features -> score -> explain pipeline, stage by stage.
+
+    python -m benchmarks.bench_pipeline --preset quick
+    python -m benchmarks.bench_pipeline --preset default --save benchmarks/baselines/default.json
+    python -m benchmarks.bench_pipeline --preset default --compare benchmarks/baselines/default.json
+
+Each stage is timed (best of --repeat runs) and then run once more under
+tracemalloc for its peak traced allocation (Python and NumPy memory;
+Arrow's allocator is not traced). --compare exits non-zero if
+any stage got slower or more memory-hungry than the baseline by more
+than --threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.models.inference import score_anomaly
+from app.services.data_quality import run_data_quality_checks
+from app.services.drift_engine import detect_drift_vectorized
+from app.services.explainability import generate_explanation
+from app.services.feature_engineering import generate_features
+from app.services.ingestion import parse_uploaded_file
+from ml.anomaly.isolation_forest import build_model
+
+STAGES = ["parse", "quality", "features", "score", "explain", "drift"]
+
+PRESETS = {
+    "quick": {
+        "shapes": ["1000x10", "10000x100"],
+        "text_lines": [1000, 100000],
+    },
+    "default": {
+        "shapes": ["1000x10", "100000x10", "1000000x10", "10000x100", "100000x100", "10000x1000"],
+        "text_lines": [1000, 100000, 1000000],
+    },
+    "full": {
+        "shapes": [
+            f"{rows}x{cols}"
+            for rows in [10**3, 10**4, 10**5, 10**6, 10**7]
+            for cols in [10, 100, 1000]
+        ],
+        "text_lines": [10**3, 10**5, 10**7],
+    },
+}
+
+# Stages faster than this are too noisy to call regressions on time alone
+NOISE_FLOOR_SECONDS = 0.005
+NOISE_FLOOR_MB = 1.0
+
+
+# -----------------------------
+# Synthetic datasets
+# -----------------------------
+
+def make_structured(rows: int, cols: int, seed: int = 0, shift: float = 0.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = rng.normal(shift, 1.0, size=(rows, cols))
+    data[rng.random((rows, cols)) < 0.01] = np.nan
+    df = pd.DataFrame(data, columns=[f"c{i}" for i in range(cols)])
+    df["category"] = rng.choice(["a", "b", "c"], rows)
+    return df
+
+
+def make_text(lines: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    levels = np.array(["INFO", "INFO", "INFO", "WARNING", "ERROR"])
+    words = np.array(["instance", "request", "image", "volume", "network", "spawned", "deleted", "timeout"])
+    picked_levels = levels[rng.integers(len(levels), size=lines)]
+    picked_words = words[rng.integers(len(words), size=(lines, 2))]
+    ids = rng.integers(10**6, size=lines)
+    text = "\n".join(
+        f"2017-05-16 00:00:00.{i % 1000:03d} {level} nova.compute [req-{req}] {a} {b}"
+        for i, (level, (a, b), req) in enumerate(zip(picked_levels, picked_words, ids))
+    )
+    return text.encode()
+
+
+def train_model(cols: int):
+    """
+    IsolationForest fitted on feature vectors of small frames with the
+    benchmark's columns, so score / explain see realistic inputs.
+    """
+    records = [
+        generate_features(make_structured(200, cols, seed=seed), "structured")
+        for seed in range(32)
+    ]
+    model = build_model()
+    model.fit(pd.DataFrame(records))
+    return model
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+
+def measure(fn: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    result = {"seconds": min(timings), "median_seconds": float(np.median(timings))}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def structured_cases(rows: int, cols: int) -> List[Tuple[str, Callable[[], Any]]]:
+    df = make_structured(rows, cols)
+    content = df.to_csv(index=False).encode()
+    reference = make_structured(rows, cols, seed=1, shift=0.1)
+
+    quality = run_data_quality_checks(df)
+    features = generate_features(df, quality["data_type"])
+    model = train_model(cols)
+    # Build the cached SHAP explainer outside the timed runs
+    generate_explanation(model, features, model_version="bench")
+
+    return [
+        ("parse", lambda: parse_uploaded_file("data.csv", content)),
+        ("quality", lambda: run_data_quality_checks(df)),
+        ("features", lambda: generate_features(df, "structured")),
+        ("score", lambda: score_anomaly(model, features)),
+        ("explain", lambda: generate_explanation(model, features, model_version="bench")),
+        ("drift", lambda: detect_drift_vectorized(reference, df)),
+    ]
+
+
+def text_cases(lines: int) -> List[Tuple[str, Callable[[], Any]]]:
+    content = make_text(lines)
+    df = parse_uploaded_file("data.txt", content)
+
+    return [
+        ("parse", lambda: parse_uploaded_file("data.txt", content)),
+        ("quality", lambda: run_data_quality_checks(df)),
+        ("features", lambda: generate_features(df, "unstructured")),
+    ]
+
+
+def run_suite(
+    shapes: List[str],
+    text_lines: List[int],
+    stages: List[str],
+    repeat: int,
+    memory: bool,
+    max_cells: int,
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    groups = []
+    for shape in shapes:
+        rows, cols = (int(v) for v in shape.lower().split("x"))
+        if rows * cols > max_cells:
+            print(f"skipping {shape}: more than --max-cells={max_cells} cells")
+            continue
+        groups.append((f"structured/{rows}x{cols}", lambda rows=rows, cols=cols: structured_cases(rows, cols)))
+    for lines in text_lines:
+        groups.append((f"text/{lines}", lambda lines=lines: text_cases(lines)))
+
+    print(f"{'case':>42} {'seconds':>10} {'median':>10} {'peak MB':>9}")
+    for group, build in groups:
+        for stage, fn in build():
+            if stage not in stages:
+                continue
+            key = f"{group}/{stage}"
+            results[key] = measure(fn, repeat, memory)
+            peak = f"{results[key]['peak_mb']:.1f}" if memory else "-"
+            print(f"{key:>42} {results[key]['seconds']:>10.4f} {results[key]['median_seconds']:>10.4f} {peak:>9}")
+
+    return results
+
+
+# -----------------------------
+# Baselines
+# -----------------------------
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def compare(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """
+    Cases whose time or peak memory exceeds the baseline by more than
+    `threshold` (a fraction) and by more than the noise floor.
+    """
+    regressions = []
+    print(f"\n{'case':>42} {'base (s)':>10} {'now (s)':>10} {'ratio':>7} {'base MB':>9} {'now MB':>9}")
+    for key, now in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        ratio = now["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        slower = ratio > 1 + threshold and now["seconds"] - base["seconds"] > NOISE_FLOOR_SECONDS
+
+        bigger = False
+        if "peak_mb" in now and "peak_mb" in base:
+            bigger = (
+                now["peak_mb"] > base["peak_mb"] * (1 + threshold)
+                and now["peak_mb"] - base["peak_mb"] > NOISE_FLOOR_MB
+            )
+
+        flag = " REGRESSION" if slower or bigger else ""
+        print(
+            f"{key:>42} {base['seconds']:>10.4f} {now['seconds']:>10.4f} {ratio:>6.2f}x "
+            f"{base.get('peak_mb', float('nan')):>9.1f} {now.get('peak_mb', float('nan')):>9.1f}{flag}"
+        )
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--shapes", nargs="*", help="ROWSxCOLS structured datasets (overrides the preset)")
+    parser.add_argument("--text-lines", nargs="*", type=int, help="Text dataset sizes in lines (overrides the preset)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--max-cells", type=float, default=1e9, help="Skip structured datasets with more cells")
+    parser.add_argument("--save", help="Write results to this JSON baseline")
+    parser.add_argument("--compare", help="Compare results against this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown / growth, as a fraction")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    results = run_suite(
+        shapes=preset["shapes"] if args.shapes is None else args.shapes,
+        text_lines=preset["text_lines"] if args.text_lines is None else args.text_lines,
+        stages=args.stages,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+        max_cells=int(args.max_cells),
+    )
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "environment": environment(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }, indent=2, sort_keys=True))
+        print(f"\nSaved baseline to {path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(baseline["results"], results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Benchmark: per-column pandas profiling vs the fused profiling kernel.
+
+    python -m benchmarks.bench_profiling
+    python -m benchmarks.bench_profiling --shapes 1000x2000 5000000x10
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.aggregation import ColumnMoments
+from app.services.profiling import profile_structured
+
+
+def legacy_profile(df: pd.DataFrame):
+    """
+    The original check_structured_data + structured_features, one pandas
+    reduction per column and statistic.
+    """
+    report = {
+        "row_count": df.shape[0],
+        "column_count": df.shape[1],
+        "missing_values": df.isnull().sum().to_dict(),
+        "duplicate_rows": int(df.duplicated().sum()),
+        "data_types": df.dtypes.astype(str).to_dict(),
+        "empty_columns": [col for col in df.columns if df[col].isnull().all()],
+    }
+
+    features = {}
+    for col in df.select_dtypes(include=np.number).columns:
+        features[f"{col}_mean"] = float(df[col].mean())
+        features[f"{col}_std"] = float(df[col].std())
+        features[f"{col}_min"] = float(df[col].min())
+        features[f"{col}_max"] = float(df[col].max())
+        features[f"{col}_missing_ratio"] = float(df[col].isnull().mean())
+    features["row_count"] = df.shape[0]
+    features["column_count"] = df.shape[1]
+
+    return report, features
+
+
+def legacy_numeric_stats(df: pd.DataFrame):
+    stats = {}
+    for col in df.select_dtypes(include=np.number).columns:
+        stats[col] = (
+            df[col].mean(), df[col].std(), df[col].min(), df[col].max(),
+            df[col].isnull().mean()
+        )
+    return stats
+
+
+def fused_numeric_stats(df: pd.DataFrame):
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    moments = ColumnMoments(len(numeric_cols))
+    moments.update(df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan))
+    return moments
+
+
+def make_frame(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = rng.normal(size=(rows, cols))
+    data[rng.random((rows, cols)) < 0.01] = np.nan
+    df = pd.DataFrame(data, columns=[f"c{i}" for i in range(cols)])
+    df["category"] = rng.choice(["a", "b", "c"], rows)
+    return df
+
+
+def best_of(fn, df, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--shapes", nargs="+", default=["2000x500", "2000x2000", "1000000x10"],
+        help="ROWSxCOLS frame shapes to benchmark"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'shape':>14} {'stage':>14} {'legacy (s)':>12} {'fused (s)':>12} {'speedup':>9}")
+    for shape in args.shapes:
+        rows, cols = (int(v) for v in shape.lower().split("x"))
+        df = make_frame(rows, cols)
+
+        stages = [
+            ("numeric stats", legacy_numeric_stats, fused_numeric_stats),
+            ("full profile", legacy_profile, profile_structured),
+        ]
+        for stage, legacy_fn, fused_fn in stages:
+            legacy = best_of(legacy_fn, df, args.repeat)
+            fused = best_of(fused_fn, df, args.repeat)
+            print(f"{shape:>14} {stage:>14} {legacy:>12.4f} {fused:>12.4f} {legacy / fused:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, OutlierMixin
+
+from ml.anomaly.ensemble import INF_Z
+
+try:
+    import torch
+    from torch import nn
+except ImportError: # pragma: no cover - the autoencoder needs torch
+    torch = None
+
+
+def _require_torch():
+    if torch is None:
+        raise ImportError("The autoencoder detector requires torch")
+
+
+def standardize(x, mean, scale, backend=np):
+    """
+    z-scores of raw rows, for NumPy arrays or (backend=torch) tensors.
+    Missing values sit at the mean; infinities become +/-INF_Z so they
+    reconstruct badly instead of looking perfectly average.
+    """
+    return backend.nan_to_num((x - mean) / scale, nan=0.0, posinf=INF_Z, neginf=-INF_Z)
+
+
+if torch is not None:
+    class _ReconstructionError(nn.Module):
+        """
+        Raw feature rows -> per-row mean squared reconstruction error,
+        with the standardization baked in so an exported module is
+        self-contained.
+        """
+
+        def __init__(self, network: nn.Module, mean: "torch.Tensor", scale: "torch.Tensor"):
+            super().__init__()
+            self.network = network
+            self.register_buffer("mean", mean)
+            self.register_buffer("scale", scale)
+
+        def forward(self, x: "torch.Tensor") -> "torch.Tensor":
+            z = standardize(x, self.mean, self.scale, backend=torch)
+            return ((self.network(z) - z) ** 2).mean(dim=1)
+
+
+class AutoencoderDetector(OutlierMixin, BaseEstimator):
+    """
+    Tabular autoencoder anomaly detector: rows the network reconstructs
+    badly are anomalies.
+
+    Scoring runs on CPU in batches of `batch_size` under
+    torch.inference_mode with `n_threads` intra-op threads (a
+    process-wide torch setting). `quantize` swaps the Linear layers for
+    dynamic int8 ones and `torchscript` traces and freezes the scorer;
+    both are built on first use and the threshold is calibrated with the
+    same scorer. Follows the sklearn convention: the decision function is
+    negative for anomalies and predict returns -1.
+    """
+
+    def __init__(
+        self,
+        hidden_dim: int = 32,
+        code_dim: int = 8,
+        epochs: int = 50,
+        batch_size: int = 1024,
+        learning_rate: float = 1e-3,
+        contamination: float = 0.05,
+        n_threads: Optional[int] = None,
+        quantize: bool = False,
+        torchscript: bool = False,
+        random_state: int = 42,
+    ):
+        self.hidden_dim = hidden_dim
+        self.code_dim = code_dim
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.contamination = contamination
+        self.n_threads = n_threads
+        self.quantize = quantize
+        self.torchscript = torchscript
+        self.random_state = random_state
+
+    # -----------------------------
+    # Input
+    # -----------------------------
+
+    def _array(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame) and hasattr(self, "feature_names_in_"):
+            X = X.reindex(columns=list(self.feature_names_in_))
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _set_threads(self):
+        # Process-wide, so applied when the model is fitted or loaded
+        # rather than on every scoring call from server threads
+        if self.n_threads and torch is not None:
+            torch.set_num_threads(self.n_threads)
+
+    # -----------------------------
+    # Fitting
+    # -----------------------------
+
+    def fit(self, X, y=None):
+        _require_torch()
+        self._set_threads()
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        raw = self._array(X)
+        self.n_features_in_ = raw.shape[1]
+
+        mean = np.nan_to_num(np.nanmean(raw, axis=0))
+        std = np.nan_to_num(np.nanstd(raw, axis=0))
+        scale = np.where(std > 0, std, 1.0).astype(np.float32)
+
+        torch.manual_seed(self.random_state)
+        d = self.n_features_in_
+        network = nn.Sequential(
+            nn.Linear(d, self.hidden_dim), nn.ReLU(),
+            nn.Linear(self.hidden_dim, self.code_dim), nn.ReLU(),
+            nn.Linear(self.code_dim, self.hidden_dim), nn.ReLU(),
+            nn.Linear(self.hidden_dim, d),
+        )
+        self.model_ = _ReconstructionError(network, torch.from_numpy(mean), torch.from_numpy(scale))
+
+        x = torch.from_numpy(raw)
+        optimizer = torch.optim.Adam(self.model_.parameters(), lr=self.learning_rate)
+        generator = torch.Generator().manual_seed(self.random_state)
+        self.model_.train()
+        for _ in range(self.epochs):
+            for batch in torch.randperm(len(x), generator=generator).split(self.batch_size):
+                optimizer.zero_grad()
+                loss = self.model_(x[batch]).mean()
+                loss.backward()
+                optimizer.step()
+        self.model_.eval()
+
+        self._scorer = None
+        errors = self.reconstruction_error(raw)
+        self.threshold_ = float(np.quantile(errors, 1 - self.contamination))
+        return self
+
+    # -----------------------------
+    # Scoring
+    # -----------------------------
+
+    def scorer(self) -> "nn.Module":
+        """
+        The module used for scoring: the trained network, optionally
+        int8-quantized and/or traced to TorchScript.
+        """
+        scorer = getattr(self, "_scorer", None)
+        if scorer is None:
+            scorer = self.model_
+            if self.quantize:
+                scorer = torch.ao.quantization.quantize_dynamic(scorer, {nn.Linear}, dtype=torch.qint8)
+            if self.torchscript:
+                example = torch.zeros(1, self.n_features_in_)
+                with torch.no_grad():
+                    scorer = torch.jit.freeze(torch.jit.trace(scorer.eval(), example))
+            self._scorer = scorer
+        return scorer
+
+    def reconstruction_error(self, X) -> np.ndarray:
+        x = torch.from_numpy(self._array(X))
+        scorer = self.scorer()
+        with torch.inference_mode():
+            errors = [scorer(batch) for batch in x.split(self.batch_size)]
+        return torch.cat(errors).numpy().astype(np.float64) if errors else np.empty(0)
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.threshold_ - self.reconstruction_error(X)
+
+    def predict(self, X) -> np.ndarray:
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+    def export_torchscript(self, path: str):
+        """
+        Save the scorer (standardization included, quantized when
+        `quantize` is set) as TorchScript, for serving without this class:
+        raw float32 rows in, errors out.
+        """
+        scorer = self.scorer()
+        if not isinstance(scorer, torch.jit.ScriptModule):
+            example = torch.zeros(1, self.n_features_in_)
+            with torch.no_grad():
+                scorer = torch.jit.trace(scorer.eval(), example)
+        scorer.save(path)
+
+    def __getstate__(self):
+        # Quantized / traced scorers are rebuilt after unpickling
+        state = dict(super().__getstate__())
+        state.pop("_scorer", None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        # Loaded from the registry: apply the thread count once
+        self._set_threads()
+
+
+def build_model(n_jobs: Optional[int] = None, **params) -> AutoencoderDetector:
+    """
+    Same builder signature as ml.anomaly.isolation_forest.build_model;
+    n_jobs sets the torch thread count.
+    """
+    _require_torch()
+    return AutoencoderDetector(n_threads=n_jobs if n_jobs and n_jobs > 0 else None, **params)
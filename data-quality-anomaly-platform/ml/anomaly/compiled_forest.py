@@ -0,0 +1,183 @@
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+# Rows scored per lockstep pass; bounds the (rows x trees) node-index
+# working set to a few MB
+CHUNK_ROWS = 4096
+
+
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """
+    Expected path length of an unsuccessful BST search over n samples, as
+    in sklearn's IsolationForest.
+    """
+    n = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    big = n > 2
+    result[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return result
+
+
+class CompiledIsolationForest:
+    """
+    A fitted IsolationForest packed into flat NumPy node arrays so every
+    tree of a batch is walked in lockstep: one vectorized step per tree
+    level instead of one sklearn tree.apply call per tree.
+
+    Nodes of all trees share one set of arrays (feature index into the
+    full feature vector, threshold, interleaved left / right children,
+    NaN direction, and the depth + path-length correction each leaf
+    contributes). Leaves point back at themselves, so `max_depth` steps leave every row
+    at its leaf in every tree without any branching. Scores match
+    IsolationForest.decision_function / score_samples.
+
+    Per-call overhead is tens of microseconds against milliseconds for
+    sklearn, which wins again on large batches (its trees are compiled
+    code), so callers should use this for small batches.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        missing_left: np.ndarray,
+        leaf_value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        denominator: float,
+        offset: float,
+        n_features: int,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        # children[2 * node] is the left child, children[2 * node + 1] the right
+        self.children = children
+        self.missing_left = missing_left
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.denominator = denominator
+        self.offset = offset
+        self.n_features = n_features
+
+    @classmethod
+    def compile(cls, model: IsolationForest) -> "CompiledIsolationForest":
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        base = 0
+        max_depth = 0
+        for estimator, subset in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            n = tree.node_count
+            nodes = np.arange(n)
+            leaf = tree.children_left == -1
+
+            roots.append(base)
+            # Trees see a feature subset; map back to full-vector columns
+            features.append(np.where(leaf, 0, np.asarray(subset)[np.maximum(tree.feature, 0)]))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + base)
+            rights.append(np.where(leaf, nodes, tree.children_right) + base)
+            missing.append(np.asarray(tree.missing_go_to_left, dtype=bool) & ~leaf)
+            values.append(np.where(
+                leaf, tree.compute_node_depths() + _average_path_length(tree.n_node_samples) - 1.0, 0.0
+            ))
+            max_depth = max(max_depth, tree.max_depth)
+            base += n
+
+        n_trees = len(model.estimators_)
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1).ravel().astype(np.intp),
+            missing_left=np.concatenate(missing),
+            leaf_value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=int(max_depth),
+            denominator=float(n_trees * _average_path_length(np.array([model._max_samples]))[0]),
+            offset=float(model.offset_),
+            n_features=int(model.n_features_in_),
+        )
+
+    def _path_lengths(self, X: np.ndarray) -> np.ndarray:
+        # Flat take() gathers are about twice as fast as 2-D fancy indexing
+        flat = X.ravel()
+        row_base = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            value = flat.take(row_base + self.feature.take(node))
+            go_left = (value <= self.threshold.take(node)) | (np.isnan(value) & self.missing_left.take(node))
+            node = self.children.take(2 * node + ~go_left)
+        return self.leaf_value.take(node).sum(axis=1)
+
+    def score_samples(self, X) -> np.ndarray:
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32), dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+
+        depths = np.empty(len(X))
+        for start in range(0, len(X), CHUNK_ROWS):
+            depths[start:start + CHUNK_ROWS] = self._path_lengths(X[start:start + CHUNK_ROWS])
+
+        if self.denominator == 0:
+            return -np.ones(len(X))
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.score_samples(X) - self.offset
+
+    def predict(self, X) -> np.ndarray:
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+# -----------------------------
+# Per-version cache
+# -----------------------------
+
+# Compiled forests keyed by model version, built once when the model is
+# loaded (compiling walks every node of every tree)
+_compiled: Dict[Hashable, Tuple[IsolationForest, CompiledIsolationForest]] = {}
+_lock = threading.Lock()
+
+
+def compiled_scorer(model, model_version: Optional[Hashable] = None) -> Optional[CompiledIsolationForest]:
+    """
+    The compiled scorer for a model version, compiling it on first use
+    (unversioned models are compiled afresh each call). None for models
+    that are not an IsolationForest. A version that fails to compile
+    raises once and is cached as None, so scoring falls back to sklearn.
+    """
+    if not isinstance(model, IsolationForest):
+        return None
+    if model_version is None:
+        return CompiledIsolationForest.compile(model)
+
+    cached = _compiled.get(model_version)
+    # As for explainers, a reloaded version label must not reuse a stale
+    # compilation
+    if cached is not None and cached[0] is model:
+        return cached[1]
+
+    try:
+        scorer = CompiledIsolationForest.compile(model)
+    except Exception:
+        with _lock:
+            _compiled[model_version] = (model, None)
+        raise
+    with _lock:
+        _compiled[model_version] = (model, scorer)
+    return scorer
+
+
+def drop_compiled(model_version: Hashable):
+    with _lock:
+        _compiled.pop(model_version, None)
+
+
+def cached_compiled() -> int:
+    return len(_compiled)
@@ -0,0 +1,175 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, OutlierMixin, clone
+from sklearn.ensemble import IsolationForest
+from sklearn.neighbors import LocalOutlierFactor
+
+# Scales a median absolute deviation to a standard deviation for normal data
+MAD_TO_STD = 1.4826
+
+# Robust z-score standing in for an infinite value: finite for the experts,
+# and far past any practical fail_z so the screen rejects the record
+INF_Z = 1e6
+
+# Experts run on a shared thread pool (most of their work is in NumPy /
+# Cython and releases the GIL). Kept out of the estimator so fitted
+# models stay picklable for MLflow.
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _expert_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(thread_name_prefix="ensemble")
+        return _pool
+
+
+def default_experts(contamination: float, n_jobs: Optional[int] = None) -> List[Tuple[str, BaseEstimator]]:
+    return [
+        ("isolation_forest", IsolationForest(
+            n_estimators=200, contamination=contamination, random_state=42, n_jobs=n_jobs
+        )),
+        ("lof", LocalOutlierFactor(
+            n_neighbors=20, novelty=True, contamination=contamination, n_jobs=n_jobs
+        )),
+    ]
+
+
+class CascadeEnsemble(OutlierMixin, BaseEstimator):
+    """
+    Cascaded anomaly detector.
+
+    Every record is first screened by a robust z-score: the largest
+    |x - median| / (1.4826 * MAD) over its features. Records below the
+    training `pass_quantile` of that score are normal, records above
+    `fail_z` are anomalies, and only the borderline records in between
+    are scored by the expert detectors (IsolationForest and LOF by
+    default), which run concurrently. Imputation and scaling are done
+    once into a matrix shared by the screen and every expert.
+
+    Expert scores are put on a common scale (divided by their IQR on the
+    training data) and averaged. Follows the sklearn convention: the
+    decision function is negative for anomalies and predict returns -1.
+    """
+
+    def __init__(
+        self,
+        contamination: float = 0.05,
+        pass_quantile: float = 0.8,
+        fail_z: float = 10.0,
+        experts: Optional[List[Tuple[str, BaseEstimator]]] = None,
+        n_jobs: Optional[int] = None,
+    ):
+        self.contamination = contamination
+        self.pass_quantile = pass_quantile
+        self.fail_z = fail_z
+        self.experts = experts
+        self.n_jobs = n_jobs
+
+    # -----------------------------
+    # Shared feature matrix
+    # -----------------------------
+
+    def _matrix(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame) and hasattr(self, "feature_names_in_"):
+            X = X.reindex(columns=list(self.feature_names_in_))
+        X = np.asarray(X, dtype=np.float64)
+        Z = (X - self.center_) / self.scale_
+        # Missing values sit at the median; infinities are extreme, not missing
+        return np.nan_to_num(Z, nan=0.0, posinf=INF_Z, neginf=-INF_Z)
+
+    @staticmethod
+    def _spread(values: np.ndarray) -> float:
+        q1, q3 = np.percentile(values, [25, 75])
+        spread = q3 - q1
+        return float(spread) if spread > 0 else float(np.std(values)) or 1.0
+
+    # -----------------------------
+    # Fitting
+    # -----------------------------
+
+    def fit(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        raw = np.asarray(X, dtype=np.float64)
+        self.n_features_in_ = raw.shape[1]
+
+        self.center_ = np.nanmedian(raw, axis=0)
+        mad = np.nanmedian(np.abs(raw - self.center_), axis=0) * MAD_TO_STD
+        std = np.nanstd(raw, axis=0)
+        # Constant-ish features fall back to the std, then to 1
+        scale = np.where(mad > 0, mad, std)
+        self.scale_ = np.where(scale > 0, scale, 1.0)
+        self.center_ = np.nan_to_num(self.center_)
+
+        Z = self._matrix(raw)
+
+        # Screen thresholds
+        screen = np.abs(Z).max(axis=1)
+        self.screen_cut_ = float(np.quantile(screen, 1 - self.contamination))
+        self.pass_cut_ = min(float(np.quantile(screen, self.pass_quantile)), self.screen_cut_)
+        self.fail_cut_ = max(self.fail_z, self.screen_cut_)
+        self.screen_scale_ = self._spread(screen)
+
+        # Experts, fitted concurrently on the shared matrix
+        experts = self.experts if self.experts is not None else default_experts(self.contamination, self.n_jobs)
+        self.experts_ = [(name, clone(expert)) for name, expert in experts]
+        pool = _expert_pool()
+        for future in [pool.submit(expert.fit, Z) for _, expert in self.experts_]:
+            future.result()
+
+        self.expert_scales_ = [
+            self._spread(expert.decision_function(Z)) for _, expert in self.experts_
+        ]
+        self.offset_ = 0.0
+        self.offset_ = float(np.quantile(self._expert_scores(Z), self.contamination))
+        return self
+
+    # -----------------------------
+    # Scoring
+    # -----------------------------
+
+    def _expert_scores(self, Z: np.ndarray) -> np.ndarray:
+        if len(self.experts_) == 1:
+            _, expert = self.experts_[0]
+            return expert.decision_function(Z) / self.expert_scales_[0] - self.offset_
+
+        pool = _expert_pool()
+        futures = [pool.submit(expert.decision_function, Z) for _, expert in self.experts_]
+        scores = [future.result() / scale for future, scale in zip(futures, self.expert_scales_)]
+        return np.mean(scores, axis=0) - self.offset_
+
+    def _route(self, Z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        screen = np.abs(Z).max(axis=1)
+        return screen, (screen >= self.pass_cut_) & (screen <= self.fail_cut_)
+
+    def route(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Screen scores and the mask of borderline records sent to the
+        experts.
+        """
+        return self._route(self._matrix(X))
+
+    def decision_function(self, X) -> np.ndarray:
+        Z = self._matrix(X)
+        screen, borderline = self._route(Z)
+
+        # Screened records keep the screen's score: positive below
+        # pass_cut_, negative above fail_cut_
+        scores = (self.screen_cut_ - screen) / self.screen_scale_
+        if borderline.any():
+            scores[borderline] = self._expert_scores(Z[borderline])
+        return scores
+
+    def predict(self, X) -> np.ndarray:
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+def build_ensemble(n_jobs: Optional[int] = None, **params) -> CascadeEnsemble:
+    return CascadeEnsemble(n_jobs=n_jobs, **params)
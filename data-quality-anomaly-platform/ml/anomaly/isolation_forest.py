@@ -1,8 +1,10 @@
+from typing import Optional
 from sklearn.ensemble import IsolationForest
 
-def build_model():
+def build_model(n_jobs: Optional[int] = None):
     return IsolationForest(
         n_estimators=200,
         contamination=0.05,
-        random_state=42
+        random_state=42,
+        n_jobs=n_jobs
     )
@@ -1,26 +1,104 @@
+import threading
 import shap
 import pandas as pd
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
-def get_shap_values(model, features: dict):
+# Explainers keyed by model version. Building a TreeExplainer walks every
+# tree of the model, so it is done once per version rather than per call.
+# Models TreeExplainer does not support are cached as None. Unversioned
+# models are not cached: there is no version to drop them by.
+_explainers: Dict[Hashable, Tuple[Any, Optional[shap.TreeExplainer]]] = {}
+_lock = threading.Lock()
+
+
+def _build_explainer(model) -> Optional[shap.TreeExplainer]:
+    try:
+        return shap.TreeExplainer(model)
+    except ValueError:
+        # InvalidModelError: not a tree model (e.g. the cascade ensemble or
+        # the autoencoder), which is served unexplained
+        return None
+
+
+def load_explainer(model, model_version: Optional[Hashable] = None) -> Optional[shap.TreeExplainer]:
     """
-    Returns SHAP values for a single feature vector
+    Build (or reuse) the explainer for a model version, or None when
+    TreeExplainer does not support the model. Call this when the model is
+    loaded so the first explanation is not paying for it.
     """
-    X = pd.DataFrame([features])
+    if model_version is None:
+        return _build_explainer(model)
 
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(X)
+    with _lock:
+        cached = _explainers.get(model_version)
+    # The model identity check guards against a version label reloaded
+    # with a different model object
+    if cached is not None and cached[0] is model:
+        return cached[1]
+
+    # Built outside the lock so other versions are served meanwhile; of
+    # two concurrent builds for one model the first stored wins
+    explainer = _build_explainer(model)
+    with _lock:
+        cached = _explainers.get(model_version)
+        if cached is not None and cached[0] is model:
+            return cached[1]
+        _explainers[model_version] = (model, explainer)
+    return explainer
 
-    return dict(zip(X.columns, shap_values[0]))
-import shap
-import pandas as pd
 
-def get_shap_values(model, features: dict):
+def drop_explainer(model_version: Hashable):
     """
-    Returns SHAP values for a single feature vector
+    Forget the explainer for a model version, e.g. after a model swap.
     """
-    X = pd.DataFrame([features])
+    with _lock:
+        _explainers.pop(model_version, None)
+
+
+def clear_explainers():
+    with _lock:
+        _explainers.clear()
+
+
+def cached_explainers() -> int:
+    return len(_explainers)
+
+
+def _to_frame(model, feature_records: List[dict]) -> pd.DataFrame:
+    X = pd.DataFrame(feature_records)
+    columns = getattr(model, "feature_names_in_", None)
+    if columns is not None:
+        X = X.reindex(columns=list(columns))
+    return X
+
+
+def get_shap_values(model, features: dict, model_version: Optional[Hashable] = None):
+    """
+    Returns SHAP values for a single feature vector (None if the model
+    cannot be explained)
+    """
+    shap_values = get_shap_values_batch(model, [features], model_version)
+    return shap_values[0] if shap_values is not None else None
+
+
+def get_shap_values_batch(
+    model,
+    feature_records: List[dict],
+    model_version: Optional[Hashable] = None
+) -> Optional[List[Dict[str, float]]]:
+    """
+    Returns SHAP values for many feature vectors with one explainer call,
+    or None if the model cannot be explained
+    """
+    if not feature_records:
+        return []
+
+    explainer = load_explainer(model, model_version)
+    if explainer is None:
+        return None
 
-    explainer = shap.TreeExplainer(model)
+    X = _to_frame(model, feature_records)
     shap_values = explainer.shap_values(X)
 
-    return dict(zip(X.columns, shap_values[0]))
+    columns = list(X.columns)
+    return [dict(zip(columns, row)) for row in shap_values]
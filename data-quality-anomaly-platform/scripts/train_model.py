@@ -0,0 +1,199 @@
+"""
+Train the anomaly model on historical files.
+
+    python scripts/train_model.py logs/2026-09/ --output features.parquet
+    python scripts/train_model.py data/*.csv --workers 8 --n-jobs -1
+    python scripts/train_model.py --from-features features.parquet
+
+Files (or every supported file under a directory) are streamed in chunks
+of --chunk-rows rows and each chunk is featurized on a process pool, the
+same way the API profiles one upload. Chunks are read while earlier ones
+are being featurized, with at most two chunks per worker in flight, so
+memory does not grow with the size of the history. The feature matrix
+(one row per chunk) is written to Parquet and the --model-type detector
+is fitted with --n-jobs cores, then logged and registered in MLflow, or
+saved to --model-output with --no-register. Wall time is reported for
+each phase.
+
+Chunk size features (row / column / line counts) are left out of the
+matrix: they describe how the history was split into chunks, not the
+data, and would not match uploads of a different size at scoring time.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import mlflow.sklearn
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import INGEST_CHUNK_ROWS, MODEL_TYPE
+from app.services.ingestion import COLUMNAR_FORMATS, TEXT_FORMATS, iter_local_file
+from app.services.profiling import profile_dataframe
+from app.models.registry import MODEL_BUILDERS, build_detector
+from app.models.train import train_anomaly_model
+
+SUPPORTED_FORMATS = {"csv", "json", "jsonl", "ndjson", "xls", "xlsx", "pdf", *COLUMNAR_FORMATS, *TEXT_FORMATS}
+
+# Chunks queued per worker: enough to keep every worker busy while the
+# reader catches up, without buffering the whole input
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# Features that only measure the chunk itself
+CHUNK_SIZE_FEATURES = ("row_count", "column_count", "line_count")
+
+
+def discover_files(paths: List[str]) -> List[Path]:
+    """
+    The given files, plus every supported file under the given
+    directories, in sorted order.
+    """
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files.extend(
+                p for p in sorted(path.rglob("*"))
+                if p.is_file() and p.suffix.lstrip(".").lower() in SUPPORTED_FORMATS
+            )
+        elif path.is_file():
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {raw}")
+    return files
+
+
+def iter_chunks(files: List[Path], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    for path in files:
+        yield from iter_local_file(str(path), chunk_rows=chunk_rows)
+
+
+def featurize_chunk(chunk: pd.DataFrame) -> Dict[str, Any]:
+    _, features = profile_dataframe(chunk)
+    for name in CHUNK_SIZE_FEATURES:
+        features.pop(name, None)
+    return features
+
+
+def featurize(
+    chunks: Iterator[pd.DataFrame],
+    workers: int,
+    fn: Callable[[pd.DataFrame], Dict[str, Any]] = featurize_chunk,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Feature records for every chunk, in input order, and the number of
+    input rows. With workers > 1 chunks are featurized on a process pool.
+    """
+    records, rows = [], 0
+    if workers <= 1:
+        for chunk in chunks:
+            rows += len(chunk)
+            records.append(fn(chunk))
+        return records, rows
+
+    in_flight: Deque[Future] = deque()
+    limit = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in chunks:
+            rows += len(chunk)
+            in_flight.append(pool.submit(fn, chunk))
+            if len(in_flight) >= limit:
+                records.append(in_flight.popleft().result())
+        while in_flight:
+            records.append(in_flight.popleft().result())
+    return records, rows
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, name: str):
+        print(f"[{name}] ...", flush=True)
+        started = time.perf_counter()
+        yield
+        self.phases[name] = time.perf_counter() - started
+        print(f"[{name}] {self.phases[name]:.2f}s", flush=True)
+
+    def report(self):
+        total = sum(self.phases.values())
+        print(f"\n{'phase':>12} {'seconds':>10} {'share':>7}")
+        for name, seconds in self.phases.items():
+            print(f"{name:>12} {seconds:>10.2f} {seconds / total if total else 0:>7.1%}")
+        print(f"{'total':>12} {total:>10.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="Files or directories of historical data")
+    parser.add_argument("--from-features", help="Skip featurization and fit on this Parquet feature matrix")
+    parser.add_argument("--output", default="features.parquet", help="Where to write the feature matrix")
+    parser.add_argument("--chunk-rows", type=int, default=INGEST_CHUNK_ROWS, help="Rows (or lines) per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Featurization processes")
+    parser.add_argument("--model-type", choices=sorted(MODEL_BUILDERS), default=MODEL_TYPE)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Cores for fitting (IsolationForest tree building)")
+    parser.add_argument("--no-register", action="store_true", help="Save the model locally instead of to MLflow")
+    parser.add_argument("--model-output", default="anomaly_model", help="Model directory written with --no-register")
+    args = parser.parse_args(argv)
+
+    if not args.paths and not args.from_features:
+        parser.error("give input paths or --from-features")
+    if args.no_register and os.path.exists(args.model_output):
+        parser.error(f"--model-output {args.model_output} already exists")
+
+    timer = PhaseTimer()
+    metrics: Dict[str, float] = {}
+
+    if args.from_features:
+        with timer("load"):
+            X = pd.read_parquet(args.from_features)
+    else:
+        files = discover_files(args.paths)
+        if not files:
+            print("No supported input files found")
+            return 1
+        print(f"Featurizing {len(files)} file(s) with {args.workers} worker(s)")
+
+        with timer("featurize"):
+            records, rows = featurize(iter_chunks(files, args.chunk_rows), args.workers)
+        if not records:
+            print("No training data found")
+            return 1
+        X = pd.DataFrame(records)
+        metrics["featurize_seconds"] = timer.phases["featurize"]
+        metrics["input_rows"] = rows
+        print(f"{rows} rows -> {len(X)} chunks x {X.shape[1]} features "
+              f"({rows / max(timer.phases['featurize'], 1e-9):,.0f} rows/s)")
+
+        with timer("write"):
+            X.to_parquet(args.output, index=False)
+        metrics["write_seconds"] = timer.phases["write"]
+        print(f"Feature matrix written to {args.output}")
+
+    if args.no_register:
+        with timer("fit"):
+            model = build_detector(args.model_type, n_jobs=args.n_jobs).fit(X)
+        with timer("save"):
+            mlflow.sklearn.save_model(
+                model, args.model_output,
+                serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE
+            )
+        print(f"Model saved to {args.model_output}")
+    else:
+        with timer("train"):
+            train_anomaly_model(X, n_jobs=args.n_jobs, metrics=metrics, model_type=args.model_type)
+
+    timer.report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
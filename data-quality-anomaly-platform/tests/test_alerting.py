@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from app.services.alerting import AlertDispatcher
+
+
+class StubWebhook(BaseHTTPRequestHandler):
+    """
+    Records posted payloads; answers 500 to the first `failures` requests
+    and 429 with `retry_after` to the next `throttled`.
+    """
+    received = []
+    failures = 0
+    throttled = 0
+    retry_after = "0"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        cls = type(self)
+        if cls.failures > 0:
+            cls.failures -= 1
+            self.send_response(500)
+        elif cls.throttled > 0:
+            cls.throttled -= 1
+            self.send_response(429)
+            self.send_header("Retry-After", cls.retry_after)
+        else:
+            cls.received.append(json.loads(body)["text"])
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def webhook():
+    StubWebhook.received = []
+    StubWebhook.failures = 0
+    StubWebhook.throttled = 0
+    server = HTTPServer(("127.0.0.1", 0), StubWebhook)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/hook", StubWebhook
+    server.shutdown()
+
+
+def alert(context: str, n: int):
+    return {
+        "title": f"Anomaly Detected in {context}", "message": "m",
+        "severity": "CRITICAL", "details": {"n": n}, "context": context,
+    }
+
+
+def test_dispatcher_coalesces_and_retries(webhook):
+    url, handler = webhook
+    handler.failures = 1
+    dispatcher = AlertDispatcher(url, coalesce_seconds=60, rate_per_minute=0, max_retries=2)
+
+    for n in range(5):
+        assert dispatcher.submit(alert("stream-a", n))
+    dispatcher.submit(alert("stream-b", 0))
+    assert dispatcher.flush(timeout=10)
+
+    # The first alert goes out at once, its repeats as one message
+    assert len(handler.received) == 3
+    stream_a = [text for text in handler.received if "stream-a" in text]
+    assert "{'n': 0}" in stream_a[0] and "occurrences" not in stream_a[0]
+    assert "4 occurrences" in stream_a[1] and "{'n': 4}" in stream_a[1]
+
+    metrics = dispatcher.metrics()
+    assert metrics["sent"] == 3
+    assert metrics["coalesced"] == 3
+    assert metrics["retries"] == 1
+    assert metrics["failed"] == 0
+    dispatcher.stop()
+
+
+def test_dispatcher_drops_when_queue_full(webhook):
+    url, handler = webhook
+    dispatcher = AlertDispatcher(url, queue_size=2, coalesce_seconds=0, rate_per_minute=0, autostart=False)
+
+    results = [dispatcher.submit(alert(f"ctx-{n}", n)) for n in range(4)]
+    assert results == [True, True, False, False]
+    assert dispatcher.metrics()["queue_depth"] == 2
+    assert dispatcher.metrics()["dropped"] == 2
+
+    # Stopping delivers what was accepted
+    dispatcher.start()
+    dispatcher.stop()
+    assert len(handler.received) == 2
+
+
+def test_long_retry_after_gives_up(webhook):
+    url, handler = webhook
+    handler.throttled, handler.retry_after = 1, "3600"
+    dispatcher = AlertDispatcher(url, coalesce_seconds=0, rate_per_minute=0, max_retry_after=30)
+
+    dispatcher.submit(alert("stream-a", 0))
+    assert dispatcher.flush(timeout=5)
+    assert dispatcher.metrics()["failed"] == 1
+    assert dispatcher.metrics()["retries"] == 0
+    dispatcher.stop()
+
+
+def test_stop_keeps_thread_until_it_exits(webhook):
+    url, handler = webhook
+    handler.throttled, handler.retry_after = 1, "20"
+    dispatcher = AlertDispatcher(url, coalesce_seconds=0, rate_per_minute=0, max_retry_after=30)
+
+    dispatcher.submit(alert("stream-a", 0))
+    while handler.throttled:
+        time.sleep(0.01)
+    dispatcher.stop(timeout=0)
+    assert dispatcher._thread is not None
+
+    # The Retry-After wait ends with the stop instead of running out
+    dispatcher._thread.join(timeout=5)
+    assert not dispatcher._thread.is_alive()
+    dispatcher.stop()
+    assert dispatcher._thread is None
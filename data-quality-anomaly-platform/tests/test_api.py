@@ -45,3 +45,227 @@ def test_drift_endpoint():
     # Check if drift details are present
     details = json_resp["drift_report"]["details"]
     assert "val" in details
+
+    stats = client.get("/api/executor", headers=headers).json()
+    assert stats["stages"]["parse"]["count"] >= 2
+    assert stats["stages"]["drift"]["count"] >= 1
+
+def test_batch_score_endpoint(monkeypatch):
+    from app.models.manager import model_manager
+
+    class ThresholdModel:
+        def decision_function(self, X):
+            return [0.5 - row[0] for row in X]
+
+    monkeypatch.setattr(model_manager, "_current", (ThresholdModel(), "test-version"))
+
+    payload = {"records": [{"value_mean": 0.1}, {"value_mean": 0.9}]}
+    response = client.post("/api/score/batch", json=payload, headers=get_auth_header())
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["model_version"] == "test-version"
+    assert [r["prediction"] for r in body["results"]] == ["normal", "anomaly"]
+    assert all(not r["missing_features"] and not r["unexpected_features"] for r in body["results"])
+
+    # Schema mismatches are reported with the score
+    payload = {"records": [{"value_mean": 0.1}, {"value_max": 0.9}]}
+    results = client.post("/api/score/batch", json=payload, headers=get_auth_header()).json()["results"]
+    assert results[0]["missing_features"] == [] and results[0]["unexpected_features"] == []
+    assert results[1]["missing_features"] == ["value_mean"]
+    assert results[1]["unexpected_features"] == ["value_max"]
+
+def test_drift_reference_endpoints(tmp_path, monkeypatch):
+    from app.services import reference_store
+    monkeypatch.setattr(reference_store, "DRIFT_REFERENCE_DIR", str(tmp_path))
+
+    ref_csv = pd.DataFrame({'val': [1.0, 1.1, 1.2, 1.3, 1.4]}).to_csv(index=False).encode('utf-8')
+    curr_csv = pd.DataFrame({'val': [1.0, 1.1, 1.2, 1.3, 2.5]}).to_csv(index=False).encode('utf-8')
+    headers = get_auth_header()
+
+    response = client.post(
+        "/api/drift/reference",
+        files={'reference_file': ('ref.csv', ref_csv, 'text/csv')},
+        headers=headers
+    )
+    assert response.status_code == 200
+    reference_id = response.json()["reference_id"]
+
+    response = client.post(
+        f"/api/drift/reference/{reference_id}",
+        files={'current_file': ('curr.csv', curr_csv, 'text/csv')},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert "val" in response.json()["drift_report"]["details"]
+
+    response = client.post(
+        "/api/drift/reference", params={"reference_id": reference_id},
+        files={'reference_file': ('ref.csv', curr_csv, 'text/csv')},
+        headers=headers
+    )
+    assert response.status_code == 409
+
+    response = client.post(
+        "/api/drift/reference/unknown",
+        files={'current_file': ('curr.csv', curr_csv, 'text/csv')},
+        headers=headers
+    )
+    assert response.status_code == 404
+
+def test_metrics_endpoint(monkeypatch):
+    from app.core import config
+    monkeypatch.setattr(config, "METRICS_TOKEN", "scrape-secret")
+
+    df = pd.DataFrame({'val': [1.0, 1.1, 1.2, 1.3, 1.4]})
+    files = {
+        'reference_file': ('ref.csv', df.to_csv(index=False).encode('utf-8'), 'text/csv'),
+        'current_file': ('curr.csv', df.to_csv(index=False).encode('utf-8'), 'text/csv')
+    }
+    response = client.post(
+        "/api/drift", files=files, headers={**get_auth_header(), "X-Request-ID": "req-123"}
+    )
+    assert response.headers["X-Request-ID"] == "req-123"
+
+    assert client.get("/metrics").status_code == 401
+    # Short-lived API tokens are not scrape tokens
+    assert client.get("/metrics", headers=get_auth_header()).status_code == 401
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'pipeline_stage_seconds_count{stage="parse"}' in body
+    assert 'pipeline_stage_seconds_count{stage="drift"}' in body
+    assert 'executor_queue_wait_seconds_count{stage="drift"}' in body
+    assert 'http_request_seconds_count{method="POST",route="/api/drift",status="200"}' in body
+
+def test_upload_results_are_cached_per_model_version(tmp_path, monkeypatch):
+    from app.models.manager import model_manager
+    from app.services.result_cache import ResultCache
+    from app.api import routes
+
+    class ConstantModel:
+        def decision_function(self, X):
+            return [1.0 for _ in X]
+
+    cache = ResultCache(directory=str(tmp_path), enabled=True)
+    monkeypatch.setattr(routes, "result_cache", cache)
+    monkeypatch.setattr(model_manager, "_current", (ConstantModel(), "v1"))
+
+    csv = pd.DataFrame({'val': [1.0, 2.0, 3.0]}).to_csv(index=False).encode('utf-8')
+    headers = get_auth_header()
+
+    def upload(**params):
+        response = client.post(
+            "/api/upload", params=params, files={'file': ('data.csv', csv, 'text/csv')}, headers=headers
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    first, second = upload(), upload()
+    assert not first["cached"] and second["cached"]
+    assert second["quality_report"] == first["quality_report"]
+    assert second["anomaly_result"] == first["anomaly_result"]
+    # A different mode is a different result
+    assert not upload(chunked=True)["cached"]
+    assert upload(chunked=True)["cached"]
+    # Chunked uploads over the size limit are not hashed or cached
+    monkeypatch.setattr(routes, "RESULT_CACHE_MAX_CHUNKED_MB", 0)
+    assert not upload(chunked=True, columns="val")["cached"]
+    assert not upload(chunked=True, columns="val")["cached"]
+
+    # A new model version misses
+    monkeypatch.setattr(model_manager, "_current", (ConstantModel(), "v2"))
+    assert not upload()["cached"]
+    assert client.get("/api/cache", headers=headers).json()["requests"]["hit_memory"] >= 1
+
+def test_upload_row_scores(tmp_path, monkeypatch):
+    from app.models.manager import model_manager
+    from app.services.result_cache import ResultCache
+    from app.api import routes
+
+    class ConstantModel:
+        def decision_function(self, X):
+            return [1.0 for _ in X]
+
+    # A fresh cache: results left by earlier runs must not answer for this one
+    monkeypatch.setattr(routes, "result_cache", ResultCache(directory=str(tmp_path), enabled=True))
+    monkeypatch.setattr(model_manager, "_current", (ConstantModel(), "v1"))
+    values = [1.0, 1.1, 0.9, 1.05, 0.95] * 40 + [500.0]
+    csv = pd.DataFrame({'val': values}).to_csv(index=False).encode('utf-8')
+    headers = get_auth_header()
+
+    for chunked in (False, True):
+        response = client.post(
+            "/api/upload", params={"row_scores": True, "top_n": 2, "chunked": chunked},
+            files={'file': ('data.csv', csv, 'text/csv')}, headers=headers
+        )
+        assert response.status_code == 200
+        assert not response.json()["cached"]
+        rows = response.json()["row_scores"]
+        assert rows["rows_scored"] == len(values)
+        assert rows["top_anomalies"][0]["row"] == len(values) - 1
+        assert rows["top_anomalies"][0]["record"] == {"val": 500.0}
+        assert len(rows["top_anomalies"]) == 2
+
+def test_upload_with_unexplainable_model(monkeypatch):
+    from app.models.manager import model_manager
+    from app.api import routes
+
+    class AlwaysAnomalous:
+        # Not a tree model: SHAP's TreeExplainer rejects it
+        def decision_function(self, X):
+            return [-1.0 for _ in X]
+
+    monkeypatch.setattr(routes.result_cache, "enabled", False)
+    monkeypatch.setattr(model_manager, "_current", (AlwaysAnomalous(), "non-tree"))
+    csv = pd.DataFrame({'val': [1.0, 2.0, 3.0]}).to_csv(index=False).encode('utf-8')
+
+    response = client.post(
+        "/api/upload", files={'file': ('data.csv', csv, 'text/csv')}, headers=get_auth_header()
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["anomaly_result"]["prediction"] == "anomaly"
+    assert body["explanation"] is None
+
+def test_upload_adds_template_features_when_enabled(tmp_path, monkeypatch):
+    from collections import OrderedDict
+    from app.models.manager import model_manager
+    from app.services.result_cache import ResultCache
+    from app.api import routes
+    from app.services import log_templates
+
+    class ConstantModel:
+        def decision_function(self, X):
+            return [1.0 for _ in X]
+
+    scored = []
+    score_anomaly = routes.score_anomaly
+    monkeypatch.setattr(routes, "score_anomaly", lambda model, features, version: scored.append(features) or score_anomaly(model, features, version))
+    monkeypatch.setattr(routes, "LOG_TEMPLATES_ENABLED", True)
+    monkeypatch.setattr(log_templates, "_miners", OrderedDict())
+    monkeypatch.setattr(routes.result_cache, "enabled", False)
+    monkeypatch.setattr(model_manager, "_current", (ConstantModel(), "v1"))
+    log = "\n".join(f"worker {i} started job {i * 7}" for i in range(50)).encode()
+
+    for chunked in (False, True):
+        response = client.post(
+            "/api/upload", params={"chunked": chunked, "dataset": "worker-logs"},
+            files={'file': ('app.log', log, 'text/plain')}, headers=get_auth_header()
+        )
+        assert response.status_code == 200
+
+    first, second = scored
+    assert first["template_count"] == second["template_count"] == 1
+    # The dataset's miner has seen these lines: nothing is new the second time
+    assert first["new_template_ratio"] > 0 and second["new_template_ratio"] == 0
+
+    # Results from the shared miner depend on earlier uploads: never cached
+    monkeypatch.setattr(routes, "result_cache", ResultCache(directory=str(tmp_path), enabled=True))
+    for _ in range(2):
+        response = client.post(
+            "/api/upload", files={'file': ('app.log', log, 'text/plain')}, headers=get_auth_header()
+        )
+        assert not response.json()["cached"]
@@ -0,0 +1,71 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from app.models.registry import build_detector
+from ml.anomaly.autoencoder import standardize
+from ml.anomaly.ensemble import INF_Z
+
+
+def make_data(seed=0):
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(size=(2000, 2))
+    # Correlated features an autoencoder can compress
+    train = pd.DataFrame(latent @ rng.normal(size=(2, 6)), columns=[f"f{i}" for i in range(6)])
+    test = train.sample(200, random_state=1).reset_index(drop=True)
+    test.iloc[:10] = rng.normal(scale=5.0, size=(10, 6))
+    return train, test
+
+
+def test_standardize_keeps_infinities_extreme():
+    x = np.array([[np.inf, -np.inf, np.nan, 3.0]], dtype=np.float32)
+    mean = np.array([1.0, 1.0, 1.0, 1.0], dtype=np.float32)
+    scale = np.array([2.0, 2.0, 2.0, 2.0], dtype=np.float32)
+
+    z = standardize(x, mean, scale)
+    np.testing.assert_array_equal(z, [[INF_Z, -INF_Z, 0.0, 1.0]])
+    assert z.dtype == np.float32
+
+
+def test_unknown_model_type_is_rejected():
+    with pytest.raises(ValueError, match="Unknown model type"):
+        build_detector("svm")
+
+
+@pytest.mark.parametrize("quantize, torchscript", [(False, False), (True, False), (False, True), (True, True)])
+def test_autoencoder_flags_rows_it_cannot_reconstruct(quantize, torchscript):
+    pytest.importorskip("torch")
+    train, test = make_data()
+    model = build_detector("autoencoder", n_jobs=1)
+    model.set_params(epochs=30, quantize=quantize, torchscript=torchscript)
+    model.fit(train)
+
+    predictions = model.predict(test)
+    assert (predictions[:10] == -1).mean() >= 0.9
+    assert (predictions[10:] == -1).mean() < 0.15
+
+    # Scorers are rebuilt after a round trip through pickle (as in MLflow)
+    restored = pickle.loads(pickle.dumps(model))
+    np.testing.assert_allclose(restored.decision_function(test), model.decision_function(test), rtol=1e-5)
+
+
+def test_autoencoder_torchscript_export(tmp_path):
+    torch = pytest.importorskip("torch")
+    train, test = make_data()
+    model = build_detector("autoencoder", n_jobs=1).set_params(epochs=5).fit(train)
+
+    path = str(tmp_path / "scorer.pt")
+    model.export_torchscript(path)
+    exported = torch.jit.load(path)
+    errors = exported(torch.from_numpy(test.to_numpy(dtype=np.float32))).detach().numpy()
+    np.testing.assert_allclose(errors, model.reconstruction_error(test), rtol=1e-5)
+
+
+def test_autoencoder_flags_infinite_features():
+    pytest.importorskip("torch")
+    train, test = make_data()
+    model = build_detector("autoencoder", n_jobs=1).set_params(epochs=5).fit(train)
+
+    rows = test.iloc[10:12].copy()
+    rows.iloc[0, 0], rows.iloc[1, 3] = np.inf, -np.inf
+    assert (model.predict(rows) == -1).all()
@@ -0,0 +1,23 @@
+from benchmarks.bench_pipeline import compare, main
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {
+        "a/parse": {"seconds": 1.0, "peak_mb": 100.0},
+        "a/score": {"seconds": 1.0, "peak_mb": 100.0},
+        "a/drift": {"seconds": 0.001, "peak_mb": 0.1},
+    }
+    current = {
+        "a/parse": {"seconds": 1.1, "peak_mb": 105.0},   # within 20%
+        "a/score": {"seconds": 1.0, "peak_mb": 150.0},   # memory regression
+        "a/drift": {"seconds": 0.002, "peak_mb": 0.1},   # 2x but below the noise floor
+        "b/parse": {"seconds": 9.0},                     # not in the baseline
+    }
+    assert compare(baseline, current, threshold=0.2) == ["a/score"]
+
+
+def test_suite_round_trips_a_baseline(tmp_path):
+    path = tmp_path / "baseline.json"
+    args = ["--shapes", "200x3", "--text-lines", "100", "--repeat", "1", "--stages", "parse", "quality"]
+    assert main(args + ["--save", str(path)]) == 0
+    assert main(args + ["--compare", str(path), "--threshold", "100"]) == 0
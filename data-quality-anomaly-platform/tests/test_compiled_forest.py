@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from app.models.inference import score_anomaly_batch
+from ml.anomaly import compiled_forest
+from ml.anomaly.compiled_forest import CompiledIsolationForest, compiled_scorer, drop_compiled
+from ml.anomaly.isolation_forest import build_model
+
+
+@pytest.mark.parametrize("model", [
+    build_model(),
+    IsolationForest(n_estimators=50, max_features=0.5, max_samples=500, contamination="auto", random_state=1),
+])
+def test_compiled_scores_match_sklearn(model, monkeypatch):
+    rng = np.random.default_rng(0)
+    model.fit(rng.normal(size=(2000, 6)))
+    X = rng.normal(scale=2.0, size=(3000, 6))
+    X[::11, 2] = np.nan
+
+    # Small chunks exercise the chunked path
+    monkeypatch.setattr(compiled_forest, "CHUNK_ROWS", 1000)
+    compiled = CompiledIsolationForest.compile(model)
+
+    np.testing.assert_allclose(compiled.score_samples(X), model.score_samples(X), atol=1e-12)
+    np.testing.assert_allclose(compiled.decision_function(X), model.decision_function(X), atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+
+def test_versioned_scoring_uses_the_cached_compiled_scorer():
+    rng = np.random.default_rng(0)
+    columns = ["a", "b", "c"]
+    model = build_model().fit(rng.normal(size=(500, 3)))
+    records = [dict(zip(columns, row)) for row in rng.normal(scale=3.0, size=(20, 3)).tolist()]
+
+    try:
+        versioned = score_anomaly_batch(model, records, model_version="v-compiled")
+        assert compiled_scorer(model, "v-compiled") is compiled_scorer(model, "v-compiled")
+    finally:
+        drop_compiled("v-compiled")
+    reference = score_anomaly_batch(model, records)
+
+    for a, b in zip(versioned, reference):
+        assert a["prediction"] == b["prediction"]
+        assert a["anomaly_score"] == pytest.approx(b["anomaly_score"], abs=1e-12)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from app.services.dataset_profile import DatasetProfile, merge_profiles, profile_chunks
+from app.services.profiling import profile_structured
+from app.services.sketches import HyperLogLog, KLLSketch
+
+
+def make_frame(n: int = 20000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "amount": rng.normal(100, 15, n),
+        "quantity": rng.integers(0, 1000, n),
+        "region": rng.choice([f"r{i}" for i in range(300)], n),
+    })
+    df.loc[::9, "amount"] = None
+    return df
+
+
+def test_merged_profile_matches_full_frame():
+    df = make_frame()
+    parts = [df.iloc[i:i + 3000] for i in range(0, len(df), 3000)]
+
+    profile = merge_profiles(DatasetProfile.from_dataframe(part) for part in parts)
+    expected_report, expected_features = profile_structured(df)
+
+    report = profile.quality_report()
+    assert report["row_count"] == expected_report["row_count"]
+    assert report["missing_values"] == expected_report["missing_values"]
+    # Within three standard errors of the exact count
+    assert abs(report["duplicate_rows_estimate"] - expected_report["duplicate_rows"]) <= 3 * report["duplicate_rows_error"]
+
+    features = profile.features()
+    assert list(features) == list(expected_features)
+    for key, value in expected_features.items():
+        assert np.isclose(features[key], value)
+
+    summary = profile.column_summary()
+    assert abs(summary["quantity"]["distinct_count"] - 1000) < 50
+    assert abs(summary["region"]["distinct_count"] - 300) < 15
+    assert abs(summary["amount"]["quantiles"]["p50"] - df["amount"].median()) < 1.5
+
+
+def test_profile_serialization_roundtrip():
+    profile = DatasetProfile.from_dataframe(make_frame(5000))
+    restored = DatasetProfile.from_bytes(profile.to_bytes())
+
+    assert restored.features() == profile.features()
+    assert restored.quality_report() == profile.quality_report()
+    assert restored.column_summary() == profile.column_summary()
+
+    # Rolling a restored profile up with a fresh one keeps merging exact
+    rollup = merge_profiles([restored, DatasetProfile.from_dataframe(make_frame(5000, seed=1))])
+    assert rollup.row_count == 10000
+
+
+def test_roundtrip_with_non_string_column_names():
+    df = pd.DataFrame(np.random.default_rng(2).random((100, 3)))
+    profile = DatasetProfile.from_dataframe(df)
+    restored = DatasetProfile.from_bytes(profile.to_bytes())
+
+    assert restored.columns == ["0", "1", "2"]
+    assert restored.quality_report() == profile.quality_report()
+    assert restored.features() == profile.features()
+    # Merging another headerless frame lines up with the restored columns
+    restored.merge(DatasetProfile.from_dataframe(df))
+    assert restored.quality_report()["column_count"] == 3
+
+
+def test_sketch_error_bounds():
+    rng = np.random.default_rng(3)
+    values = rng.random(100000)
+
+    hll = HyperLogLog()
+    hll.add(values)
+    assert abs(hll.estimate() - 100000) / 100000 < 0.05
+
+    kll = KLLSketch()
+    for start in range(0, len(values), 7000):
+        kll.update(values[start:start + 7000])
+    for q, estimate in zip([0.1, 0.5, 0.9], kll.quantiles([0.1, 0.5, 0.9])):
+        # Uniform data: value error equals rank error
+        assert abs(estimate - q) < 0.02
+
+
+def test_profile_chunks_matches_merged_profiles():
+    df = make_frame(4000)
+    chunks = (df.iloc[i:i + 500] for i in range(0, len(df), 500))
+
+    profile = profile_chunks(chunks, max_workers=2)
+    assert profile.row_count == 4000
+    assert profile.features() == merge_profiles(
+        DatasetProfile.from_dataframe(df.iloc[i:i + 500]) for i in range(0, len(df), 500)
+    ).features()
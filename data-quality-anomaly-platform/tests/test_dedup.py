@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from app.services import dedup
+from app.services.dedup import row_hashes, count_duplicates, DuplicateIndex
+
+
+def test_hash_duplicates_match_pandas():
+    df = pd.DataFrame({
+        "amount": [1.0, 1.0, None, None, 2.0, 1.0],
+        "label": ["a", "a", None, None, "b", "c"],
+    })
+
+    assert count_duplicates(row_hashes(df)) == int(df.duplicated().sum()) == 2
+
+
+def test_duplicate_index_spans_batches(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "orders"))
+
+    first = pd.DataFrame({"order_id": [1, 2, 3], "amount": [10.0, 20.0, 30.0]})
+    second = pd.DataFrame({"order_id": [3, 4, 4], "amount": [30.0, 40.0, 40.0]})
+
+    assert index.check_and_add(row_hashes(first)) == 0
+    assert index.check_and_add(row_hashes(second)) == 1
+    assert len(index) == 4
+
+    # Reopening the index from disk keeps earlier batches
+    reopened = DuplicateIndex(str(tmp_path / "orders"))
+    assert reopened.contains(row_hashes(first)).all()
+    assert not np.any(reopened.contains(row_hashes(pd.DataFrame({"order_id": [9], "amount": [0.0]}))))
+
+
+def test_duplicate_index_keeps_few_segments(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "events"))
+    rng = np.random.default_rng(0)
+    batches = [rng.integers(0, 2**63, 100, dtype=np.uint64) for _ in range(64)]
+
+    for batch in batches:
+        assert index.check_and_add(batch) == 0
+    assert index.check_and_add(batches[10][:5]) == 5
+
+    assert len(index) == 64 * 100
+    # Segments are merged as they grow, not rewritten per batch
+    assert len(index._segments()) <= 7
+    assert index.contains(np.concatenate(batches)).all()
+
+
+def test_dataset_names_do_not_collide(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedup, "DEDUP_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(dedup, "_indexes", {})
+
+    assert dedup.get_duplicate_index("a/b").path != dedup.get_duplicate_index("a_b").path
+    assert dedup.get_duplicate_index("../x").path.startswith(str(tmp_path))
@@ -0,0 +1,114 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from app.services import drift_engine, reference_store
+from app.services.drift_service import detect_drift, detect_drift_from_reference
+
+
+@pytest.fixture
+def reference_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(reference_store, "DRIFT_REFERENCE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_frames(n_ref: int, n_curr: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    reference = pd.DataFrame({
+        "amount": rng.normal(100, 10, n_ref),
+        "quantity": rng.integers(0, 5, n_ref),
+        "label": rng.choice(["a", "b"], n_ref),
+    })
+    current = pd.DataFrame({
+        "amount": rng.normal(104, 12, n_curr),
+        "quantity": rng.integers(0, 6, n_curr),
+        "label": rng.choice(["a", "b"], n_curr),
+    })
+    reference.loc[::13, "amount"] = None
+    return reference, current
+
+
+def assert_same_drift(expected, actual):
+    assert actual["columns_analyzed"] == expected["columns_analyzed"]
+    assert actual["drifted_columns"] == expected["drifted_columns"]
+    assert set(actual["details"]) == set(expected["details"])
+    for col, details in expected["details"].items():
+        got = actual["details"][col]
+        assert np.isclose(got["psi"], details["psi"])
+        assert np.isclose(got["kl_divergence"], details["kl_divergence"])
+        assert np.isclose(got["ks_test"]["statistic"], details["ks_test"]["statistic"])
+        assert np.isclose(got["ks_test"]["p_value"], details["ks_test"]["p_value"])
+        assert got["drift_detected"] == details["drift_detected"]
+
+
+@pytest.mark.parametrize("n_ref,n_curr", [(500, 300), (30000, 12000)])
+def test_registered_reference_matches_detect_drift(reference_dir, n_ref, n_curr):
+    reference, current = make_frames(n_ref, n_curr)
+
+    manifest = reference_store.register_reference(reference, "daily-ref")
+    assert [c["name"] for c in manifest["columns"]] == ["amount", "quantity"]
+
+    loaded = reference_store.load_reference("daily-ref")
+    assert_same_drift(detect_drift(reference, current), detect_drift_from_reference(loaded, current))
+
+
+def test_registered_references_are_immutable(reference_dir):
+    reference, current = make_frames(500, 300)
+    reference_store.register_reference(reference, "fixed-ref")
+    loaded = reference_store.load_reference("fixed-ref")
+
+    with pytest.raises(reference_store.ReferenceExistsError):
+        reference_store.register_reference(current, "fixed-ref")
+    assert reference_store.load_reference("fixed-ref") is loaded
+    assert not [p for p in reference_dir.iterdir() if ".tmp-" in p.name]
+
+    # A reference replaced on disk by another process is reopened
+    manifest_path = reference_dir / "fixed-ref" / "manifest.json"
+    os.utime(manifest_path, ns=(0, 0))
+    reopened = reference_store.load_reference("fixed-ref")
+    assert reopened is not loaded
+    assert reopened.manifest == loaded.manifest
+
+
+@pytest.mark.parametrize("n_ref,n_curr", [(500, 300), (30000, 12000)])
+def test_vectorized_matches_detect_drift(n_ref, n_curr):
+    reference, current = make_frames(n_ref, n_curr)
+    reference["constant"] = 1.0
+    current["constant"] = 1.0
+    reference["empty"] = np.nan
+    current["empty"] = 2.0
+
+    expected = detect_drift(reference, current)
+    assert_same_drift(expected, drift_engine.detect_drift_vectorized(reference, current, n_jobs=1))
+
+
+def test_vectorized_parallel_blocks(monkeypatch):
+    rng = np.random.default_rng(3)
+    reference = pd.DataFrame(rng.normal(0, 1, (2000, 12)), columns=[f"c{i}" for i in range(12)])
+    current = pd.DataFrame(rng.normal(0.2, 1.1, (1500, 12)), columns=reference.columns)
+    monkeypatch.setattr(drift_engine, "BLOCK_ELEMENTS", 3500 * 4)
+    monkeypatch.setattr(drift_engine, "DRIFT_PARALLEL_MIN_COLUMNS", 8)
+
+    expected = detect_drift(reference, current)
+    assert_same_drift(expected, drift_engine.detect_drift_vectorized(reference, current, n_jobs=2))
+
+
+def test_shifted_column_is_detected_with_positive_psi():
+    rng = np.random.default_rng(5)
+    reference = pd.DataFrame({"steady": rng.normal(0, 1, 5000), "shifted": rng.normal(0, 1, 5000)})
+    # The steady column is the reference values reordered: no drift at all
+    current = pd.DataFrame({"steady": rng.permutation(reference["steady"].to_numpy()), "shifted": rng.normal(1.5, 1, 5000)})
+
+    for report in (detect_drift(reference, current), drift_engine.detect_drift_vectorized(reference, current, n_jobs=1)):
+        assert all(details["psi"] >= 0 for details in report["details"].values())
+        assert report["details"]["shifted"]["psi"] > 0.25
+        assert report["details"]["shifted"]["drift_detected"]
+        assert not report["details"]["steady"]["drift_detected"]
+        assert report["drifted_columns"] == 1
+
+
+def test_unknown_reference_raises(reference_dir):
+    with pytest.raises(reference_store.ReferenceNotFoundError):
+        reference_store.load_reference("missing")
+    with pytest.raises(reference_store.ReferenceNotFoundError):
+        reference_store.load_reference("../etc")
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from app.services.data_quality import check_structured_data
+from app.services.dedup import row_hashes
+from app.services.dtypes import optimize_dtypes
+from app.services.ingestion import parse_uploaded_file
+
+
+def make_frame(n=1000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "quantity": rng.integers(0, 100, n),
+        "balance": rng.integers(-40000, 40000, n),
+        "count_with_gaps": rng.integers(0, 10, n).astype(float),
+        "halves": rng.integers(0, 8, n) / 2,
+        "amount": rng.normal(100, 15, n),
+        "region": rng.choice(["eu", "us", "apac"], n),
+        "request_id": [f"req-{i}" for i in range(n)],
+        "mixed": [1, "a"] * (n // 2),
+    })
+    df.loc[::7, "count_with_gaps"] = None
+    return df
+
+
+def test_conversions_are_lossless():
+    df = make_frame()
+    optimized = optimize_dtypes(df)
+
+    dtypes = optimized.dtypes.astype(str).to_dict()
+    assert dtypes["quantity"] == "int8"
+    assert dtypes["balance"] == "int32"
+    assert dtypes["count_with_gaps"] == "Int8"
+    assert dtypes["halves"] == "float32"
+    assert dtypes["amount"] == "float64"
+    assert dtypes["region"] == "category"
+    assert dtypes["request_id"] == df["request_id"].dtype
+    assert dtypes["mixed"] == "object"
+
+    pd.testing.assert_frame_equal(
+        optimized.astype(df.dtypes.to_dict()), df, check_dtype=True
+    )
+
+
+def test_row_hashes_ignore_optimization():
+    df = make_frame()
+    np.testing.assert_array_equal(row_hashes(optimize_dtypes(df)), row_hashes(df))
+
+
+def test_quality_report_memory_breakdown():
+    df = make_frame().drop(columns="mixed")
+    parsed = parse_uploaded_file("data.csv", df.to_csv(index=False).encode())
+
+    memory = check_structured_data(parsed)["memory_usage"]
+    region = memory["columns"]["region"]
+    assert region["dtype_after"] == "category"
+    assert region["bytes_after"] < region["bytes_before"]
+    assert memory["columns"]["amount"]["bytes_before"] == memory["columns"]["amount"]["bytes_after"]
+    assert memory["total_bytes_after"] < memory["total_bytes_before"]
+    assert memory["total_bytes_before"] == sum(c["bytes_before"] for c in memory["columns"].values())
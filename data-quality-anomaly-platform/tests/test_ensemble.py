@@ -0,0 +1,68 @@
+import pickle
+import numpy as np
+import pandas as pd
+from app.models.inference import score_anomaly_batch
+from ml.anomaly.ensemble import CascadeEnsemble
+
+
+def make_data(seed=0):
+    rng = np.random.default_rng(seed)
+    train = pd.DataFrame(rng.normal(size=(2000, 5)), columns=list("abcde"))
+    test = rng.normal(size=(1000, 5))
+    test[:20, 0] = 50            # gross outliers, decided by the screen
+    test[20:40, :2] = [2.5, -2.5]  # jointly unusual, borderline on each feature
+    return train, pd.DataFrame(test, columns=train.columns)
+
+
+def test_cascade_screens_most_records_and_catches_outliers():
+    train, test = make_data()
+    model = CascadeEnsemble().fit(train)
+
+    screen, borderline = model.route(test)
+    assert 0 < borderline.mean() < 0.5
+    assert not borderline[:20].any()
+
+    predictions = model.predict(test)
+    assert (predictions[:20] == -1).all()
+    assert (predictions[20:40] == -1).mean() >= 0.8
+    assert (predictions[40:] == -1).mean() < 0.1
+
+
+def test_screened_scores_agree_with_the_expert_sign():
+    train, test = make_data()
+    cascade = CascadeEnsemble().fit(train)
+    # No screening: every record goes to the experts
+    full = CascadeEnsemble(pass_quantile=0.0, fail_z=np.inf).fit(train)
+
+    _, borderline = cascade.route(test)
+    np.testing.assert_allclose(
+        cascade.decision_function(test)[borderline], full.decision_function(test)[borderline]
+    )
+    agree = np.sign(cascade.decision_function(test)) == np.sign(full.decision_function(test))
+    assert agree.mean() > 0.95
+
+
+def test_infinite_values_are_anomalies():
+    train, test = make_data()
+    model = CascadeEnsemble().fit(train)
+    test = test.iloc[40:45].copy()
+    test.iloc[0, 1] = np.inf
+    test.iloc[1, 3] = -np.inf
+    test.iloc[2, 2] = np.nan
+
+    screen, borderline = model.route(test)
+    assert not borderline[:2].any()
+    assert list(model.predict(test)[:3]) == [-1, -1, 1]
+
+
+def test_ensemble_serves_through_the_batch_scorer():
+    train, test = make_data()
+    model = pickle.loads(pickle.dumps(CascadeEnsemble().fit(train)))
+
+    # Records with keys in a different order and one missing value
+    records = [dict(reversed(list(row.items()))) for row in test.head(40).to_dict("records")]
+    del records[-1]["c"]
+    results = score_anomaly_batch(model, records)
+
+    assert [r["prediction"] for r in results[:20]] == ["anomaly"] * 20
+    assert all(np.isfinite(r["anomaly_score"]) for r in results)
@@ -0,0 +1,51 @@
+import asyncio
+import time
+import pytest
+from app.core.executor import StageExecutor
+
+
+def busy(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def fail():
+    raise ValueError("boom")
+
+
+def test_stages_run_off_the_event_loop_with_a_job_cap():
+    executor = StageExecutor(thread_workers=8, process_workers=1, max_jobs=2)
+
+    async def scenario():
+        heavy = [asyncio.create_task(executor.run("profile", busy, 0.2)) for _ in range(4)]
+
+        # The loop stays responsive while heavy stages run
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        ping = time.perf_counter() - started
+
+        results = await asyncio.gather(*heavy)
+        with pytest.raises(ValueError):
+            await executor.run("score", fail)
+        return ping, results
+
+    ping, results = asyncio.run(scenario())
+    executor.shutdown()
+
+    assert ping < 0.1
+    assert results == [0.2] * 4
+
+    stats = executor.stats()["stages"]
+    assert stats["profile"]["count"] == 4
+    assert stats["profile"]["active"] == 0 and stats["profile"]["waiting"] == 0
+    # Two jobs at a time: the second pair waited for the first
+    assert stats["profile"]["queue_wait_seconds"]["max"] >= 0.15
+    assert stats["profile"]["run_seconds"]["p50"] >= 0.2
+    assert stats["score"]["errors"] == 1
+
+
+def test_process_stages_use_the_process_pool():
+    executor = StageExecutor(thread_workers=1, process_workers=1, max_jobs=1, process_stages={"parse"})
+    assert asyncio.run(executor.run("parse", busy, 0.0)) == 0.0
+    assert executor._processes is not None and executor._threads is None
+    executor.shutdown()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from app.services.explainability import generate_explanation, generate_explanations
+from ml.explain import shap_explainer
+
+
+def make_model():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 4)), columns=["a_mean", "a_std", "row_count", "column_count"])
+    return IsolationForest(n_estimators=20, random_state=0).fit(X), X
+
+
+def test_explainer_is_built_once_per_model_version(monkeypatch):
+    model, X = make_model()
+    shap_explainer.clear_explainers()
+
+    built = []
+    original = shap_explainer.shap.TreeExplainer
+
+    def counting_explainer(m):
+        built.append(m)
+        return original(m)
+
+    monkeypatch.setattr(shap_explainer.shap, "TreeExplainer", counting_explainer)
+
+    records = X.head(3).to_dict("records")
+    for features in records:
+        generate_explanation(model, features, model_version="v1")
+    assert len(built) == 1
+
+    shap_explainer.drop_explainer("v1")
+    generate_explanation(model, records[0], model_version="v1")
+    assert len(built) == 2
+
+
+def test_batch_explanations_match_single_calls():
+    model, X = make_model()
+    records = X.head(5).to_dict("records")
+
+    batch = generate_explanations(model, records, top_k=2, model_version="v-batch")
+    single = [generate_explanation(model, r, top_k=2, model_version="v-batch") for r in records]
+
+    assert len(batch) == 5
+    for b, s in zip(batch, single):
+        assert [e["feature"] for e in b] == [e["feature"] for e in s]
+        assert np.allclose([e["impact"] for e in b], [e["impact"] for e in s])
+
+
+def test_unversioned_models_are_not_cached():
+    model, X = make_model()
+    shap_explainer.clear_explainers()
+
+    generate_explanation(model, X.head(1).to_dict("records")[0])
+    assert shap_explainer.cached_explainers() == 0
@@ -0,0 +1,243 @@
+import io
+import json
+import math
+import numpy as np
+import pandas as pd
+from PyPDF2 import PdfReader
+from app.services import ingestion
+from app.services.ingestion import (
+    parse_uploaded_file, iter_uploaded_file, iter_local_file, read_local_file, iter_text_lines, iter_pdf_lines
+)
+from app.services.dedup import row_hashes
+from app.services.aggregation import aggregate_chunks
+from app.services.data_quality import run_data_quality_checks
+from app.services.feature_engineering import generate_features
+
+
+def assert_same_values(expected: dict, actual: dict):
+    assert list(expected) == list(actual)
+    for key, value in expected.items():
+        if isinstance(value, float) and math.isnan(value):
+            assert math.isnan(actual[key])
+        elif isinstance(value, float):
+            assert math.isclose(value, actual[key], rel_tol=1e-9, abs_tol=1e-12)
+        else:
+            assert value == actual[key]
+
+
+def test_chunked_csv_matches_full_parse():
+    # ----------------------------
+    # Step 1: Create sample data
+    # ----------------------------
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "amount": rng.normal(100, 15, 1000),
+        "quantity": rng.integers(1, 5, 1000),
+        "region": rng.choice(["eu", "us"], 1000),
+        "empty": [None] * 1000,
+    })
+    df.loc[::7, "amount"] = None
+    df = pd.concat([df, df.iloc[:10]], ignore_index=True)
+    content = df.to_csv(index=False).encode()
+
+    # ----------------------------
+    # Step 2: Full vs chunked
+    # ----------------------------
+    full_df = parse_uploaded_file("data.csv", content)
+    expected_quality = run_data_quality_checks(full_df)
+    expected_features = generate_features(full_df, expected_quality["data_type"])
+
+    quality_result, features = aggregate_chunks(
+        iter_uploaded_file("data.csv", io.BytesIO(content), chunk_rows=128)
+    )
+
+    assert quality_result["data_type"] == "structured"
+    report = quality_result["quality_report"]
+    expected_report = expected_quality["quality_report"]
+    assert report["row_count"] == expected_report["row_count"]
+    assert report["missing_values"] == expected_report["missing_values"]
+    assert report["duplicate_rows"] == expected_report["duplicate_rows"]
+    assert report["empty_columns"] == expected_report["empty_columns"]
+    assert_same_values(expected_features, features)
+
+
+def test_chunked_text_matches_full_parse():
+    lines = ["System started", "", "ERROR: connection timeout occurred", "x" * 300] * 50
+    content = "\n".join(lines).encode()
+
+    full_df = parse_uploaded_file("app.txt", content)
+    expected_quality = run_data_quality_checks(full_df)
+    expected_features = generate_features(full_df, expected_quality["data_type"])
+
+    quality_result, features = aggregate_chunks(
+        iter_uploaded_file("app.txt", io.BytesIO(content), chunk_rows=33)
+    )
+
+    assert quality_result["data_type"] == "unstructured"
+    assert_same_values(expected_quality["quality_report"], quality_result["quality_report"])
+    assert_same_values(expected_features, features)
+
+
+def test_chunked_json_lines():
+    records = [{"value": float(i), "label": "a" if i % 2 else None} for i in range(50)]
+    content = "\n".join(json.dumps(r) for r in records).encode()
+
+    quality_result, features = aggregate_chunks(
+        iter_uploaded_file("events.jsonl", io.BytesIO(content), chunk_rows=8)
+    )
+
+    assert quality_result["quality_report"]["row_count"] == 50
+    assert quality_result["quality_report"]["missing_values"]["label"] == 25
+    assert features["value_max"] == 49.0
+    assert math.isclose(features["value_mean"], 24.5)
+
+
+def make_columnar_frame() -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "amount": rng.normal(100, 15, 500),
+        "quantity": rng.integers(1, 5, 500),
+        "region": rng.choice(["eu", "us"], 500),
+    })
+    df.loc[::9, "amount"] = None
+    return df
+
+
+def test_columnar_formats_round_trip(tmp_path):
+    df = make_columnar_frame()
+    # Low-cardinality strings are parsed as categoricals
+    expected = df.astype({"region": "category"})
+
+    df.to_parquet(tmp_path / "data.parquet")
+    df.to_feather(tmp_path / "data.feather")
+    (tmp_path / "data.jsonl").write_text(df.to_json(orient="records", lines=True))
+    (tmp_path / "data.csv").write_text(df.to_csv(index=False))
+
+    for name in ["data.parquet", "data.feather", "data.jsonl", "data.csv"]:
+        path = tmp_path / name
+        uploaded = parse_uploaded_file(name, path.read_bytes())
+        pd.testing.assert_frame_equal(uploaded, expected, check_dtype=False)
+
+        # Memory-mapped local read with column projection
+        local = read_local_file(str(path), columns=["amount", "region"])
+        assert list(local.columns) == ["amount", "region"]
+        pd.testing.assert_frame_equal(local, expected[["amount", "region"]], check_dtype=False)
+
+
+def test_chunked_parquet_matches_full_parse(tmp_path):
+    df = make_columnar_frame()
+    df.to_parquet(tmp_path / "data.parquet", row_group_size=64)
+
+    with open(tmp_path / "data.parquet", "rb") as f:
+        chunks = list(iter_uploaded_file("data.parquet", f, chunk_rows=100, columns=["amount"]))
+
+    assert [len(chunk) for chunk in chunks] == [100] * 5
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df[["amount"]])
+
+
+def test_csv_with_short_rows_falls_back_to_pandas():
+    df = parse_uploaded_file("data.csv", b"a,b,c\n1,2,3\n4,5\n")
+    assert df["c"].isna().tolist() == [False, True]
+
+
+def test_csv_types_match_between_full_and_chunked_parse():
+    content = (
+        b"ts,day,at,amount\n"
+        b"2024-01-01 10:00:00,2024-01-01,10:00:00,1.5\n"
+        b"2024-01-02T11:00:00Z,2024-01-02,11:30:00,2.5\n"
+    )
+    full_df = parse_uploaded_file("data.csv", content)
+    chunked = pd.concat(iter_uploaded_file("data.csv", io.BytesIO(content), chunk_rows=1), ignore_index=True)
+
+    # Temporal columns stay as their text in both modes
+    assert full_df["ts"].tolist() == ["2024-01-01 10:00:00", "2024-01-02T11:00:00Z"]
+    assert full_df["day"].tolist() == chunked["day"].tolist()
+    np.testing.assert_array_equal(row_hashes(full_df), row_hashes(chunked))
+
+
+def test_jsonl_column_projection(monkeypatch):
+    lines = [{"a": i, "b": f"x{i}", "c": i / 2} for i in range(5)]
+    content = "\n".join(json.dumps(line) for line in lines).encode()
+
+    df = parse_uploaded_file("data.jsonl", content, columns=["c", "a"])
+    assert list(df.columns) == ["c", "a"]
+    assert df["a"].tolist() == list(range(5))
+
+    # A later value outside the sampled type falls back to a full parse
+    lines.append({"a": 2.5, "b": "y", "c": 1.0})
+    content = "\n".join(json.dumps(line) for line in lines).encode()
+    monkeypatch.setattr(ingestion, "_JSONL_SCHEMA_SAMPLE_BYTES", 40)
+    df = parse_uploaded_file("data.jsonl", content, columns=["a"])
+    assert df["a"].tolist()[-1] == 2.5
+
+
+def test_local_feather_is_chunked(tmp_path):
+    df = make_columnar_frame()
+    df.to_feather(tmp_path / "data.feather")
+
+    chunks = list(iter_local_file(str(tmp_path / "data.feather"), chunk_rows=200, columns=["amount"]))
+    assert [len(chunk) for chunk in chunks] == [200, 200, 100]
+    pd.testing.assert_frame_equal(pd.concat(chunks), df[["amount"]], check_dtype=False)
+
+
+def test_text_lines_match_splitlines_across_chunk_boundaries():
+    text = "first\r\nsécond\rthird\n\nfourth\u2028fifth\r\n\r\nlast line ✓\r"
+    content = text.encode()
+
+    for chunk_bytes in [1, 2, 3, 5, 7, 64]:
+        assert list(iter_text_lines(io.BytesIO(content), chunk_bytes)) == text.splitlines()
+    assert list(iter_text_lines(io.BytesIO(b""))) == []
+
+
+def make_pdf(pages):
+    """
+    Minimal PDF with one Helvetica text line per entry of each page.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        ops = ["BT /F1 12 Tf 72 720 Td"]
+        for i, line in enumerate(lines):
+            ops.append(("" if i == 0 else "0 -14 Td ") + f"({line}) Tj")
+        ops.append("ET")
+        stream = "\n".join(ops).encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def test_pdf_lines_match_joined_page_text(monkeypatch):
+    pages = [[f"page {p} line {i}" for i in range(p % 3 + 1)] for p in range(40)]
+    content = make_pdf(pages)
+
+    reader = PdfReader(io.BytesIO(content))
+    expected = " ".join(page.extract_text() for page in reader.pages).split("\n")
+
+    monkeypatch.setattr(ingestion, "PDF_PARALLEL_MIN_PAGES", 10)
+    assert list(iter_pdf_lines(content, max_workers=1)) == expected
+    assert list(iter_pdf_lines(content, max_workers=3)) == expected
+
+    chunks = list(iter_uploaded_file("doc.pdf", io.BytesIO(content), chunk_rows=25))
+    assert pd.concat(chunks, ignore_index=True)["text"].tolist() == expected
@@ -0,0 +1,103 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from app.services import log_templates
+from app.services.log_templates import TemplateMiner, get_template_miner, template_frequency_features, WILDCARD
+from app.services.feature_engineering import generate_features
+from app.services.aggregation import aggregate_chunks
+
+
+def openstack_lines(n: int, seed: int = 0, abnormal: bool = False):
+    rng = np.random.default_rng(seed)
+    formats = [
+        "nova-api.log.1.2017-05-16_13:53:08 2017-05-16 00:00:{s:02d}.{ms} 25746 INFO nova.osapi_compute.wsgi.server "
+        "[req-{req}] 10.11.10.1 \"GET /v2/{tenant}/servers/detail HTTP/1.1\" status: 200 len: 1893 time: 0.{ms}",
+        "nova-compute.log.1.2017-05-16_13:55:31 2017-05-16 00:00:{s:02d}.{ms} 2931 INFO nova.compute.manager "
+        "[req-{req}] [instance: {tenant}] VM Started (Lifecycle Event)",
+        "nova-compute.log.1.2017-05-16_13:55:31 2017-05-16 00:00:{s:02d}.{ms} 2931 INFO nova.virt.libvirt.imagecache "
+        "[req-{req}] image {tenant} at (/var/lib/nova/instances/_base/{tenant}): checking",
+    ]
+    if abnormal:
+        formats.append(
+            "nova-compute.log.1.2017-05-16_13:55:31 2017-05-16 00:00:{s:02d}.{ms} 2931 ERROR nova.compute.manager "
+            "[req-{req}] [instance: {tenant}] Instance failed to spawn"
+        )
+    return [
+        formats[rng.integers(len(formats))].format(
+            s=int(rng.integers(60)), ms=int(rng.integers(1000)),
+            req=rng.bytes(8).hex(), tenant=rng.bytes(16).hex()
+        )
+        for _ in range(n)
+    ]
+
+
+def test_miner_groups_lines_into_templates():
+    miner = TemplateMiner()
+    lines = openstack_lines(2000)
+    matched, created = miner.match_lines(lines)
+
+    assert len(miner) == 3 and created == 3
+    templates = {cluster.template for cluster in miner.clusters}
+    assert any("VM Started (Lifecycle Event)" in t for t in templates)
+    assert all(WILDCARD in t for t in templates)
+    assert sum(cluster.size for cluster in miner.clusters) == 2000
+
+    # Lines that differ only in a non-numeric token merge into one template
+    miner = TemplateMiner()
+    miner.match("Deleting instance files for alpha")
+    cluster, created = miner.match("Deleting instance files for beta")
+    assert not created
+    assert cluster.template == f"Deleting instance files for {WILDCARD}"
+
+
+def test_dataset_miners_are_bounded(monkeypatch):
+    monkeypatch.setattr(log_templates, "_miners", OrderedDict())
+    monkeypatch.setattr(log_templates, "LOG_TEMPLATE_MAX_MINERS", 2)
+
+    first = get_template_miner("a")
+    get_template_miner("b")
+    assert get_template_miner("a") is first
+    get_template_miner("c")
+
+    assert list(log_templates._miners) == ["a", "c"]
+    assert get_template_miner("a") is first
+
+
+def test_miner_evicts_least_recently_used_templates():
+    miner = TemplateMiner(max_clusters=2, cache_size=10)
+    a, _ = miner.match("alpha one")
+    miner.match("beta two three")
+    miner.match("alpha one")
+    miner.match("gamma four five six")
+
+    assert [c.template for c in miner.clusters] == ["alpha one", "gamma four five six"]
+    _, created = miner.match("beta two three")
+    assert created
+
+
+def test_template_features_flag_new_patterns():
+    miner = TemplateMiner()
+    normal = pd.DataFrame({"text": openstack_lines(2000, seed=1)})
+    abnormal = pd.DataFrame({"text": openstack_lines(2000, seed=2, abnormal=True)})
+
+    first = generate_features(normal, "unstructured", template_miner=miner)
+    again = generate_features(normal, "unstructured", template_miner=miner)
+    shifted = generate_features(abnormal, "unstructured", template_miner=miner)
+
+    assert first["new_template_ratio"] > 0 and again["new_template_ratio"] == 0
+    assert shifted["new_template_ratio"] > 0
+    assert shifted["template_count"] == again["template_count"] + 1
+    assert np.isclose(sum(v for k, v in again.items() if k.startswith("template_bucket_")), 1.0)
+    assert "template_count" not in generate_features(normal, "unstructured")
+
+
+def test_chunked_template_features_match_full_parse():
+    df = pd.DataFrame({"text": openstack_lines(3000, seed=4)})
+    expected = generate_features(df, "unstructured", template_miner=TemplateMiner())
+
+    chunks = [df.iloc[i:i + 700] for i in range(0, len(df), 700)]
+    _, features = aggregate_chunks(chunks, template_miner=TemplateMiner())
+
+    assert features["template_count"] == expected["template_count"]
+    for key, value in expected.items():
+        assert np.isclose(features[key], value), key
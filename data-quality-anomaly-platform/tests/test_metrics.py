@@ -0,0 +1,58 @@
+import logging
+import pytest
+from app.core import metrics
+from app.core.metrics import MetricsRegistry, instrumented, request_id_var, trace_span
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs", ["kind"])
+    gauge = registry.gauge("queue_depth", "Depth", callback=lambda: 3)
+    histogram = registry.histogram("job_seconds", "Latency", ["kind"], buckets=[0.1, 1.0])
+
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    histogram.observe(0.05, kind="a")
+    histogram.observe(0.5, kind="a")
+    histogram.observe(5.0, kind="a")
+
+    text = registry.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="a"} 3.0' in text
+    assert "queue_depth 3.0" in text
+    assert 'job_seconds_bucket{kind="a",le="0.1"} 1' in text
+    assert 'job_seconds_bucket{kind="a",le="1.0"} 2' in text
+    assert 'job_seconds_bucket{kind="a",le="+Inf"} 3' in text
+    assert 'job_seconds_count{kind="a"} 3' in text
+    assert registry.counter("jobs_total", "Jobs", ["kind"]) is counter
+
+
+def test_instrumented_records_stage_latency_rows_and_errors():
+    @instrumented("unit-test", rows=lambda items: len(items))
+    def stage(items):
+        if not items:
+            raise ValueError("empty")
+        return items
+
+    before = metrics.STAGE_SECONDS.count(stage="unit-test")
+    stage([1, 2, 3])
+    with pytest.raises(ValueError):
+        stage([])
+
+    assert metrics.STAGE_SECONDS.count(stage="unit-test") == before + 2
+    assert metrics.STAGE_ROWS.value(stage="unit-test") >= 3
+    assert metrics.STAGE_ERRORS.value(stage="unit-test") >= 1
+
+
+def test_trace_spans_carry_the_request_id(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "TRACE_ENABLED", True)
+    token = request_id_var.set("abc123")
+    try:
+        with caplog.at_level(logging.INFO, logger=metrics.trace_logger.name):
+            with trace_span("features", rows=10):
+                pass
+    finally:
+        request_id_var.reset(token)
+
+    assert "request_id=abc123 span=features" in caplog.text
+    assert "rows=10" in caplog.text
@@ -0,0 +1,105 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from sklearn.ensemble import IsolationForest
+from app.models import inference
+from app.models.inference import score_anomaly
+from ml.anomaly import compiled_forest
+from ml.explain.shap_explainer import drop_explainer
+from app.models.manager import ModelManager
+
+
+class FakeRegistry:
+    """
+    Stands in for MlflowClient.search_model_versions
+    """
+    def __init__(self):
+        self.versions = []
+
+    def promote(self, version: str, stage: str = "Production"):
+        self.versions.append(SimpleNamespace(version=version, current_stage=stage))
+
+    def search_model_versions(self, filter_string):
+        return list(self.versions)
+
+
+def test_manager_swaps_in_new_production_version():
+    registry = FakeRegistry()
+    loaded = []
+
+    def loader(version):
+        loaded.append(version)
+        return SimpleNamespace(name=f"model-v{version}")
+
+    manager = ModelManager(client=registry, loader=loader, poll_interval=0)
+    swaps = []
+    manager.add_swap_listener(lambda old, new, model: swaps.append((old, new)))
+
+    # Nothing in Production yet
+    assert manager.refresh() is False
+    assert manager.status()["loaded"] is False
+
+    registry.promote("1")
+    registry.promote("2", stage="Staging")
+    manager.start()
+    model, version = manager.get()
+    assert (model.name, version) == ("model-v1", "1")
+
+    # Same version again is not reloaded
+    assert manager.refresh() is False
+    assert loaded == ["1"]
+
+    inference.feature_order(model, [{"a": 1.0}], "1")
+    registry.promote("3")
+    assert manager.refresh() is True
+    assert manager.get()[1] == "3"
+    # Per-version state of the old version is released
+    assert "1" not in inference._feature_orders
+    assert swaps == [(None, "1"), ("1", "3")]
+
+    status = manager.status()
+    assert status["version"] == "3"
+    assert status["last_load"]["load_seconds"] >= 0
+    manager.stop()
+
+
+def test_non_blocking_get_loads_in_background():
+    registry = FakeRegistry()
+    registry.promote("1")
+    release = threading.Event()
+
+    def loader(version):
+        release.wait(5)
+        return SimpleNamespace(name=f"model-v{version}")
+
+    manager = ModelManager(client=registry, loader=loader, poll_interval=0)
+    with pytest.raises(RuntimeError, match="retry"):
+        manager.get(block=False)
+    # A second caller does not start another load
+    background = manager._background_load
+    with pytest.raises(RuntimeError):
+        manager.get(block=False)
+    assert manager._background_load is background
+
+    release.set()
+    background.join(timeout=5)
+    assert manager.get(block=False)[1] == "1"
+
+
+def test_failed_compilation_falls_back_to_sklearn(monkeypatch):
+    def broken_compile(model):
+        raise ValueError("unsupported tree layout")
+
+    monkeypatch.setattr(compiled_forest.CompiledIsolationForest, "compile", staticmethod(broken_compile))
+    registry = FakeRegistry()
+    registry.promote("7")
+    model = IsolationForest(n_estimators=10, random_state=0).fit([[0.0], [1.0], [2.0], [3.0]])
+    manager = ModelManager(client=registry, loader=lambda version: model, poll_interval=0)
+
+    try:
+        assert manager.refresh() is True
+        result = score_anomaly(model, {"x": 1.5}, "7")
+        assert result["prediction"] == ("anomaly" if model.decision_function([[1.5]])[0] < 0 else "normal")
+    finally:
+        compiled_forest.drop_compiled("7")
+        drop_explainer("7")
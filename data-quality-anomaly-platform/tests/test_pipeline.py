@@ -84,3 +84,45 @@ def test_unstructured_text_pipeline():
     assert "avg_text_length" in features
     assert "line_count" in features
     assert features["line_count"] == 5
+
+
+def test_fused_profile_matches_per_column_reductions():
+    import numpy as np
+    from app.services.profiling import profile_dataframe
+
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(200, 30)), columns=[f"c{i}" for i in range(30)])
+    df.iloc[::5, 3] = None
+    df["all_missing"] = np.nan
+    df["label"] = rng.choice(["a", None], 200)
+
+    quality_result, features = profile_dataframe(df)
+    report = quality_result["quality_report"]
+
+    assert report["missing_values"] == df.isnull().sum().to_dict()
+    assert report["empty_columns"] == ["all_missing"]
+
+    for col in df.select_dtypes(include=np.number).columns:
+        for stat in ["mean", "std", "min", "max"]:
+            expected = float(getattr(df[col], stat)())
+            assert np.isclose(features[f"{col}_{stat}"], expected, equal_nan=True)
+        assert features[f"{col}_missing_ratio"] == float(df[col].isnull().mean())
+
+
+def test_batch_scoring_matches_sklearn_predict():
+    import numpy as np
+    from sklearn.ensemble import IsolationForest
+    from app.models.inference import score_anomaly_batch
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 3)), columns=["a", "b", "c"])
+    model = IsolationForest(n_estimators=25, contamination=0.1, random_state=0).fit(X)
+
+    # Keys deliberately out of fitted order
+    records = X[["c", "a", "b"]].to_dict("records")
+    results = score_anomaly_batch(model, records, model_version="test")
+
+    expected_scores = model.decision_function(X)
+    expected_predictions = model.predict(X)
+    assert np.allclose([r["anomaly_score"] for r in results], expected_scores)
+    assert [r["prediction"] == "anomaly" for r in results] == list(expected_predictions == -1)
@@ -0,0 +1,45 @@
+import io
+from app.services.result_cache import ResultCache, cache_key, content_digest, stream_digest
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    cache = ResultCache(directory=str(tmp_path), memory_bytes=400, disk_bytes=10**6)
+    keys = [cache_key(content_digest(str(i).encode()), ext="csv") for i in range(5)]
+    for i, key in enumerate(keys):
+        cache.put(key, "1", {"value": i, "padding": "x" * 100})
+
+    stats = cache.stats()
+    # Only the most recent entries fit in memory; all of them are on disk
+    assert stats["memory_entries"] < 5
+    assert stats["disk_entries"] == 5
+
+    assert cache.get(keys[0], "1")["value"] == 0   # from disk, promoted
+    assert cache.get(keys[0], "1")["value"] == 0   # from memory
+    assert cache.get(keys[0], "2") is None         # other model version
+
+    # A restarted process finds the disk tier
+    restarted = ResultCache(directory=str(tmp_path), memory_bytes=400, disk_bytes=10**6)
+    assert restarted.get(keys[3], "1")["value"] == 3
+
+
+def test_disk_eviction_and_invalidation(tmp_path):
+    cache = ResultCache(directory=str(tmp_path), memory_bytes=0, disk_bytes=500)
+    for i in range(10):
+        cache.put(f"k{i}", "1", {"padding": "x" * 100})
+    assert cache.stats()["disk_bytes"] <= 500
+    assert cache.get("k9", "1") is not None
+    assert cache.get("k0", "1") is None
+
+    cache.put("new", "2", {"value": 1})
+    cache.invalidate(keep_version="2")
+    assert cache.get("k9", "1") is None
+    assert cache.get("new", "2") == {"value": 1}
+    assert not (tmp_path / "1").exists()
+
+
+def test_stream_digest_matches_content_digest():
+    content = b"a,b\n1,2\n" * 100000
+    stream = io.BytesIO(content)
+    assert stream_digest(stream) == content_digest(content)
+    assert stream.tell() == 0
+    assert cache_key("d", ext="csv", columns=None) != cache_key("d", ext="csv", columns=["a"])
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from app.services.row_scoring import RowScorer, score_rows
+
+
+def _frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "latency": rng.normal(100, 10, n),
+        "size": rng.normal(5, 1, n),
+        "host": rng.choice(["a", "b"], n),
+    })
+    df.loc[[7, n // 2, n - 1], "latency"] = 10000.0
+    return df
+
+
+def test_top_rows_are_the_planted_outliers():
+    result = score_rows(_frame(), top_n=3)
+
+    assert result["rows_scored"] == 5000
+    assert result["features"] == ["latency", "size", "null_count"]
+    top = result["top_anomalies"]
+    assert sorted(row["row"] for row in top) == [7, 2500, 4999]
+    assert all(row["anomaly_score"] < 0 and row["record"]["latency"] == 10000.0 for row in top)
+    assert 0 < result["anomalous_rows"] < 5000 * 0.05
+
+
+def test_chunks_are_numbered_across_the_upload():
+    df = _frame()
+    scorer = RowScorer(top_n=3, chunk_rows=700)
+    for chunk in scorer.observe([df.iloc[:3000], df.iloc[3000:].reset_index(drop=True)]):
+        assert len(chunk)
+
+    result = scorer.result()
+    assert result["rows_scored"] == 5000
+    assert [row["row"] for row in result["top_anomalies"]] == [7, 2500, 4999]
+
+
+def test_missing_values_and_text_rows():
+    df = _frame(1000)
+    df.loc[3, ["latency", "size", "host"]] = None
+    top = score_rows(df, top_n=4)["top_anomalies"]
+    assert top[-1]["record"] == {"latency": None, "size": None, "host": None}
+
+    lines = pd.DataFrame({"text": ["GET /index 200", "GET /health 200"] * 500 + ["#" * 400]})
+    result = score_rows(lines, top_n=1)
+    assert result["features"][0] == "text_length"
+    assert result["top_anomalies"][0]["row"] == 1000
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.services import reference_store, stream_drift
+from app.services.stream_drift import PageHinkley, StreamDriftMonitor
+
+
+@pytest.fixture
+def reference(tmp_path, monkeypatch):
+    monkeypatch.setattr(reference_store, "DRIFT_REFERENCE_DIR", str(tmp_path))
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "latency": rng.normal(100, 10, 5000),
+        "size": rng.exponential(2.0, 5000),
+        "constant": np.ones(5000),
+    })
+    reference_store.register_reference(df, "stream-ref")
+    return reference_store.load_reference("stream-ref")
+
+
+@pytest.fixture
+def alerts(monkeypatch):
+    sent = []
+    monkeypatch.setattr(stream_drift, "send_alert", lambda title, message, severity, details, context=None: sent.append(title))
+    return sent
+
+
+def _batch(rng, shift=0.0, n=500):
+    return pd.DataFrame({
+        "latency": rng.normal(100 + shift, 10, n),
+        "size": rng.exponential(2.0, n),
+        "constant": np.ones(n),
+    })
+
+
+def test_window_psi_matches_reference_psi(reference, alerts):
+    rng = np.random.default_rng(1)
+    monitor = StreamDriftMonitor.from_reference(reference, sliding_windows=3)
+    batches = [_batch(rng) for _ in range(5)]
+    for batch in batches:
+        report = monitor.update(batch)
+
+    # The sliding window only holds the last three batches; outer buckets
+    # are open-ended, as if values were clipped to the reference range
+    window = pd.concat(batches[-3:])
+    edges = reference.psi_edges[0]
+    sliding = report["sliding"]
+    assert sliding["latency"]["count"] == len(window)
+    assert sliding["latency"]["psi"] == pytest.approx(
+        reference.psi("latency", np.clip(window["latency"].to_numpy(), edges[0], edges[-1]))
+    )
+    assert sliding["latency"]["mean"] == pytest.approx(window["latency"].mean())
+    assert sliding["latency"]["std"] == pytest.approx(window["latency"].std())
+    assert sliding["constant"]["psi"] == 0.0
+    assert alerts == []
+
+
+def test_tumbling_window_resets(reference, alerts):
+    rng = np.random.default_rng(2)
+    monitor = StreamDriftMonitor.from_reference(reference, tumbling_windows=2)
+    reports = [monitor.update(_batch(rng, n=100)) for _ in range(4)]
+
+    assert [r["tumbling"] is not None for r in reports] == [False, True, False, True]
+    assert reports[3]["tumbling"]["size"]["count"] == 200
+
+
+def test_shift_alerts_once(reference, alerts):
+    rng = np.random.default_rng(3)
+    monitor = StreamDriftMonitor.from_reference(reference, sliding_windows=2)
+    for _ in range(3):
+        monitor.update(_batch(rng))
+    assert alerts == []
+
+    changes = []
+    for _ in range(4):
+        report = monitor.update(_batch(rng, shift=30))
+        changes += report["changes"]
+
+    assert report["sliding"]["latency"]["drift_detected"]
+    assert not report["sliding"]["size"]["drift_detected"]
+    assert any(c["column"] == "latency" and c["direction"] == "increase" for c in changes)
+    # PSI alerts on the transition only, change points on every alarm
+    assert alerts.count("Drift detected in stream-ref") == 1
+    assert alerts.count("Distribution change in stream-ref") == len(changes)
+
+
+def test_window_std_is_stable_for_large_means(tmp_path, monkeypatch):
+    monkeypatch.setattr(reference_store, "DRIFT_REFERENCE_DIR", str(tmp_path))
+    rng = np.random.default_rng(5)
+    offset = 1e9
+    reference_store.register_reference(pd.DataFrame({"ts": offset + rng.normal(0, 1, 5000)}), "large-ref")
+    monitor = StreamDriftMonitor.from_reference(reference_store.load_reference("large-ref"), sliding_windows=3)
+
+    batches = [pd.DataFrame({"ts": offset + rng.normal(0, 1, 500)}) for _ in range(5)]
+    for batch in batches:
+        report = monitor.update(batch)
+
+    window = pd.concat(batches[-3:])["ts"]
+    assert report["sliding"]["ts"]["std"] == pytest.approx(window.std(), rel=1e-6)
+
+
+def test_page_hinkley_ignores_noise():
+    rng = np.random.default_rng(4)
+    detector = PageHinkley(delta=0.1, threshold=2.0)
+    assert all(detector.update(x) is None for x in rng.normal(0, 0.05, 500))
+    assert any(detector.update(1.0) == "increase" for _ in range(10))
@@ -0,0 +1,183 @@
+import threading
+import time
+from types import SimpleNamespace
+from kafka.errors import CommitFailedError
+from kafka.structs import TopicPartition
+from app.services import streaming
+from app.services.streaming import StreamingService
+
+
+class FakeConsumer:
+    """
+    Stands in for KafkaConsumer: serves pre-built messages per partition
+    and records commits / pauses.
+    """
+    def __init__(self, messages_by_partition, per_poll: int = 4):
+        self.pending = {tp: list(msgs) for tp, msgs in messages_by_partition.items()}
+        self.per_poll = per_poll
+        self.committed = {}
+        self.paused_partitions = set()
+        self.pause_calls = 0
+        self.closed = False
+
+    def poll(self, timeout_ms=0):
+        batch = {}
+        for tp, msgs in self.pending.items():
+            if tp in self.paused_partitions or not msgs:
+                continue
+            batch[tp], self.pending[tp] = msgs[:self.per_poll], msgs[self.per_poll:]
+        if not batch:
+            time.sleep(timeout_ms / 1000)
+        return batch
+
+    def assignment(self):
+        return set(self.pending)
+
+    def pause(self, *partitions):
+        self.pause_calls += 1
+        self.paused_partitions.update(partitions)
+
+    def paused(self):
+        return set(self.paused_partitions)
+
+    def resume(self, *partitions):
+        self.paused_partitions.difference_update(partitions)
+
+    def commit(self, offsets):
+        for tp, meta in offsets.items():
+            assert meta.offset >= self.committed.get(tp, 0)
+            self.committed[tp] = meta.offset
+
+    def close(self):
+        self.closed = True
+
+
+class SlowService(StreamingService):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.windows = []
+
+    def process_window(self, window, features):
+        time.sleep(0.05)
+        self.windows.append((window.size, features["row_count"]))
+
+
+def make_messages(partition: int, count: int):
+    return [
+        SimpleNamespace(offset=i, value={"value": float(i), "partition": partition, **({"extra": 1} if i % 7 == 0 else {})})
+        for i in range(count)
+    ]
+
+
+def test_streaming_pipeline_commits_after_processing(monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_POLL_TIMEOUT_MS", 20)
+    p0, p1 = TopicPartition("events", 0), TopicPartition("events", 1)
+    consumer = FakeConsumer({p0: make_messages(0, 23), p1: make_messages(1, 14)})
+    service = SlowService(
+        "events", consumer=consumer, window_size=5, window_seconds=0.2, queue_size=1,
+        manager=SimpleNamespace(get=lambda: (_ for _ in ()).throw(RuntimeError()))
+    )
+
+    thread = threading.Thread(target=service.start)
+    thread.start()
+    deadline = time.time() + 10
+    while consumer.committed != {p0: 23, p1: 14} and time.time() < deadline:
+        time.sleep(0.05)
+    service.stop()
+    thread.join(timeout=10)
+
+    assert consumer.committed == {p0: 23, p1: 14}
+    assert consumer.closed
+    assert service.records_processed == 37
+    assert sum(size for size, _ in service.windows) == 37
+    assert all(size == rows for size, rows in service.windows)
+    # Scoring is the slow stage, so the bounded queues pushed back on the consumer
+    assert consumer.pause_calls > 0
+
+
+class RebalancingConsumer(FakeConsumer):
+    """
+    Gains an unpaused partition the first time the service pauses, as if
+    a rebalance assigned it mid-backoff.
+    """
+    def __init__(self, messages_by_partition, extra_partition, extra_messages, **kwargs):
+        super().__init__(messages_by_partition, **kwargs)
+        self.extra = (extra_partition, extra_messages)
+
+    def pause(self, *partitions):
+        super().pause(*partitions)
+        if self.extra is not None:
+            tp, msgs = self.extra
+            self.pending[tp] = list(msgs)
+            self.extra = None
+
+
+def test_records_polled_while_paused_are_kept(monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_POLL_TIMEOUT_MS", 20)
+    p0, p1 = TopicPartition("events", 0), TopicPartition("events", 1)
+    consumer = RebalancingConsumer({p0: make_messages(0, 30)}, p1, make_messages(1, 12), per_poll=10)
+    service = SlowService(
+        "events", consumer=consumer, window_size=5, window_seconds=0.2, queue_size=1,
+        manager=SimpleNamespace(get=lambda: (_ for _ in ()).throw(RuntimeError()))
+    )
+
+    thread = threading.Thread(target=service.start)
+    thread.start()
+    deadline = time.time() + 10
+    while consumer.committed != {p0: 30, p1: 12} and time.time() < deadline:
+        time.sleep(0.05)
+    service.stop()
+    thread.join(timeout=10)
+
+    assert consumer.extra is None
+    assert consumer.committed == {p0: 30, p1: 12}
+    assert service.records_processed == 42
+
+
+class FlakyCommitConsumer(FakeConsumer):
+    """
+    Fails its first commit the way a rebalance does, and revokes `revoke`
+    on its third poll.
+    """
+    def __init__(self, messages_by_partition, revoke, **kwargs):
+        super().__init__(messages_by_partition, **kwargs)
+        self.revoke = revoke
+        self.listener = None
+        self.polls = 0
+        self.failed_commits = 0
+
+    def poll(self, timeout_ms=0):
+        self.polls += 1
+        if self.polls == 3:
+            self.listener.on_partitions_revoked({self.revoke})
+        return super().poll(timeout_ms)
+
+    def commit(self, offsets):
+        if not self.failed_commits:
+            self.failed_commits += 1
+            raise CommitFailedError("group rebalanced")
+        super().commit(offsets)
+
+
+def test_failed_commits_and_revocations_do_not_stop_the_consumer(monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_POLL_TIMEOUT_MS", 20)
+    p0, p1 = TopicPartition("events", 0), TopicPartition("events", 1)
+    consumer = FlakyCommitConsumer({p0: make_messages(0, 23), p1: make_messages(1, 14)}, revoke=p1)
+    service = SlowService(
+        "events", consumer=consumer, window_size=5, window_seconds=0.2, queue_size=1,
+        manager=SimpleNamespace(get=lambda: (_ for _ in ()).throw(RuntimeError()))
+    )
+    consumer.listener = service
+
+    thread = threading.Thread(target=service.start)
+    thread.start()
+    deadline = time.time() + 10
+    while consumer.committed.get(p0) != 23 and time.time() < deadline:
+        time.sleep(0.05)
+    service.stop()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive() and consumer.closed
+    assert consumer.failed_commits == 1
+    assert consumer.committed[p0] == 23
+    assert service.records_processed == 37
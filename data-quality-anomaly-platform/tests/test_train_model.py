@@ -0,0 +1,42 @@
+import pandas as pd
+from scripts.train_model import CHUNK_SIZE_FEATURES, discover_files, featurize, iter_chunks, main
+
+
+def write_logs(directory, files=2, lines=500):
+    for f in range(files):
+        text = "\n".join(
+            f"2017-05-16 00:00:{i % 60:02d} {'ERROR' if i % 50 == 0 else 'INFO'} nova.compute req-{i} instance {i * 7}"
+            for i in range(lines)
+        )
+        (directory / f"day{f}.log").write_text(text)
+    (directory / "notes.md").write_text("not training data")
+
+
+def test_parallel_featurization_matches_serial(tmp_path):
+    write_logs(tmp_path)
+    files = discover_files([str(tmp_path)])
+    assert [p.name for p in files] == ["day0.log", "day1.log"]
+
+    serial, rows = featurize(iter_chunks(files, 100), workers=1)
+    parallel, parallel_rows = featurize(iter_chunks(files, 100), workers=2)
+
+    assert rows == parallel_rows == 1000
+    assert len(serial) == 10
+    pd.testing.assert_frame_equal(pd.DataFrame(serial), pd.DataFrame(parallel))
+
+
+def test_cli_writes_features_and_fits(tmp_path):
+    write_logs(tmp_path)
+    output = tmp_path / "features.parquet"
+
+    model_dir = tmp_path / "model"
+    args = [str(tmp_path), "--output", str(output), "--chunk-rows", "100", "--workers", "1", "--n-jobs", "1"]
+    assert main(args + ["--no-register", "--model-output", str(model_dir)]) == 0
+    X = pd.read_parquet(output)
+    assert len(X) == 10
+    assert not set(CHUNK_SIZE_FEATURES) & set(X.columns)
+
+    assert (model_dir / "MLmodel").is_file()
+
+    refit = ["--from-features", str(output), "--n-jobs", "1", "--no-register", "--model-output", str(tmp_path / "refit")]
+    assert main(refit) == 0